@@ -36,7 +36,7 @@ def debug_zones():
     ]
     
     print("🔍 Initializing processor...")
-    processor = VisionProcessor()
+    processor = VisionProcessor(debug_zones=True)
     
     print("🔍 Processing frame...")
     queue_counts, detections = processor.process_frame(frame, polygons)
@@ -0,0 +1,449 @@
+import json
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from numpy_policy import file_hash
+from policy_cache import CachedPolicy, load_cache_settings, load_cached_policy
+
+sys.path.append(str(Path(__file__).parent.parent))  # Shared metrics registry
+from metrics import counter
+
+CONFIG_PATH = Path(__file__).parent.parent.parent.parent / "config.json"
+
+# Used when config.json has no models.traffic_ai.registry section; paths are relative to config.json
+DEFAULT_REGISTRY_SETTINGS = {
+    'path': 'project/models/registry',
+    'poll_interval_s': 5.0,
+    'probe_path': 'project/models/registry/probes.npz',
+    'probe_size': 512,
+    'min_probe_agreement': 0.95,
+    'min_live_agreement': 0.9,
+    'shadow_log': 'project/results/shadow_disagreements.jsonl',
+    'shadow_queue_size': 1000,
+}
+
+SWAPS = counter('traffic_model_swaps_total', 'Policies put live by the model registry', ['version'])
+REJECTED = counter('traffic_model_rejected_total', 'Candidate policies that failed probe validation', ['version'])
+SHADOW_COMPARED = counter('traffic_shadow_compared_total', 'Live decisions replayed on the shadow candidate')
+SHADOW_DISAGREEMENTS = counter('traffic_shadow_disagreements_total',
+                               'Decisions where the shadow candidate and the live policy differ')
+
+
+def load_registry_settings(config_path=CONFIG_PATH):
+    """
+    Reads the model registry settings from config.json, falling back to defaults.
+    """
+    settings = dict(DEFAULT_REGISTRY_SETTINGS)
+    try:
+        with open(config_path) as f:
+            settings.update(json.load(f).get('models', {}).get('traffic_ai', {}).get('registry', {}))
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read {config_path} ({e}), using the default model registry")
+    for key in ('path', 'probe_path', 'shadow_log'):
+        settings[key] = Path(config_path).parent / settings[key]
+    return settings
+
+
+def _version_key(version):
+    # v2 < v10
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', version)]
+
+
+class ModelRegistry:
+    """
+    Directory of versioned policies:
+
+        registry/
+            v1/model.zip        (and/or model.npz, the NumPy export)
+            v2/model.zip
+            LIVE                version to serve; required, nothing is served from the registry without it
+            SHADOW              optional candidate to compare against LIVE
+            probes.npz          observations, optionally the expected actions
+
+    Deploying is copying a new version directory in and editing LIVE or
+    SHADOW; the serving process picks the change up on its next poll. A
+    version only ever goes live by being named in LIVE.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.root = Path(settings['path'])
+        self._hashes = {}  # path -> ((mtime_ns, size), sha256)
+
+    def versions(self):
+        if not self.root.is_dir():
+            return []
+        versions = [d.name for d in self.root.iterdir()
+                    if d.is_dir() and (any(d.glob('*.zip')) or any(d.glob('*.npz')))]
+        return sorted(versions, key=_version_key)
+
+    def model_path(self, version):
+        """
+        Model file of a version; the .zip path even when only its .npz export was deployed.
+        """
+        directory = self.root / version
+        zips = sorted(directory.glob('*.zip'))
+        if zips:
+            return zips[0]
+        npzs = sorted(directory.glob('*.npz'))
+        if npzs:
+            return npzs[0].with_suffix('.zip')
+        raise FileNotFoundError(f"No model in {directory}")
+
+    def fingerprint(self, version):
+        """
+        Hash of the deployed file, so a version overwritten in place is reloaded too.
+
+        The file is only re-hashed when its mtime or size changed since the last poll.
+        """
+        path = self.model_path(version)
+        path = path if path.exists() else path.with_suffix('.npz')
+        stat = path.stat()
+        cached = self._hashes.get(path)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+        digest = file_hash(path)
+        self._hashes[path] = ((stat.st_mtime_ns, stat.st_size), digest)
+        return digest
+
+    def _pointer(self, name):
+        path = self.root / name
+        if not path.exists():
+            return None
+        return path.read_text().strip() or None
+
+    def live_version(self):
+        """
+        The version LIVE names, or None when LIVE is missing or names no deployed version.
+        """
+        pointer = self._pointer('LIVE')
+        return pointer if pointer is not None and pointer in self.versions() else None
+
+    def shadow_version(self):
+        pointer = self._pointer('SHADOW')
+        return pointer if pointer in self.versions() else None
+
+    def probes(self):
+        """
+        Probe observations and their expected actions (None when the probe file has none).
+
+        Without a probe file, a fixed sample of the decision-cache domain is
+        used: integer queue counts with a one-hot phase.
+        """
+        probe_path = Path(self.settings['probe_path'])
+        if probe_path.exists():
+            with np.load(probe_path) as data:
+                expected = data['actions'] if 'actions' in data else None
+                return data['observations'].astype(np.float32), expected
+
+        cache = load_cache_settings()
+        rng = np.random.default_rng(0)
+        counts = rng.integers(0, cache['max_count'] + 1, size=(self.settings['probe_size'], cache['num_counts']))
+        if not cache['num_phases']:
+            return counts.astype(np.float32), None
+        phases = np.eye(cache['num_phases'])[rng.integers(0, cache['num_phases'], size=len(counts))]
+        return np.concatenate([counts, phases], axis=1).astype(np.float32), None
+
+    def validate(self, policy, reference=None, enforce_reference=False):
+        """
+        Runs the probe set through a loaded policy and returns a report.
+
+        Raises ValueError when the policy fails on the probes, returns
+        anything but one non-negative integer action per probe, or agrees
+        with the probe file's expected actions less than `min_probe_agreement`.
+        Without expected actions, agreement with `reference` (the live policy)
+        is the only behavioural check; with `enforce_reference` it must reach
+        `min_live_agreement`, otherwise it is only reported.
+
+        Both policies are run without their decision caches, so the probes
+        neither evict real entries nor show up in the cache stats.
+        """
+        policy, reference = _uncached(policy), _uncached(reference)
+        observations, expected = self.probes()
+        start = time.perf_counter()
+        try:
+            actions, _ = policy.predict(observations, deterministic=True)
+        except Exception as e:
+            raise ValueError(f"predict failed on the probe set: {e}") from e
+        elapsed = time.perf_counter() - start
+
+        actions = np.asarray(actions).reshape(-1)
+        if len(actions) != len(observations):
+            raise ValueError(f"{len(actions)} actions for {len(observations)} probes")
+        if not np.all(np.isfinite(actions)) or np.any(actions < 0) or np.any(actions != np.round(actions)):
+            raise ValueError("actions are not non-negative integers")
+
+        report = {'probes': len(observations), 'probe_ms': round(elapsed * 1000, 3),
+                  'switch_rate': float(np.mean(actions == 1))}
+        if expected is not None:
+            report['expected_agreement'] = float(np.mean(actions == np.asarray(expected).reshape(-1)))
+            if report['expected_agreement'] < self.settings['min_probe_agreement']:
+                raise ValueError(f"agrees with the expected probe actions on {report['expected_agreement']:.1%}, "
+                                 f"needs {self.settings['min_probe_agreement']:.0%}")
+        if reference is not None:
+            reference_actions, _ = reference.predict(observations, deterministic=True)
+            report['live_agreement'] = float(np.mean(actions == np.asarray(reference_actions).reshape(-1)))
+            if expected is None and enforce_reference and \
+                    report['live_agreement'] < self.settings['min_live_agreement']:
+                raise ValueError(f"agrees with the live policy on {report['live_agreement']:.1%}, "
+                                 f"needs {self.settings['min_live_agreement']:.0%} without expected probe actions")
+        return report
+
+
+def _uncached(policy):
+    return policy.policy if isinstance(policy, CachedPolicy) else policy
+
+
+class HotSwapPolicy:
+    """
+    The policy the server calls, with the live model replaceable while it runs.
+
+    The live (version, policy) pair is one attribute, replaced in a single
+    assignment; every `predict()` reads it once, so a request (or a batch of
+    the inference queue) is answered by exactly one model and a swap lands
+    between requests without locks on the hot path. A background thread polls
+    the registry, loads and validates new versions off the request path and
+    only swaps in policies that pass the probe set.
+
+    With a SHADOW version set, every deterministic decision is also replayed
+    on the candidate by a separate worker; disagreements are counted and
+    appended to `shadow_log`, and never affect the answer.
+    """
+
+    def __init__(self, registry, version, policy, fingerprint=None, cache_settings=None):
+        self.registry = registry
+        self.settings = registry.settings
+        self.cache_settings = cache_settings or load_cache_settings()
+        self._live = (version, policy, fingerprint)
+        self._shadow = None
+        self._reload_lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # shadow_stats is updated from request threads and the shadow worker
+        self._rejected = {}  # (version, fingerprint) -> reason, so a bad version is not retried every poll
+        self._stop = threading.Event()
+        self._loader = threading.Thread(target=self._run_loader, name="model-registry", daemon=True)
+        self._shadow_queue = queue.Queue(maxsize=self.settings['shadow_queue_size'])
+        self._shadow_worker = threading.Thread(target=self._run_shadow, name="shadow-policy", daemon=True)
+
+        # Counters
+        self.swaps = 0
+        self.history = deque(maxlen=20)
+        self.shadow_stats = {'compared': 0, 'disagreements': 0, 'dropped': 0}
+        self.recent_disagreements = deque(maxlen=20)
+
+    @property
+    def version(self):
+        return self._live[0]
+
+    @property
+    def shadow_version(self):
+        shadow = self._shadow
+        return shadow[0] if shadow else None
+
+    def start(self):
+        self._loader.start()
+        self._shadow_worker.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._shadow_queue.put(None)
+
+    # --- Serving ---
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        version, policy, _ = self._live
+        action, state = policy.predict(observation, state, episode_start, deterministic)
+        shadow = self._shadow
+        if shadow is not None and deterministic:
+            try:
+                self._shadow_queue.put_nowait((version, shadow, np.array(observation, dtype=np.float32), action))
+            except queue.Full:
+                with self._stats_lock:
+                    self.shadow_stats['dropped'] += 1
+        return action, state
+
+    def get_stats(self):
+        """
+        Decision cache stats of the live policy, like CachedPolicy.get_stats().
+        """
+        policy = self._live[1]
+        return policy.get_stats() if hasattr(policy, 'get_stats') else {}
+
+    def get_registry_stats(self):
+        with self._stats_lock:
+            shadow_stats = dict(self.shadow_stats)
+            recent_disagreements = list(self.recent_disagreements)
+        compared = shadow_stats['compared']
+        return {
+            'live': self.version,
+            'shadow': self.shadow_version,
+            'versions': self.registry.versions(),
+            'swaps': self.swaps,
+            'history': list(self.history),
+            'rejected': {f"{version}@{fingerprint[:12]}": reason
+                         for (version, fingerprint), reason in self._rejected.items()},
+            'shadow_stats': dict(shadow_stats,
+                                 disagreement_rate=shadow_stats['disagreements'] / compared if compared else 0.0),
+            'recent_disagreements': recent_disagreements,
+        }
+
+    # --- Loading ---
+
+    def _load(self, version, reference=None, enforce_reference=False):
+        """
+        Loads and validates one version; returns (policy, fingerprint, report) or None when rejected.
+        """
+        fingerprint = self.registry.fingerprint(version)
+        if (version, fingerprint) in self._rejected:
+            return None
+        try:
+            policy = load_cached_policy(self.registry.model_path(version), self.cache_settings)
+            report = self.registry.validate(policy, reference=reference, enforce_reference=enforce_reference)
+        except Exception as e:
+            self._rejected[(version, fingerprint)] = str(e)
+            REJECTED.inc(version=version)
+            print(f"❌ Model {version} rejected: {e}")
+            return None
+        return policy, fingerprint, report
+
+    def check(self):
+        """
+        Brings the live and shadow policies in line with the registry; the loader thread calls this every poll.
+        """
+        with self._reload_lock:
+            live_version, live_policy, live_fingerprint = self._live
+            wanted = self.registry.live_version()
+            if wanted is not None and (wanted != live_version or
+                                       self.registry.fingerprint(wanted) != live_fingerprint):
+                loaded = self._load(wanted, reference=live_policy, enforce_reference=True)
+                if loaded is not None:
+                    policy, fingerprint, report = loaded
+                    self._live = (wanted, policy, fingerprint)  # The swap: one reference assignment
+                    self.swaps += 1
+                    SWAPS.inc(version=wanted)
+                    self.history.append({'version': wanted, 'previous': live_version,
+                                         'at': time.time(), 'report': report})
+                    print(f"🔄 Model {live_version} → {wanted} is live ({report})")
+
+            wanted = self.registry.shadow_version()
+            shadow = self._shadow
+            if wanted is None or wanted == self.version:
+                if shadow is not None:
+                    print(f"👥 Shadow model {shadow[0]} retired")
+                self._shadow = None
+            elif shadow is None or wanted != shadow[0] or self.registry.fingerprint(wanted) != shadow[2]:
+                loaded = self._load(wanted, reference=self._live[1])
+                if loaded is not None:
+                    policy, fingerprint, report = loaded
+                    self._shadow = (wanted, policy, fingerprint)
+                    with self._stats_lock:
+                        self.shadow_stats = {'compared': 0, 'disagreements': 0, 'dropped': 0}
+                        self.recent_disagreements.clear()
+                    print(f"👥 Shadow model {wanted} running next to {self.version} ({report})")
+        return self.get_registry_stats()
+
+    def _run_loader(self):
+        while not self._stop.wait(self.settings['poll_interval_s']):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Model registry check failed: {e}")
+
+    # --- Shadow mode ---
+
+    def _run_shadow(self):
+        log_path = Path(self.settings['shadow_log'])
+        while True:
+            item = self._shadow_queue.get()
+            if item is None:
+                break
+            live_version, (shadow_version, shadow_policy, _), observation, live_action = item
+            try:
+                shadow_action, _ = shadow_policy.predict(observation, deterministic=True)
+            except Exception as e:
+                print(f"❌ Shadow model {shadow_version} failed: {e}")
+                continue
+
+            observations = observation.reshape(-1, observation.shape[-1])
+            live_actions = np.asarray(live_action).reshape(-1)
+            shadow_actions = np.asarray(shadow_action).reshape(-1)
+            differ = np.flatnonzero(live_actions != shadow_actions)
+            SHADOW_COMPARED.inc(len(live_actions))
+            if not len(differ):
+                with self._stats_lock:
+                    self.shadow_stats['compared'] += len(live_actions)
+                continue
+
+            SHADOW_DISAGREEMENTS.inc(len(differ))
+            records = [{'t': time.time(), 'live': live_version, 'shadow': shadow_version,
+                        'observation': observations[i].tolist(),
+                        'live_action': int(live_actions[i]), 'shadow_action': int(shadow_actions[i])}
+                       for i in differ]
+            with self._stats_lock:
+                self.shadow_stats['compared'] += len(live_actions)
+                before = self.shadow_stats['disagreements']
+                self.shadow_stats['disagreements'] = disagreements = before + len(differ)
+                compared = self.shadow_stats['compared']
+                self.recent_disagreements.extend(records)
+            # First disagreement, then every 100th
+            if before == 0 or before // 100 != disagreements // 100:
+                print(f"👥 Shadow {shadow_version} disagrees with {live_version} on "
+                      f"{disagreements}/{compared} decisions")
+            try:
+                log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(log_path, 'a') as f:
+                    f.writelines(json.dumps(record) + '\n' for record in records)
+            except OSError as e:
+                print(f"⚠️  Could not write {log_path}: {e}")
+
+
+def load_hot_swap_policy(model_path, settings=None):
+    """
+    The registry's live version behind a HotSwapPolicy, with the loader and shadow threads running.
+
+    Falls back to `model_path` (the single-model layout) when the registry
+    has no LIVE version yet; the first version LIVE names later replaces it.
+    """
+    settings = settings or load_registry_settings()
+    registry = ModelRegistry(settings)
+    cache_settings = load_cache_settings()
+
+    version = registry.live_version()
+    if version is not None:
+        policy = load_cached_policy(registry.model_path(version), cache_settings)
+        try:
+            report = registry.validate(policy)
+            print(f"📚 Model {version} from {registry.root} ({report})")
+            return HotSwapPolicy(registry, version, policy, registry.fingerprint(version), cache_settings).start()
+        except ValueError as e:
+            print(f"❌ Model {version} rejected: {e}, falling back to {Path(model_path).name}")
+
+    policy = load_cached_policy(model_path, cache_settings)
+    return HotSwapPolicy(registry, Path(model_path).stem, policy, cache_settings=cache_settings).start()
+
+
+def main():
+    """
+    python model_registry.py [version]
+    Lists the registry, or validates one version against the probe set.
+    """
+    registry = ModelRegistry(load_registry_settings())
+    if len(sys.argv) > 1:
+        version = sys.argv[1]
+        report = registry.validate(load_cached_policy(registry.model_path(version)))
+        print(f"✅ {version} passes the probe set: {report}")
+        return
+    print(f"📚 {registry.root}: live {registry.live_version()}, shadow {registry.shadow_version()}")
+    for version in registry.versions():
+        print(f"   {version}: {registry.model_path(version).name}")
+
+
+if __name__ == '__main__':
+    main()
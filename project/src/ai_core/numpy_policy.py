@@ -0,0 +1,181 @@
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0.0),
+}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    SHA-256 of a model file, used to tell when exported artefacts are stale.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class NumpyPolicy:
+    """
+    Forward pass of a Stable-Baselines3 PPO MlpPolicy in plain NumPy.
+
+    Only the actor is kept: flatten, the policy MLP, then the action logits.
+    `predict` follows PPO.predict, so it can replace the model anywhere the
+    control loops call `model.predict(state, deterministic=True)` without
+    importing torch or stable_baselines3.
+    """
+
+    def __init__(self, weights, biases, action_weight, action_bias, activation='tanh',
+                 observation_shape=None, source_hash=None):
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.action_weight = np.asarray(action_weight, dtype=np.float32)
+        self.action_bias = np.asarray(action_bias, dtype=np.float32)
+        self.activation = activation
+        self._activation = ACTIVATIONS[activation]
+        first_layer = self.weights[0] if self.weights else self.action_weight
+        self.observation_shape = tuple(observation_shape or (first_layer.shape[1],))
+        self.n_actions = len(self.action_bias)
+        self.source_hash = source_hash
+        self._rng = np.random.default_rng()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            layers = int(data['num_layers'])
+            return cls([data[f'weight_{i}'] for i in range(layers)],
+                       [data[f'bias_{i}'] for i in range(layers)],
+                       data['action_weight'], data['action_bias'],
+                       activation=str(data['activation']),
+                       observation_shape=data['observation_shape'].tolist(),
+                       source_hash=str(data['source_hash']) or None)
+
+    def save(self, path):
+        arrays = {f'weight_{i}': w for i, w in enumerate(self.weights)}
+        arrays.update({f'bias_{i}': b for i, b in enumerate(self.biases)})
+        np.savez(path, **arrays, num_layers=len(self.weights), action_weight=self.action_weight,
+                 action_bias=self.action_bias, activation=self.activation,
+                 observation_shape=np.array(self.observation_shape), source_hash=self.source_hash or '')
+
+    def action_logits(self, observations):
+        """
+        Logits for a (batch, *observation_shape) array.
+        """
+        x = observations.reshape(len(observations), -1)
+        for weight, bias in zip(self.weights, self.biases):
+            x = self._activation(x @ weight.T + bias)
+        return x @ self.action_weight.T + self.action_bias
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        """
+        Same contract as PPO.predict: returns (action, None) for one observation
+        or (actions, None) for a batch of them.
+        """
+        observation = np.asarray(observation, dtype=np.float32)
+        if observation.shape == self.observation_shape:
+            vectorized = False
+            observation = observation[None]
+        elif observation.shape[1:] == self.observation_shape:
+            vectorized = True
+        else:
+            raise ValueError(f"Error: Unexpected observation shape {observation.shape}, "
+                             f"expected {self.observation_shape} or (n_env, {', '.join(map(str, self.observation_shape))})")
+
+        logits = self.action_logits(observation)
+        if deterministic:
+            actions = logits.argmax(axis=1)
+        else:
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            actions = np.array([self._rng.choice(self.n_actions, p=p) for p in probs])
+
+        if not vectorized:
+            actions = actions.squeeze(axis=0)
+        return actions, state
+
+
+def export_policy(model_path, output_path=None):
+    """
+    Extracts the actor weights of a saved PPO MlpPolicy (.zip) into an .npz file.
+
+    Needs stable_baselines3 and torch, but only here, once per trained model.
+    """
+    from stable_baselines3 import PPO
+    from torch import nn
+
+    model_path = Path(model_path)
+    output_path = Path(output_path) if output_path else model_path.with_suffix('.npz')
+    policy = PPO.load(str(model_path), device='cpu').policy
+
+    if type(policy.features_extractor).__name__ != 'FlattenExtractor':
+        raise ValueError(f"Only MlpPolicy can be exported, got {type(policy.features_extractor).__name__}")
+    if not hasattr(policy.action_space, 'n'):
+        raise ValueError(f"Only discrete action spaces can be exported, got {policy.action_space}")
+    activation = policy.activation_fn.__name__.lower()
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation {policy.activation_fn.__name__}")
+
+    linear = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)]
+    numpy_policy = NumpyPolicy([m.weight.detach().numpy() for m in linear],
+                               [m.bias.detach().numpy() for m in linear],
+                               policy.action_net.weight.detach().numpy(),
+                               policy.action_net.bias.detach().numpy(),
+                               activation=activation,
+                               observation_shape=policy.observation_space.shape,
+                               source_hash=file_hash(model_path))
+    numpy_policy.save(output_path)
+    print(f"📦 Exported {model_path.name} → {output_path.name} ({len(linear)} hidden layers, {activation})")
+    return numpy_policy
+
+
+def load_policy(model_path):
+    """
+    Loads the policy for inference, preferring the NumPy export.
+
+    The .npz next to the .zip is used when it was exported from the current
+    model file. Otherwise the model is loaded with PPO.load, and re-exported
+    when possible so the next start is torch-free.
+    """
+    model_path = Path(model_path)
+    npz_path = model_path.with_suffix('.npz')
+    if npz_path.exists():
+        policy = NumpyPolicy.load(npz_path)
+        if not model_path.exists() or policy.source_hash == file_hash(model_path):
+            print(f"⚡ Using NumPy policy {npz_path.name}")
+            return policy
+        print(f"⚠️  {npz_path.name} is older than {model_path.name}, re-exporting")
+
+    try:
+        return export_policy(model_path, npz_path)
+    except (ValueError, AttributeError) as e:
+        print(f"⚠️  NumPy export failed ({e}), using stable_baselines3")
+        from stable_baselines3 import PPO
+        return PPO.load(str(model_path))
+
+
+def main():
+    """
+    python numpy_policy.py [model.zip]
+    Exports the policy and checks its actions against PPO.predict.
+    """
+    from stable_baselines3 import PPO
+
+    model_path = Path(sys.argv[1]) if len(sys.argv) > 1 else \
+        Path(__file__).parent.parent.parent / "models" / "ppo_traffic_model_v2.zip"
+    numpy_policy = export_policy(model_path)
+    model = PPO.load(str(model_path), device='cpu')
+
+    observations = np.stack([model.observation_space.sample() for _ in range(1000)]).astype(np.float32)
+    expected, _ = model.predict(observations, deterministic=True)
+    actual, _ = numpy_policy.predict(observations, deterministic=True)
+    print(f"✅ Deterministic actions match on {np.mean(expected == actual):.1%} of {len(observations)} observations")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import json
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from numpy_policy import file_hash, load_policy
+
+CONFIG_PATH = Path(__file__).parent.parent.parent.parent / "config.json"
+
+# Used when config.json has no models.traffic_ai.policy_cache section
+DEFAULT_CACHE_SETTINGS = {
+    'maxsize': 4096,
+    'precompute': False,
+    'num_counts': 4,
+    'max_count': 20,
+    'num_phases': 0,
+}
+
+
+def load_cache_settings(config_path=CONFIG_PATH):
+    """
+    Reads the decision cache settings from config.json, falling back to defaults.
+    """
+    settings = dict(DEFAULT_CACHE_SETTINGS)
+    try:
+        with open(config_path) as f:
+            settings.update(json.load(f).get('models', {}).get('traffic_ai', {}).get('policy_cache', {}))
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read {config_path} ({e}), using the default policy cache")
+    return settings
+
+
+class PolicyTable:
+    """
+    Precomputed deterministic actions for every discrete observation.
+
+    Observations are `num_counts` queue counts in [0, max_count] followed by a
+    one-hot phase of length `num_phases` (none when 0). Each one maps to a
+    mixed-radix index, so the table is a flat uint8 array instead of a dict:
+    20 counts over 4 zones and 2 phases take 389 KB.
+    """
+
+    def __init__(self, actions, num_counts, max_count, num_phases=0, source_hash=None):
+        self.actions = np.asarray(actions, dtype=np.uint8)
+        self.num_counts = num_counts
+        self.max_count = max_count
+        self.num_phases = num_phases
+        self.source_hash = source_hash
+
+    @classmethod
+    def observations(cls, num_counts, max_count, num_phases=0):
+        """
+        Every observation in the table's domain, in index order.
+        """
+        grids = np.meshgrid(*[np.arange(max_count + 1)] * num_counts, indexing='ij')
+        counts = np.stack([g.ravel() for g in grids], axis=1).astype(np.float32)
+        if not num_phases:
+            return counts
+        phases = np.eye(num_phases, dtype=np.float32)
+        return np.concatenate([np.repeat(counts, num_phases, axis=0),
+                               np.tile(phases, (len(counts), 1))], axis=1)
+
+    @classmethod
+    def build(cls, policy, num_counts, max_count, num_phases=0, source_hash=None, batch_size=65536):
+        observations = cls.observations(num_counts, max_count, num_phases)
+        actions = np.concatenate([np.asarray(policy.predict(observations[i:i + batch_size], deterministic=True)[0])
+                                  for i in range(0, len(observations), batch_size)])
+        return cls(actions, num_counts, max_count, num_phases, source_hash)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['actions'], int(data['num_counts']), int(data['max_count']),
+                       int(data['num_phases']), str(data['source_hash']) or None)
+
+    def save(self, path):
+        np.savez_compressed(path, actions=self.actions, num_counts=self.num_counts, max_count=self.max_count,
+                            num_phases=self.num_phases, source_hash=self.source_hash or '')
+
+    def index(self, observation):
+        """
+        Table index of an observation, or None when it is outside the table's domain.
+        """
+        if observation.shape != (self.num_counts + self.num_phases,):
+            return None
+        # Plain Python beats NumPy on a handful of elements
+        values = observation.tolist()
+        index = 0
+        for count in values[:self.num_counts]:
+            if not (0 <= count <= self.max_count) or count != int(count):
+                return None
+            index = index * (self.max_count + 1) + int(count)
+        if not self.num_phases:
+            return index
+        phase = values[self.num_counts:]
+        if sorted(phase) != [0.0] * (self.num_phases - 1) + [1.0]:
+            return None
+        return index * self.num_phases + phase.index(1.0)
+
+    def lookup(self, observation):
+        index = self.index(observation)
+        return None if index is None else int(self.actions[index])
+
+
+class CachedPolicy:
+    """
+    Memoizing decision layer in front of `policy.predict`.
+
+    Queue counts are small integers and the phase is one-hot, so the same
+    observations come back over and over. Deterministic single-observation
+    calls are answered from a bounded LRU cache, then from the precomputed
+    PolicyTable when the observation is in its domain, and only then by the
+    policy itself. Deterministic batches reuse cached rows and run the rest
+    in one forward pass; stochastic calls always go to the policy.
+    """
+
+    def __init__(self, policy, maxsize=4096, table=None):
+        self.policy = policy
+        self.maxsize = maxsize
+        self.table = table
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.table_hits = 0
+        self.hits = 0
+        self.misses = 0
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        observation = np.asarray(observation, dtype=np.float32)
+        if not deterministic or observation.ndim > 2:
+            return self.policy.predict(observation, state, episode_start, deterministic)
+        if observation.ndim == 2:
+            return self._predict_batch(observation), state
+
+        key = observation.tobytes()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key], state
+
+        action = self.table.lookup(observation) if self.table is not None else None
+        from_table = action is not None
+        if from_table:
+            action = np.array(action)
+        else:
+            action, _ = self.policy.predict(observation, state, episode_start, deterministic=True)
+
+        with self._lock:
+            if from_table:
+                self.table_hits += 1
+            else:
+                self.misses += 1
+            self._cache[key] = action
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return action, state
+
+    def _predict_batch(self, observations):
+        """
+        Deterministic batch: cached rows are reused, the rest run as one forward pass.
+        """
+        actions = [None] * len(observations)
+        keys = [row.tobytes() for row in observations]
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    actions[i] = self._cache[key]
+                    self.hits += 1
+
+        missing = [i for i, action in enumerate(actions) if action is None]
+        if missing:
+            computed, _ = self.policy.predict(observations[missing], deterministic=True)
+            with self._lock:
+                self.misses += len(missing)
+                for i, action in zip(missing, computed):
+                    actions[i] = action
+                    self._cache[keys[i]] = action
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return np.array(actions)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self):
+        total = self.table_hits + self.hits + self.misses
+        return {'table_hits': self.table_hits, 'hits': self.hits, 'misses': self.misses,
+                'size': len(self._cache), 'maxsize': self.maxsize,
+                'hit_rate': (self.table_hits + self.hits) / total if total else 0.0}
+
+
+def table_path_for(model_path):
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}_table.npz")
+
+
+def load_table(model_path, policy, settings):
+    """
+    Loads the precomputed table for a model, rebuilding it when the model
+    file changed (different hash) or the configured domain differs.
+    """
+    model_path, table_path = Path(model_path), table_path_for(model_path)
+    source_hash = file_hash(model_path) if model_path.exists() else None
+    domain = (settings['num_counts'], settings['max_count'], settings['num_phases'])
+
+    if table_path.exists():
+        table = PolicyTable.load(table_path)
+        if table.source_hash == source_hash and (table.num_counts, table.max_count, table.num_phases) == domain:
+            return table
+        print(f"⚠️  {table_path.name} does not match the current model, rebuilding")
+
+    table = PolicyTable.build(policy, *domain, source_hash=source_hash)
+    table.save(table_path)
+    print(f"📋 Precomputed {len(table.actions)} decisions → {table_path.name}")
+    return table
+
+
+def load_cached_policy(model_path, settings=None):
+    """
+    load_policy() wrapped in a CachedPolicy configured from config.json.
+    """
+    settings = settings or load_cache_settings()
+    policy = load_policy(model_path)
+    table = None
+    if settings.get('precompute'):
+        try:
+            table = load_table(model_path, policy, settings)
+        except ValueError as e:
+            # The configured domain does not fit the model's observation shape
+            print(f"⚠️  Decision table disabled: {e}")
+    return CachedPolicy(policy, maxsize=settings['maxsize'], table=table)
+
+
+def main():
+    """
+    python policy_cache.py [model.zip]
+    Builds the offline decision table configured in config.json.
+    """
+    model_path = Path(sys.argv[1]) if len(sys.argv) > 1 else \
+        Path(__file__).parent.parent.parent / "models" / "ppo_traffic_model_v2.zip"
+    settings = load_cache_settings()
+    table = load_table(model_path, load_policy(model_path), settings)
+    print(f"✅ {len(table.actions)} decisions, {np.mean(table.actions == 1):.1%} SWITCH")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,30 +4,56 @@
 Real-time traffic control API with modern web dashboard
 """
 
-from flask import Flask, render_template_string, jsonify, request
-from flask_socketio import SocketIO, emit
-from stable_baselines3 import PPO
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))  # Shared metrics registry and async mode
+from async_mode import server_options, setup_async_mode
+ASYNC_MODE = setup_async_mode()  # Monkey-patches eventlet/gevent before flask opens sockets or threads start
+
+from flask import Flask, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import numpy as np
 from datetime import datetime
+import atexit
 import json
+import threading
 import time
+from collections import deque
+from static_assets import StaticAssets
+from metrics import counter, gauge, histogram, metrics_response, observe_intersection
+from inference_queue import InferenceQueue, load_queue_settings
+from broadcaster import Broadcaster
+from state import DEFAULT_INTERSECTION, IntersectionRegistry, room_for, update_error
+from history import ROLLUPS, HistoryStore
+from telemetry_store import TelemetryStore
 
 print("🚀 Starting AI Traffic Management API Server...")
 
 # --- Load AI Model ---
 try:
-    from pathlib import Path
     PROJECT_ROOT = Path(__file__).parent.parent.parent
     MODEL_PATH = str(PROJECT_ROOT / "models" / "ppo_traffic_model_v2.zip")
-    model = PPO.load(MODEL_PATH)
+    # NumPy forward pass of the PPO policy behind a decision cache; torch is only needed to (re-)export it.
+    # New versions in models/registry are validated and swapped in without a restart.
+    sys.path.append(str(Path(__file__).parent.parent / 'ai_core'))
+    from model_registry import load_hot_swap_policy
+    model = load_hot_swap_policy(MODEL_PATH)
     print("✅ AI model loaded successfully.")
 except Exception as e:
     print(f"❌ Error loading AI model: {e}")
     model = None
 
-app = Flask(__name__)
+# Concurrent get_ai_action requests share batched forward passes
+inference_queue = InferenceQueue(model, **load_queue_settings()).start() if model is not None else None
+
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'traffic_ai_secret_2024'
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Dashboard page and vendored libraries, compressed once at startup
+static_assets = StaticAssets().register(app)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+# Dashboard pushes: at most 5 emits per second per channel, latest state only
+broadcaster = Broadcaster(socketio, max_rate_hz=5).start()
 
 # Global statistics
 stats = {
@@ -39,570 +65,216 @@ stats = {
     'last_action': 'KEEP'
 }
 
-# Modern HTML Dashboard
-DASHBOARD_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🚦 AI Traffic Management Dashboard</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Rajdhani:wght@300;400;600;700&display=swap');
-        
-        * { 
-            margin: 0; 
-            padding: 0; 
-            box-sizing: border-box; 
-        }
-        
-        body {
-            font-family: 'Rajdhani', sans-serif;
-            background: 
-                radial-gradient(ellipse at top, rgba(13, 110, 253, 0.15) 0%, transparent 70%),
-                radial-gradient(ellipse at bottom, rgba(25, 135, 84, 0.15) 0%, transparent 70%),
-                linear-gradient(135deg, #0d1117 0%, #161b22 25%, #21262d 50%, #30363d 75%, #161b22 100%);
-            color: #f0f6fc;
-            min-height: 100vh;
-            overflow-x: hidden;
-            position: relative;
-        }
-        
-        body::before {
-            content: '';
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: 
-                repeating-linear-gradient(
-                    90deg,
-                    transparent,
-                    transparent 2px,
-                    rgba(0, 255, 65, 0.03) 2px,
-                    rgba(0, 255, 65, 0.03) 4px
-                );
-            pointer-events: none;
-            z-index: 1;
-        }
-        
-        .header {
-            background: linear-gradient(135deg, rgba(13, 17, 23, 0.95) 0%, rgba(22, 27, 34, 0.9) 100%);
-            padding: 40px 20px;
-            text-align: center;
-            border-bottom: 1px solid rgba(48, 54, 61, 0.8);
-            backdrop-filter: blur(20px) saturate(180%);
-            position: relative;
-            z-index: 2;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-        }
-        
-        .header::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: linear-gradient(90deg, 
-                transparent 0%, 
-                rgba(0, 255, 65, 0.1) 25%, 
-                rgba(0, 212, 255, 0.1) 50%, 
-                rgba(255, 0, 128, 0.1) 75%, 
-                transparent 100%);
-            animation: headerGlow 4s ease-in-out infinite alternate;
-        }
-        
-        .header h1 {
-            font-family: 'Orbitron', monospace;
-            font-size: 3.2em;
-            font-weight: 700;
-            margin-bottom: 15px;
-            background: linear-gradient(135deg, #58a6ff 0%, #1f6feb 25%, #0969da 50%, #0550ae 75%, #033d8b 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            position: relative;
-            z-index: 3;
-            letter-spacing: 2px;
-        }
-        
-        .header p {
-            font-size: 1.2em;
-            font-weight: 400;
-            opacity: 0.8;
-            letter-spacing: 1px;
-            position: relative;
-            z-index: 3;
-            color: #7d8590;
-        }
-        
-        .dashboard {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-            gap: 25px;
-            padding: 30px;
-            max-width: 1600px;
-            margin: 0 auto;
-            position: relative;
-            z-index: 2;
-        }
-        
-        .card {
-            background: linear-gradient(135deg, 
-                rgba(22, 27, 34, 0.8) 0%, 
-                rgba(33, 38, 45, 0.6) 50%, 
-                rgba(48, 54, 61, 0.4) 100%);
-            border-radius: 16px;
-            padding: 28px;
-            backdrop-filter: blur(16px) saturate(180%);
-            border: 1px solid rgba(48, 54, 61, 0.5);
-            box-shadow: 
-                0 16px 40px rgba(0, 0, 0, 0.4),
-                0 8px 16px rgba(0, 0, 0, 0.2),
-                inset 0 1px 0 rgba(240, 246, 252, 0.1);
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .card::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: -100%;
-            width: 100%;
-            height: 100%;
-            background: linear-gradient(90deg, 
-                transparent, 
-                rgba(0, 255, 65, 0.1), 
-                transparent);
-            transition: left 0.6s ease;
-        }
-        
-        .card:hover {
-            transform: translateY(-8px);
-            box-shadow: 
-                0 24px 48px rgba(0, 0, 0, 0.5),
-                0 12px 24px rgba(88, 166, 255, 0.15),
-                0 0 0 1px rgba(88, 166, 255, 0.2),
-                inset 0 1px 0 rgba(240, 246, 252, 0.15);
-            border-color: rgba(88, 166, 255, 0.3);
-        }
-        
-        .card:hover::before {
-            left: 100%;
-        }
-        
-        .card h3 {
-            font-family: 'Orbitron', monospace;
-            color: #58a6ff;
-            margin-bottom: 24px;
-            font-size: 1.3em;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            position: relative;
-        }
-        
-        .card h3::after {
-            content: '';
-            position: absolute;
-            bottom: -8px;
-            left: 0;
-            width: 40px;
-            height: 2px;
-            background: linear-gradient(90deg, #58a6ff, transparent);
-        }
-        
-        .metric {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin: 16px 0;
-            padding: 16px 18px;
-            background: linear-gradient(135deg, 
-                rgba(13, 17, 23, 0.6) 0%, 
-                rgba(22, 27, 34, 0.4) 100%);
-            border-radius: 10px;
-            border: 1px solid rgba(48, 54, 61, 0.3);
-            transition: all 0.2s ease;
-        }
-        
-        .metric:hover {
-            background: linear-gradient(135deg, 
-                rgba(88, 166, 255, 0.08) 0%, 
-                rgba(22, 27, 34, 0.6) 100%);
-            border-color: rgba(88, 166, 255, 0.2);
-        }
-        
-        .metric-value {
-            font-weight: 600;
-            font-size: 1.1em;
-            color: #58a6ff;
-            font-family: 'Orbitron', monospace;
-        }
-        
-        .status-indicator {
-            display: inline-block;
-            width: 14px;
-            height: 14px;
-            border-radius: 50%;
-            margin-right: 10px;
-            box-shadow: 0 0 10px currentColor;
-            animation: statusPulse 2s ease-in-out infinite;
-        }
-        
-        .status-online { 
-            background: radial-gradient(circle, #3fb950, #238636);
-            box-shadow: 0 0 12px rgba(63, 185, 80, 0.4);
-        }
-        
-        .status-offline { 
-            background: radial-gradient(circle, #f85149, #da3633);
-            box-shadow: 0 0 12px rgba(248, 81, 73, 0.4);
-        }
-        
-        .action-display {
-            text-align: center;
-            padding: 30px;
-            font-family: 'Orbitron', monospace;
-            font-size: 2.2em;
-            font-weight: 700;
-            border-radius: 15px;
-            margin: 15px 0;
-            position: relative;
-            overflow: hidden;
-            text-transform: uppercase;
-            letter-spacing: 2px;
-            transition: all 0.4s ease;
-        }
-        
-        .action-keep {
-            background: linear-gradient(135deg, #238636, #2ea043, #3fb950);
-            color: white;
-            box-shadow: 0 8px 24px rgba(35, 134, 54, 0.3);
-        }
-        
-        .action-switch {
-            background: linear-gradient(135deg, #d1242f, #f85149, #ff7b72);
-            color: white;
-            box-shadow: 0 8px 24px rgba(209, 36, 47, 0.3);
-            animation: switchPulse 1.5s ease-in-out infinite alternate;
-        }
-        
-        .queue-bar {
-            height: 25px;
-            background: linear-gradient(135deg, #1a1a2e, #16213e);
-            border-radius: 15px;
-            overflow: hidden;
-            margin: 8px 0;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            position: relative;
-        }
-        
-        .queue-fill {
-            height: 100%;
-            background: linear-gradient(90deg, 
-                #3fb950 0%, 
-                #58a6ff 25%, 
-                #f9826c 50%, 
-                #a5a5a5 75%, 
-                #3fb950 100%);
-            background-size: 200% 100%;
-            transition: width 0.6s cubic-bezier(0.4, 0, 0.2, 1);
-            animation: queueFlow 4s linear infinite;
-            border-radius: 12px;
-            box-shadow: 0 0 12px rgba(88, 166, 255, 0.2);
-        }
-        
-        .timestamp {
-            font-size: 0.95em;
-            opacity: 0.8;
-            text-align: center;
-            margin-top: 15px;
-            font-weight: 300;
-            letter-spacing: 1px;
-        }
-        
-        @keyframes gradientShift {
-            0%, 100% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-        }
-        
-        @keyframes headerGlow {
-            0% { opacity: 0.5; }
-            100% { opacity: 1; }
-        }
-        
-        @keyframes statusPulse {
-            0%, 100% { transform: scale(1); opacity: 1; }
-            50% { transform: scale(1.2); opacity: 0.8; }
-        }
-        
-        @keyframes switchPulse {
-            0% { box-shadow: 0 0 20px rgba(253, 126, 20, 0.4); }
-            100% { box-shadow: 0 0 30px rgba(253, 126, 20, 0.8), 0 0 40px rgba(255, 193, 7, 0.4); }
-        }
-        
-        @keyframes queueFlow {
-            0% { background-position: 0% 0%; }
-            100% { background-position: 200% 0%; }
-        }
-        
-        .chart-container {
-            background: linear-gradient(135deg, rgba(0, 0, 0, 0.3), rgba(26, 26, 46, 0.2));
-            border-radius: 15px;
-            padding: 20px;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        /* Scrollbar styling */
-        ::-webkit-scrollbar {
-            width: 8px;
-        }
-        
-        ::-webkit-scrollbar-track {
-            background: rgba(0, 0, 0, 0.3);
-        }
-        
-        ::-webkit-scrollbar-thumb {
-            background: linear-gradient(135deg, #00ff41, #00d4ff);
-            border-radius: 4px;
-        }
-        
-        ::-webkit-scrollbar-thumb:hover {
-            background: linear-gradient(135deg, #00d4ff, #ff0080);
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>AI Traffic Management System</h1>
-        <p>Real-time Traffic Optimization & Analytics Dashboard</p>
-    </div>
-    
-    <div class="dashboard">
-        <div class="card">
-            <h3>System Status</h3>
-            <div class="metric">
-                <span>Connection Status:</span>
-                <span><span id="status-indicator" class="status-indicator status-offline"></span><span id="connection-status">Disconnected</span></span>
-            </div>
-            <div class="metric">
-                <span>Predictions Made:</span>
-                <span class="metric-value" id="predictions-count">0</span>
-            </div>
-            <div class="metric">
-                <span>Uptime:</span>
-                <span class="metric-value" id="uptime">00:00:00</span>
-            </div>
-            <div class="metric">
-                <span>Last Prediction:</span>
-                <span class="metric-value" id="last-prediction">Never</span>
-            </div>
-            <div class="metric">
-                <span>Live System:</span>
-                <span class="metric-value" id="live-system-status">Disconnected</span>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h3>Current Action</h3>
-            <div id="current-action" class="action-display action-keep">
-                KEEP CURRENT PHASE
-            </div>
-            <div class="timestamp" id="action-timestamp">
-                Waiting for data...
-            </div>
-        </div>
-        
-        <div class="card">
-            <h3>Traffic Queues</h3>
-            <div id="queue-display">
-                <div class="metric">
-                    <span>Zone 1:</span>
-                    <div class="queue-bar"><div class="queue-fill" style="width: 0%"></div></div>
-                    <span class="metric-value">0 vehicles</span>
-                </div>
-                <div class="metric">
-                    <span>Zone 2:</span>
-                    <div class="queue-bar"><div class="queue-fill" style="width: 0%"></div></div>
-                    <span class="metric-value">0 vehicles</span>
-                </div>
-                <div class="metric">
-                    <span>Zone 3:</span>
-                    <div class="queue-bar"><div class="queue-fill" style="width: 0%"></div></div>
-                    <span class="metric-value">0 vehicles</span>
-                </div>
-                <div class="metric">
-                    <span>Zone 4:</span>
-                    <div class="queue-bar"><div class="queue-fill" style="width: 0%"></div></div>
-                    <span class="metric-value">0 vehicles</span>
-                </div>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h3>Performance Analytics</h3>
-            <div class="chart-container">
-                <canvas id="performance-chart" width="400" height="200"></canvas>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        const socket = io();
-        let performanceData = [];
-        let chart;
-        
-        // Initialize chart
-        const ctx = document.getElementById('performance-chart').getContext('2d');
-        chart = new Chart(ctx, {
-            type: 'line',
-            data: {
-                labels: [],
-                datasets: [{
-                    label: 'Total Queue Length',
-                    data: [],
-                    borderColor: '#00ff41',
-                    backgroundColor: 'rgba(0, 255, 65, 0.1)',
-                    tension: 0.4
-                }]
-            },
-            options: {
-                responsive: true,
-                plugins: {
-                    legend: { labels: { color: '#ffffff' } }
-                },
-                scales: {
-                    x: { ticks: { color: '#ffffff' } },
-                    y: { ticks: { color: '#ffffff' } }
-                }
-            }
-        });
-        
-        socket.on('connect', function() {
-            document.getElementById('connection-status').textContent = 'Connected';
-            document.getElementById('status-indicator').className = 'status-indicator status-online';
-            console.log('Connected to AI Traffic Server');
-        });
-        
-        socket.on('disconnect', function() {
-            document.getElementById('connection-status').textContent = 'Disconnected';
-            document.getElementById('status-indicator').className = 'status-indicator status-offline';
-        });
-        
-        socket.on('traffic_update', function(data) {
-            console.log('Received traffic update:', data);
-            updateDashboard(data);
-        });
-        
-        function updateDashboard(data) {
-            // Update live system status
-            document.getElementById('live-system-status').textContent = 'Connected';
-            document.getElementById('live-system-status').style.color = '#00ff41';
-            
-            // Update action display
-            const actionElement = document.getElementById('current-action');
-            const actionClass = data.action === 'SWITCH' ? 'action-switch' : 'action-keep';
-            actionElement.className = `action-display ${actionClass}`;
-            actionElement.textContent = data.action === 'SWITCH' ? 'SWITCH TRAFFIC LIGHT' : 'KEEP CURRENT PHASE';
-            
-            // Update queues
-            const queueDisplay = document.getElementById('queue-display');
-            const maxQueue = Math.max(...data.queues, 1);
-            
-            data.queues.forEach((count, index) => {
-                const percentage = (count / maxQueue) * 100;
-                const metrics = queueDisplay.children[index];
-                if (metrics) {
-                    const bar = metrics.querySelector('.queue-fill');
-                    const value = metrics.querySelector('.metric-value');
-                    if (bar && value) {
-                        bar.style.width = percentage + '%';
-                        value.textContent = count + ' vehicles';
-                    }
-                }
-            });
-            
-            // Update chart
-            const now = new Date().toLocaleTimeString();
-            const totalQueue = data.queues.reduce((a, b) => a + b, 0);
-            
-            chart.data.labels.push(now);
-            chart.data.datasets[0].data.push(totalQueue);
-            
-            if (chart.data.labels.length > 20) {
-                chart.data.labels.shift();
-                chart.data.datasets[0].data.shift();
-            }
-            
-            chart.update('none');
-            
-            // Update timestamp
-            document.getElementById('action-timestamp').textContent = 
-                'Updated: ' + new Date().toLocaleString();
-        }
-        
-        // Update stats periodically
-        setInterval(() => {
-            fetch('/api/stats')
-                .then(response => response.json())
-                .then(data => {
-                    document.getElementById('predictions-count').textContent = data.predictions;
-                    document.getElementById('uptime').textContent = formatUptime(data.uptime);
-                    document.getElementById('last-prediction').textContent = 
-                        data.last_prediction || 'Never';
-                });
-        }, 1000);
-        
-        function formatUptime(seconds) {
-            const hours = Math.floor(seconds / 3600);
-            const minutes = Math.floor((seconds % 3600) / 60);
-            const secs = Math.floor(seconds % 60);
-            return `${hours.toString().padStart(2, '0')}:${minutes.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
-        }
-    </script>
-</body>
-</html>
-"""
+# Ingest throughput, shared by the HTTP endpoint and the /ingest socket.io namespace
+ingest_stats = {
+    'updates': 0,
+    'rejected': 0,
+    'http_requests': 0,
+    'socket_messages': 0,
+    'producers': 0
+}
+ingest_rate = deque(maxlen=60)  # [second, updates] buckets
+ingest_lock = threading.Lock()
+
+# Exported on /metrics next to the metrics every process shares
+INGEST_SECONDS = histogram('traffic_ingest_seconds', 'Time to apply one ingest request or message', ['channel'])
+INGEST_UPDATES = counter('traffic_ingest_updates_total', 'Traffic updates accepted', ['channel'])
+INGEST_REJECTED = counter('traffic_ingest_rejected_total', 'Traffic updates rejected as malformed', ['channel'])
+INGEST_BATCH_SIZE = histogram('traffic_ingest_batch_updates', 'Updates per ingest request or message', ['channel'],
+                              buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+PRODUCERS = gauge('traffic_ingest_producers', 'Producers connected to the /ingest namespace')
+PREDICTIONS = counter('traffic_predictions_total', 'Signal decisions served over socket.io')
+# The policy call alone is traffic_inference_batch_seconds; this adds the inference queue wait
+DECISION_SECONDS = histogram('traffic_decision_seconds',
+                             'End-to-end time to answer get_ai_action, inference queue wait included')
+
+# Latest queues and decision per intersection; clients subscribe to their junction's room
+intersections = IntersectionRegistry()
+
+# Recent history per intersection (raw samples plus 1 s / 1 min / 1 h rollups), only for registered ones
+history = HistoryStore(known=intersections.__contains__)
+
+# Everything received is also persisted, so history survives restarts
+try:
+    TELEMETRY_DB_PATH = PROJECT_ROOT / "results" / "telemetry.db"
+    telemetry_store = TelemetryStore(TELEMETRY_DB_PATH).start()
+    atexit.register(telemetry_store.close)
+    gauge('traffic_telemetry_store_pending', 'Events waiting for the store writer').set_function(
+        lambda: telemetry_store.get_stats()['pending'])
+    print(f"🗄️  Telemetry store: {TELEMETRY_DB_PATH}")
+except Exception as e:
+    print(f"❌ Error opening telemetry store: {e}")
+    telemetry_store = None
 
 @app.route('/')
 def dashboard():
     """Serve the modern dashboard"""
-    return render_template_string(DASHBOARD_HTML)
+    return static_assets.response('dashboard.html')
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text exposition of every registered metric"""
+    return metrics_response()
 
 @app.route('/api/stats')
 def get_stats():
     """API endpoint for system statistics"""
     current_stats = stats.copy()
     current_stats['uptime'] = time.time() - stats['start_time']
+    if model is not None:
+        current_stats['policy_cache'] = model.get_stats()
+        current_stats['model'] = {'live': model.version, 'shadow': model.shadow_version}
+        current_stats['inference_queue'] = inference_queue.get_stats()
+    current_stats['ingest'] = get_ingest_stats()
+    current_stats['broadcast'] = broadcaster.get_stats()
+    current_stats['intersections'] = intersections.ids()
+    if telemetry_store is not None:
+        current_stats['telemetry_store'] = telemetry_store.get_stats()
     return jsonify(current_stats)
 
+def ingest_updates(data, channel):
+    """
+    Applies traffic updates from any producer and broadcasts the latest one.
+    
+    `data` is one {'queues', 'action', 'intersection'} update, a list of
+    them, or {'updates': [...]}. 'intersection' is optional and defaults to
+    the 'default' junction. Updates in a batch are in time order, so only
+    the last valid one per intersection becomes its current state and is
+    pushed to that intersection's room. Malformed updates are rejected one
+    by one and never stop the rest of the batch. Returns (accepted, rejected).
+    """
+    if isinstance(data, dict) and 'updates' in data:
+        data = data['updates']
+    updates = data if isinstance(data, list) else [data]
+    valid = [u for u in updates if update_error(u) is None]
+    INGEST_UPDATES.inc(len(valid), channel=channel)
+    INGEST_REJECTED.inc(len(updates) - len(valid), channel=channel)
+    INGEST_BATCH_SIZE.observe(len(updates), channel=channel)
+    
+    with ingest_lock:
+        ingest_stats['updates'] += len(valid)
+        ingest_stats['rejected'] += len(updates) - len(valid)
+        ingest_stats[channel] += 1
+        second = int(time.time())
+        if ingest_rate and ingest_rate[-1][0] == second:
+            ingest_rate[-1][1] += len(valid)
+        else:
+            ingest_rate.append([second, len(valid)])
+    
+    latest_per_intersection, counts = {}, {}
+    now = time.time()
+    for update in valid:
+        intersection_id = str(update.get('intersection') or DEFAULT_INTERSECTION)
+        if intersection_id not in latest_per_intersection:
+            intersections.get(intersection_id)  # Producers register intersections, before their history is kept
+        latest_per_intersection[intersection_id] = update
+        counts[intersection_id] = counts.get(intersection_id, 0) + 1
+        history.record(intersection_id, now, update['queues'], update['action'])
+        observe_intersection(intersection_id, update['queues'], update['action'])
+        if telemetry_store is not None:
+            telemetry_store.record(intersection_id, now, 'update', update['queues'], update['action'])
+    
+    for intersection_id, latest in latest_per_intersection.items():
+        intersections.get(intersection_id).apply_update(latest['queues'], latest['action'], counts[intersection_id])
+        
+        # Broadcast to the dashboards watching this intersection
+        broadcaster.publish('traffic_update', {
+            'intersection': intersection_id,
+            'action': latest['action'],
+            'queues': latest['queues'],
+            'timestamp': datetime.now().isoformat()
+        }, room=room_for(intersection_id))
+    
+    if valid:
+        # Update global stats
+        stats['current_queues'] = valid[-1]['queues']
+        stats['last_action'] = valid[-1]['action']
+        stats['last_prediction'] = datetime.now().strftime('%H:%M:%S')
+    
+    return len(valid), len(updates) - len(valid)
+
+def get_ingest_stats():
+    """Ingest counters plus the update rate over the last 10 complete seconds"""
+    with ingest_lock:
+        current = dict(ingest_stats)
+        now = int(time.time())
+        recent = sum(n for second, n in ingest_rate if now - 10 <= second < now)
+    current['updates_per_second'] = recent / 10
+    return current
+
+@app.route('/api/models')
+def get_models():
+    """Registry versions, the live and shadow model, swap history and shadow disagreements"""
+    if model is None:
+        return jsonify({'status': 'error', 'message': 'AI model not available'}), 503
+    return jsonify(model.get_registry_stats())
+
+@app.route('/api/models/reload', methods=['POST'])
+def reload_models():
+    """Checks the registry now instead of waiting for the next poll"""
+    if model is None:
+        return jsonify({'status': 'error', 'message': 'AI model not available'}), 503
+    return jsonify(model.check())
+
+@app.route('/api/intersections')
+def get_intersections():
+    """Current state of every intersection reporting to this server"""
+    return jsonify(intersections.snapshot())
+
+@app.route('/api/intersections/<intersection_id>')
+def get_intersection(intersection_id):
+    state = intersections.get(intersection_id, create=False)
+    if state is None:
+        return jsonify({'status': 'error', 'message': f'Unknown intersection {intersection_id}'}), 404
+    return jsonify(state.snapshot())
+
+def parse_time(value, default):
+    """Unix seconds or an ISO 8601 timestamp from a query string"""
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/history')
+def get_history():
+    """
+    Queue, decision and latency history of one intersection.
+    
+    Query: intersection (default 'default'), from/to (unix seconds or ISO 8601,
+    default the last hour), resolution (raw, 1s, 1m, 1h or auto). Whatever
+    is older than the in-memory buffers is read from the telemetry store.
+    """
+    try:
+        intersection_id = request.args.get('intersection') or DEFAULT_INTERSECTION
+        t_to = parse_time(request.args.get('to'), time.time())
+        t_from = parse_time(request.args.get('from'), t_to - 3600)
+        resolution, points = history.query(intersection_id, t_from, t_to, request.args.get('resolution', 'auto'))
+        
+        oldest = history.oldest(intersection_id, resolution)
+        if telemetry_store is not None and (oldest is None or t_from < oldest):
+            store_to = t_to if oldest is None else min(t_to, oldest - 1e-6)
+            if resolution == 'raw':
+                older = telemetry_store.events(intersection_id, t_from, store_to)
+            else:
+                older = telemetry_store.rollup(intersection_id, t_from, store_to, ROLLUPS[resolution][0])
+            points = older + points
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify({'intersection': intersection_id, 'from': t_from, 'to': t_to,
+                    'resolution': resolution, 'points': points})
+
 @app.route('/api/update_traffic', methods=['POST'])
 def update_traffic():
-    """Receive traffic data from live analysis system"""
+    """Receive traffic data from live analysis systems, one update or a batch per request"""
     try:
         data = request.get_json()
+        with INGEST_SECONDS.time(channel='http_requests'):
+            accepted, rejected = ingest_updates(data, 'http_requests')
         
-        if data and 'queues' in data and 'action' in data:
-            # Update global stats
-            stats['current_queues'] = data['queues']
-            stats['last_action'] = data['action']
-            stats['last_prediction'] = datetime.now().strftime('%H:%M:%S')
-            
-            # Broadcast to all connected dashboard clients
-            socketio.emit('traffic_update', {
-                'action': data['action'],
-                'queues': data['queues'],
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            return jsonify({'status': 'success'})
+        if accepted:
+            return jsonify({'status': 'success', 'accepted': accepted, 'rejected': rejected})
         else:
             return jsonify({'status': 'error', 'message': 'Invalid data format'}), 400
             
@@ -610,6 +282,28 @@ def update_traffic():
         print(f"❌ Error updating traffic data: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+# Persistent ingestion channel: producers stay connected and emit 'update' with
+# one update or a batch; the ack carries the accepted/rejected counts
+@socketio.on('connect', namespace='/ingest')
+def handle_producer_connect():
+    with ingest_lock:
+        ingest_stats['producers'] += 1
+    PRODUCERS.inc()
+    print(f'📡 Producer connected! Active producers: {ingest_stats["producers"]}')
+
+@socketio.on('disconnect', namespace='/ingest')
+def handle_producer_disconnect():
+    with ingest_lock:
+        ingest_stats['producers'] -= 1
+    PRODUCERS.dec()
+    print('📡 Producer disconnected.')
+
+@socketio.on('update', namespace='/ingest')
+def handle_ingest(data):
+    with INGEST_SECONDS.time(channel='socket_messages'):
+        accepted, rejected = ingest_updates(data, 'socket_messages')
+    return {'accepted': accepted, 'rejected': rejected}
+
 @socketio.on('connect')
 def handle_connect():
     stats['connections'] += 1
@@ -627,20 +321,35 @@ def handle_ai_request(data):
     try:
         # Extract state data
         state = np.array(data['queues'], dtype=np.float32)
-        
-        # Make prediction
-        action, _ = model.predict(state, deterministic=True)
-        action_int = int(action)
+        intersection_id = str(data.get('intersection') or DEFAULT_INTERSECTION)
+        intersection = intersections.get(intersection_id, create=False)
+        if intersection is None:
+            # Only producers create intersections; a client's ID must not grow the registry
+            emit('error', {'intersection': intersection_id, 'message': f'Unknown intersection {intersection_id}'})
+            return
+        
+        # Make prediction, batched with other intersections' concurrent requests
+        start_time = time.perf_counter()
+        action_int = inference_queue.predict(state)
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        DECISION_SECONDS.observe(latency_ms / 1000)
         action_str = "SWITCH" if action_int == 1 else "KEEP"
+        history.record(intersection_id, time.time(), data['queues'], action_str, latency_ms)
+        if telemetry_store is not None:
+            telemetry_store.record(intersection_id, time.time(), 'prediction', data['queues'], action_str, latency_ms)
         
         # Update statistics
         stats['predictions'] += 1
         stats['last_prediction'] = datetime.now().strftime('%H:%M:%S')
         stats['current_queues'] = data['queues']
         stats['last_action'] = action_str
+        intersection.record_prediction(data['queues'], action_str)
+        observe_intersection(intersection_id, data['queues'], action_str)
+        PREDICTIONS.inc()
         
         # Send response
         response = {
+            'intersection': intersection_id,
             'action': action_int,
             'action_str': action_str,
             'queues': data['queues'],
@@ -650,12 +359,13 @@ def handle_ai_request(data):
         
         emit('ai_action_response', response)
         
-        # Broadcast to all connected clients for dashboard updates
-        socketio.emit('traffic_update', {
+        # Broadcast to the dashboards watching this intersection
+        broadcaster.publish('traffic_update', {
+            'intersection': intersection_id,
             'action': action_str,
             'queues': data['queues'],
             'timestamp': datetime.now().isoformat()
-        })
+        }, room=room_for(intersection_id))
         
         print(f"🤖 Prediction #{stats['predictions']}: State {state} → Action: {action_str}")
         
@@ -663,13 +373,34 @@ def handle_ai_request(data):
         print(f"❌ Error processing AI request: {e}")
         emit('error', {'message': str(e)})
 
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """Join an intersection's room; the current state is sent right away"""
+    intersection_id = str((data or {}).get('intersection') or DEFAULT_INTERSECTION)
+    state = intersections.get(intersection_id, create=False)
+    if state is None:
+        # Only producers create intersections; a client's ID must not grow the registry
+        emit('subscribe_error', {'intersection': intersection_id,
+                                 'message': f'Unknown intersection {intersection_id}'})
+        return
+    join_room(room_for(intersection_id))
+    emit('subscribed', state.snapshot())
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    intersection_id = str((data or {}).get('intersection') or DEFAULT_INTERSECTION)
+    leave_room(room_for(intersection_id))
+
 @socketio.on('disconnect')
 def handle_disconnect():
     print('🔌 Web client disconnected.')
 
 if __name__ == '__main__':
-    print("🌐 Starting web server on http://localhost:5001")
-    print("📊 Dashboard available at: http://localhost:5001")
-    print("🔗 API endpoint: http://localhost:5001/api/stats")
+    port = int(sys.argv[sys.argv.index('--port') + 1]) if '--port' in sys.argv else 5001
+    print(f"🌐 Starting web server on http://localhost:{port}")
+    print(f"📊 Dashboard available at: http://localhost:{port}")
+    print(f"🔗 API endpoint: http://localhost:{port}/api/stats")
+    print(f"📏 Metrics: http://localhost:{port}/metrics")
+    print(f"⚡ Async mode: {ASYNC_MODE} (--async-mode threading|eventlet|gevent)")
     print("="*60)
-    socketio.run(app, host='0.0.0.0', port=5001, debug=False)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=port, debug=False, **server_options(ASYNC_MODE))
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+📣 Coalescing broadcaster for dashboard pushes
+============================================
+Collapses bursts of socket.io emits into at most `max_rate_hz` emits per
+channel, each carrying only the newest state.
+"""
+
+import threading
+import time
+
+from metrics import SOCKET_EMIT_SECONDS, counter
+
+COALESCED = counter('traffic_broadcast_coalesced_total', 'Dashboard pushes replaced by a newer one before emit',
+                    ['event'])
+
+
+class Broadcaster:
+    """
+    Rate-limited, latest-value-wins fan-out on top of Flask-SocketIO.
+
+    A channel is an (event, room, namespace) triple. `publish()` only records
+    the newest payload of its channel; a background task started with
+    `socketio.start_background_task` wakes `max_rate_hz` times per second and
+    emits every channel that changed since its last emit, so clients see the
+    same final state at a fraction of the send cost. `room=None` broadcasts
+    to every client of the namespace.
+    """
+
+    def __init__(self, socketio, max_rate_hz=5.0):
+        self.socketio = socketio
+        self.interval = 1.0 / max_rate_hz
+        self._pending = {}  # (event, room, namespace) -> latest payload
+        self._lock = threading.Lock()
+        self._running = False
+
+        # Counters
+        self.published = 0
+        self.emitted = 0
+        self.coalesced = 0
+        self._channel_stats = {}
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.socketio.start_background_task(self._run)
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def publish(self, event, data, room=None, namespace=None):
+        channel = (event, room, namespace)
+        with self._lock:
+            stats = self._channel_stats.setdefault(channel, {'published': 0, 'emitted': 0, 'coalesced': 0})
+            if channel in self._pending:
+                self.coalesced += 1
+                stats['coalesced'] += 1
+                COALESCED.inc(event=event)
+            self._pending[channel] = data
+            self.published += 1
+            stats['published'] += 1
+
+    def flush(self):
+        """
+        Emits every pending channel now; the background task calls this once per interval.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for (event, room, namespace), data in pending.items():
+            try:
+                with SOCKET_EMIT_SECONDS.time(event=event):
+                    self.socketio.emit(event, data, to=room, namespace=namespace)
+            except Exception as e:
+                print(f"❌ Broadcast of {event} failed: {e}")
+                continue
+            with self._lock:
+                self.emitted += 1
+                self._channel_stats[(event, room, namespace)]['emitted'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            channels = {f"{event}@{room or '*'}": dict(stats)
+                        for (event, room, _), stats in self._channel_stats.items()}
+            return {'published': self.published, 'emitted': self.emitted, 'coalesced': self.coalesced,
+                    'max_rate_hz': 1.0 / self.interval, 'channels': channels}
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self._running:
+            self.flush()
+            next_tick += self.interval
+            # socketio.sleep cooperates with eventlet/gevent as well as threads
+            self.socketio.sleep(max(0.0, next_tick - time.monotonic()))
@@ -0,0 +1,248 @@
+"""
+📈 In-memory traffic history
+==========================
+Fixed-size NumPy ring buffers of queue counts, decisions and latencies per
+intersection, with 1 s / 1 min / 1 h rollups maintained on every sample.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+MAX_ZONES = 8
+FIELDS = ('total_queue', 'switch', 'latency_ms') + tuple(f'queue_{i}' for i in range(MAX_ZONES))
+
+# Tier name -> (bucket seconds, buckets kept)
+ROLLUPS = {
+    '1s': (1, 3600),      # Last hour
+    '1m': (60, 1440),     # Last day
+    '1h': (3600, 720),    # Last 30 days
+}
+RAW_CAPACITY = 36000      # 20 minutes of 30 fps ingest
+
+
+class RingBuffer:
+    """
+    Timestamped rows in preallocated arrays; the oldest row is overwritten when full.
+
+    Rows must arrive in time order, so a time range is located with two
+    binary searches per contiguous segment and copied out in one slice.
+    """
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.full((capacity, width), np.nan)
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp, row):
+        if self.size < self.capacity:
+            index = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[index] = timestamp
+        self.values[index] = row
+
+    def oldest(self):
+        return float(self.times[self.start]) if self.size else None
+
+    def _segments(self):
+        end = self.start + self.size
+        if end <= self.capacity:
+            return [(self.start, end)]
+        return [(self.start, self.capacity), (0, end - self.capacity)]
+
+    def range(self, t_from, t_to):
+        """
+        Times and rows with t_from <= t <= t_to, oldest first.
+        """
+        times, values = [], []
+        for lo, hi in self._segments():
+            segment = self.times[lo:hi]
+            a = lo + np.searchsorted(segment, t_from, side='left')
+            b = lo + np.searchsorted(segment, t_to, side='right')
+            times.append(self.times[a:b])
+            values.append(self.values[a:b])
+        return np.concatenate(times), np.concatenate(values)
+
+
+class RollupTier:
+    """
+    Fixed-width time buckets with the sample count, mean and max of every field.
+
+    The open bucket accumulates sums in place and is appended to the ring
+    when the first sample of a later bucket arrives.
+    """
+
+    def __init__(self, seconds, capacity, width):
+        self.seconds = seconds
+        self.width = width
+        self.ring = RingBuffer(capacity, 1 + 2 * width)  # samples, means, maxima
+        self._bucket = None
+        self._samples = 0
+        self._sum = np.zeros(width)
+        self._count = np.zeros(width)
+        self._max = np.full(width, np.nan)
+
+    def add(self, timestamp, row):
+        bucket = math.floor(timestamp / self.seconds) * self.seconds
+        if bucket != self._bucket:
+            if self._bucket is not None:
+                self.ring.append(self._bucket, self._current_row())
+            self._bucket = bucket
+            self._samples = 0
+            self._sum[:] = 0
+            self._count[:] = 0
+            self._max[:] = np.nan
+
+        present = ~np.isnan(row)
+        self._samples += 1
+        self._sum[present] += row[present]
+        self._count[present] += 1
+        self._max = np.fmax(self._max, row)
+
+    def oldest(self):
+        oldest = self.ring.oldest()
+        return oldest if oldest is not None else self._bucket
+
+    def _current_row(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(self._count > 0, self._sum / self._count, np.nan)
+        return np.concatenate([[self._samples], means, self._max])
+
+    def range(self, t_from, t_to):
+        # Include the bucket that t_from falls into
+        t_from = math.floor(t_from / self.seconds) * self.seconds
+        times, rows = self.ring.range(t_from, t_to)
+        if self._bucket is not None and t_from <= self._bucket <= t_to:
+            times = np.append(times, self._bucket)
+            rows = np.vstack([rows, self._current_row()])
+        return times, rows
+
+
+def _value(x):
+    return None if math.isnan(x) else round(x, 3)
+
+
+class IntersectionHistory:
+    """
+    Raw samples plus every rollup tier of one intersection, behind one lock.
+    """
+
+    def __init__(self, raw_capacity=RAW_CAPACITY, rollups=ROLLUPS):
+        self.lock = threading.Lock()
+        self.raw = RingBuffer(raw_capacity, len(FIELDS))
+        self.tiers = {name: RollupTier(seconds, capacity, len(FIELDS))
+                      for name, (seconds, capacity) in rollups.items()}
+
+    def record(self, timestamp, queues, action=None, latency_ms=None):
+        """
+        Adds one sample; `action` is 'SWITCH'/'KEEP' (or 1/0), missing values stay NaN.
+        """
+        row = np.full(len(FIELDS), np.nan)
+        queues = list(queues)[:MAX_ZONES]
+        row[0] = sum(queues)
+        if action is not None:
+            row[1] = 1.0 if action in ('SWITCH', 1) else 0.0
+        if latency_ms is not None:
+            row[2] = latency_ms
+        row[3:3 + len(queues)] = queues
+
+        with self.lock:
+            self.raw.append(timestamp, row)
+            for tier in self.tiers.values():
+                tier.add(timestamp, row)
+
+    def oldest(self, resolution):
+        """
+        Time of the oldest point still held at a resolution, None when empty.
+        """
+        with self.lock:
+            return self.raw.oldest() if resolution == 'raw' else self.tiers[resolution].oldest()
+
+    def query(self, t_from, t_to, resolution):
+        """
+        Points between two unix times at 'raw' or a rollup resolution, oldest first.
+        """
+        with self.lock:
+            if resolution == 'raw':
+                times, rows = self.raw.range(t_from, t_to)
+            else:
+                times, rows = self.tiers[resolution].range(t_from, t_to)
+
+        width = len(FIELDS)
+        points = []
+        # Plain floats from here on; per-element NumPy calls would dominate the cost
+        for t, row in zip(times.tolist(), rows.tolist()):
+            if resolution == 'raw':
+                point = {'t': t, 'total_queue': _value(row[0]), 'switch': _value(row[1]),
+                         'latency_ms': _value(row[2]), 'queues': [_value(q) for q in row[3:] if not math.isnan(q)]}
+            else:
+                means, maxima = row[1:1 + width], row[1 + width:]
+                point = {'t': t, 'samples': int(row[0]), 'total_queue': _value(means[0]),
+                         'total_queue_max': _value(maxima[0]), 'switch_rate': _value(means[1]),
+                         'latency_ms': _value(means[2]), 'latency_ms_max': _value(maxima[2]),
+                         'queues': [_value(q) for q in means[3:] if not math.isnan(q)]}
+            points.append(point)
+        return points
+
+
+class HistoryStore:
+    """
+    Intersection ID -> IntersectionHistory, created on first sample.
+
+    Each history preallocates every ring buffer and rollup tier (several MB),
+    so with `known` (e.g. IntersectionRegistry.__contains__) samples for
+    intersections it does not know are dropped instead of allocating one.
+    """
+
+    def __init__(self, max_points=1000, known=None):
+        self.max_points = max_points
+        self.known = known
+        self._histories = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def get(self, intersection_id):
+        history = self._histories.get(intersection_id)
+        if history is None:
+            with self._lock:
+                history = self._histories.setdefault(intersection_id, IntersectionHistory())
+        return history
+
+    def __contains__(self, intersection_id):
+        return intersection_id in self._histories
+
+    def record(self, intersection_id, timestamp, queues, action=None, latency_ms=None):
+        """
+        Adds one sample; returns False when `known` rejected the intersection.
+        """
+        if intersection_id not in self._histories and self.known is not None and not self.known(intersection_id):
+            self.dropped += 1
+            return False
+        self.get(intersection_id).record(timestamp, queues, action, latency_ms)
+        return True
+
+    def oldest(self, intersection_id, resolution):
+        return self.get(intersection_id).oldest(resolution) if intersection_id in self else None
+
+    def pick_resolution(self, t_from, t_to):
+        """
+        Finest rollup that answers the range in at most `max_points` points.
+        """
+        for name, (seconds, _) in ROLLUPS.items():
+            if (t_to - t_from) / seconds <= self.max_points:
+                return name
+        return list(ROLLUPS)[-1]
+
+    def query(self, intersection_id, t_from, t_to, resolution='auto'):
+        if resolution == 'auto':
+            resolution = self.pick_resolution(t_from, t_to)
+        if resolution != 'raw' and resolution not in ROLLUPS:
+            raise ValueError(f"Unknown resolution {resolution}, use raw, auto or one of {', '.join(ROLLUPS)}")
+        points = self.get(intersection_id).query(t_from, t_to, resolution) if intersection_id in self else []
+        return resolution, points
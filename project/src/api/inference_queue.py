@@ -0,0 +1,176 @@
+"""
+🧮 Micro-batching inference queue for the policy server
+=====================================================
+Collects concurrent prediction requests for a few milliseconds and runs
+them as one batched forward pass.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+from metrics import DEPTH_BUCKETS, histogram
+
+QUEUE_DEPTH = histogram('traffic_inference_queue_depth', 'Requests waiting when a prediction request is queued',
+                        buckets=DEPTH_BUCKETS)
+BATCH_SIZE = histogram('traffic_inference_batch_size', 'Requests answered by one batched forward pass',
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_SECONDS = histogram('traffic_inference_batch_seconds', 'Time of one batched policy.predict call')
+
+CONFIG_PATH = Path(__file__).parent.parent.parent.parent / "config.json"
+
+# Used when config.json has no web_interface.inference_queue section
+DEFAULT_QUEUE_SETTINGS = {
+    'max_batch_size': 32,
+    'max_wait_ms': 5.0,
+    'timeout_s': 2.0,
+}
+
+
+def load_queue_settings(config_path=CONFIG_PATH):
+    """
+    Reads the inference queue settings from config.json, falling back to defaults.
+    """
+    settings = dict(DEFAULT_QUEUE_SETTINGS)
+    try:
+        with open(config_path) as f:
+            settings.update(json.load(f).get('web_interface', {}).get('inference_queue', {}))
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read {config_path} ({e}), using the default inference queue")
+    return settings
+
+
+class InferenceQueue:
+    """
+    Fans many single-observation requests into batched `policy.predict` calls.
+
+    Callers block in `predict()` while a single worker thread drains the
+    queue: it takes the first waiting request, keeps collecting until
+    `max_batch_size` requests are in hand or `max_wait_ms` has passed, runs
+    one deterministic forward pass per observation shape and resolves each
+    caller's future with its own action.
+    """
+
+    def __init__(self, policy, max_batch_size=32, max_wait_ms=5.0, timeout_s=2.0, latency_window=1000):
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.timeout_s = timeout_s
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="inference-queue", daemon=True)
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._latencies_ms = deque(maxlen=latency_window)
+        self._inference_ms = deque(maxlen=latency_window)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+
+    def predict(self, observation, timeout=None):
+        """
+        Returns the deterministic action for one observation, as an int.
+
+        Raises TimeoutError when no batch picks the request up in time, and
+        re-raises whatever the policy raised for this request's batch.
+        """
+        future = Future()
+        self._queue.put((np.asarray(observation, dtype=np.float32), time.perf_counter(), future))
+        depth = self._queue.qsize()
+        QUEUE_DEPTH.observe(depth)
+        with self._metrics_lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+        return future.result(timeout=timeout or self.timeout_s)
+
+    def _collect(self):
+        """
+        Blocks for the first request, then gathers more until the batch is full or the window closes.
+        """
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stop.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # Requests with different observation sizes cannot share a forward pass
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[0].shape, []).append(item)
+
+            start = time.perf_counter()
+            for items in groups.values():
+                try:
+                    actions, _ = self.policy.predict(np.stack([obs for obs, _, _ in items]), deterministic=True)
+                    for (_, _, future), action in zip(items, np.asarray(actions).reshape(-1)):
+                        future.set_result(int(action))
+                except Exception as e:
+                    with self._metrics_lock:
+                        self.errors += len(items)
+                    for _, _, future in items:
+                        future.set_exception(e)
+            finished = time.perf_counter()
+            BATCH_SIZE.observe(len(batch))
+            BATCH_SECONDS.observe(finished - start)
+
+            with self._metrics_lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self._batch_sizes.append(len(batch))
+                self._inference_ms.append((finished - start) * 1000)
+                self._latencies_ms.extend((finished - queued) * 1000 for _, queued, _ in batch)
+
+    def get_stats(self):
+        """
+        Queue depth, batch sizes and request latency (queueing + inference) percentiles.
+        """
+        with self._metrics_lock:
+            latencies = np.array(self._latencies_ms) if self._latencies_ms else np.zeros(1)
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+                'latency_ms_p50': float(np.percentile(latencies, 50)),
+                'latency_ms_p99': float(np.percentile(latencies, 99)),
+                'inference_ms_mean': float(np.mean(self._inference_ms)) if self._inference_ms else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+            }
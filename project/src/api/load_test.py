@@ -0,0 +1,247 @@
+"""
+🔬 Dashboard connection load test
+================================
+Opens dashboard socket.io connections in steps and measures, at each step,
+how long the server takes to ack an ingest message and to fan the resulting
+traffic_update out to every dashboard.
+
+    python load_test.py --spawn threading,eventlet --steps 100,500,1000
+    python load_test.py --url http://localhost:5001 --steps 50,200
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import requests
+import socketio
+
+APP_PATH = Path(__file__).parent / "app.py"
+INTERSECTION = 'load-test'
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float('nan')
+
+
+class Dashboard:
+    """
+    One dashboard connection subscribed to the load-test intersection, recording fan-out delays.
+    """
+
+    def __init__(self, url, samples, lock):
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('traffic_update', self._on_update)
+        self.client.on('connect', lambda: self.client.emit('subscribe', {'intersection': INTERSECTION}))
+        self.url = url
+        self.samples = samples
+        self.lock = lock
+
+    def _on_update(self, data):
+        delay = time.time() - datetime.fromisoformat(data['timestamp']).timestamp()
+        with self.lock:
+            self.samples.append(delay * 1000)
+
+    def connect(self):
+        start = time.perf_counter()
+        self.client.connect(self.url, wait_timeout=30)
+        return (time.perf_counter() - start) * 1000
+
+    def disconnect(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+def run_step(producer, duration, rate):
+    """
+    Sends `rate` updates per second for `duration` seconds through the /ingest namespace.
+
+    Stops early when the server drops the producer, which is how an
+    overloaded server shows up (missed pings).
+    """
+    ack_ms = []
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    deadline = next_send + duration
+    failed = 0
+    while time.perf_counter() < deadline and producer.connected:
+        start = time.perf_counter()
+        try:
+            producer.call('update', {'queues': [1, 2, 3, 4], 'action': 'KEEP', 'intersection': INTERSECTION},
+                          namespace='/ingest', timeout=10)
+            ack_ms.append((time.perf_counter() - start) * 1000)
+        except socketio.exceptions.SocketIOError:
+            failed += 1
+        next_send += interval
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+    return ack_ms, failed
+
+
+def load_test(url, steps, duration, rate, workers):
+    """
+    Returns one result row per connection count.
+    """
+    samples, lock = [], threading.Lock()
+    dashboards, results = [], []
+    producer = socketio.Client(reconnection=False)
+    producer.connect(url, namespaces=['/ingest'], wait_timeout=30)
+    # Only producers create intersections, so report once before any dashboard subscribes
+    producer.call('update', {'queues': [0, 0, 0, 0], 'action': 'KEEP', 'intersection': INTERSECTION},
+                  namespace='/ingest', timeout=10)
+
+    try:
+        for target in steps:
+            new = [Dashboard(url, samples, lock) for _ in range(target - len(dashboards))]
+            connect_ms, connect_failed = [], 0
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for dashboard, result in zip(new, pool.map(_try_connect, new)):
+                    if result is None:
+                        connect_failed += 1
+                    else:
+                        connect_ms.append(result)
+                        dashboards.append(dashboard)
+            time.sleep(1.0)  # Let the subscriptions land
+
+            with lock:
+                samples.clear()
+            ack_ms, ack_failed = run_step(producer, duration, rate)
+            time.sleep(0.5)  # Last coalesced emit
+            with lock:
+                fanout_ms = list(samples)
+
+            row = {
+                'connections': len(dashboards),
+                'connect_failed': connect_failed,
+                'connect_ms_p50': percentile(connect_ms, 50),
+                'ack_ms_p50': percentile(ack_ms, 50),
+                'ack_ms_p99': percentile(ack_ms, 99),
+                'ack_failed': ack_failed,
+                'fanout_ms_p50': percentile(fanout_ms, 50),
+                'fanout_ms_p99': percentile(fanout_ms, 99),
+                'deliveries_per_s': len(fanout_ms) / duration,
+            }
+            results.append(row)
+            print_row(row)
+            if not producer.connected:
+                print(f"💥 The server dropped the producer at {len(dashboards)} connections, stopping")
+                break
+    finally:
+        # A clean disconnect waits for the close handshake, so close them in parallel too
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(Dashboard.disconnect, dashboards))
+        if producer.connected:
+            producer.disconnect()
+    return results
+
+
+def _try_connect(dashboard):
+    try:
+        return dashboard.connect()
+    except Exception:
+        return None
+
+
+def print_header(mode):
+    print(f"\n⚡ {mode}")
+    print(f"{'conns':>6} {'failed':>6} {'conn p50':>9} {'ack p50':>8} {'ack p99':>8} "
+          f"{'fanout p50':>11} {'fanout p99':>11} {'deliv/s':>8}")
+
+
+def print_row(row):
+    print(f"{row['connections']:>6} {row['connect_failed'] + row['ack_failed']:>6} {row['connect_ms_p50']:>8.1f}ms "
+          f"{row['ack_ms_p50']:>6.1f}ms {row['ack_ms_p99']:>6.1f}ms {row['fanout_ms_p50']:>9.1f}ms "
+          f"{row['fanout_ms_p99']:>9.1f}ms {row['deliveries_per_s']:>8.0f}")
+
+
+def spawn_server(mode, port):
+    """
+    Starts app.py in one async mode and waits until it answers.
+    """
+    # Threading mode has no terminal here, so Werkzeug must be allowed explicitly
+    process = subprocess.Popen([sys.executable, str(APP_PATH), '--async-mode', mode, '--port', str(port),
+                                '--allow-unsafe-werkzeug'],
+                               cwd=APP_PATH.parent, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://localhost:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited with code {process.returncode} in {mode} mode")
+        try:
+            requests.get(f"{url}/api/stats", timeout=1).raise_for_status()
+            return process, url
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"app.py did not start in {mode} mode")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Dashboard connections vs. latency for the API server")
+    parser.add_argument('--url', default='http://localhost:5001', help="Server to test when not spawning one")
+    parser.add_argument('--spawn', help="Comma-separated async modes to start app.py in, one after another")
+    parser.add_argument('--port', type=int, default=5101, help="Port for spawned servers")
+    parser.add_argument('--steps', default='10,50,100,250,500', help="Comma-separated connection counts")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds of ingest traffic per step")
+    parser.add_argument('--rate', type=float, default=20.0, help="Ingest messages per second")
+    parser.add_argument('--workers', type=int, default=50, help="Parallel connection attempts")
+    parser.add_argument('--output', help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        args.steps = sorted(int(step) for step in args.steps.split(','))
+    except ValueError:
+        parser.error(f"--steps must be comma-separated connection counts, got {args.steps!r}")
+    if args.steps[0] < 1:
+        parser.error("--steps must be at least 1 connection")
+    if args.duration <= 0 or args.rate <= 0 or args.workers < 1:
+        parser.error("--duration, --rate and --workers must be positive")
+    if args.spawn:
+        args.spawn = [mode.strip() for mode in args.spawn.split(',') if mode.strip()]
+    return args
+
+
+def save_results(results, path):
+    """
+    Writes the result rows as JSON; percentiles of steps without samples become null.
+    """
+    results = {target: [{key: None if isinstance(value, float) and np.isnan(value) else value
+                         for key, value in row.items()} for row in rows]
+               for target, rows in results.items()}
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    results = {}
+    if args.spawn:
+        for mode in args.spawn:
+            process, url = spawn_server(mode, args.port)
+            try:
+                print_header(mode)
+                results[mode] = load_test(url, args.steps, args.duration, args.rate, args.workers)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+    else:
+        print_header(args.url)
+        results[args.url] = load_test(args.url, args.steps, args.duration, args.rate, args.workers)
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"\n💾 Results saved to {args.output}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
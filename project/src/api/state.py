@@ -0,0 +1,125 @@
+"""
+🗺️ Per-intersection traffic state
+================================
+One registry entry per intersection, each with its own lock, so one API
+process can serve a whole corridor of junctions.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_INTERSECTION = 'default'
+ACTIONS = ('KEEP', 'SWITCH')
+
+
+def room_for(intersection_id):
+    """
+    socket.io room that receives the pushes of one intersection.
+    """
+    return f"intersection:{intersection_id}"
+
+
+def update_error(update):
+    """
+    Why a producer's {'queues', 'action', 'intersection'} update is unusable, or None when it is valid.
+    """
+    if not isinstance(update, dict):
+        return 'not an object'
+    queues = update.get('queues')
+    if not isinstance(queues, list):
+        return 'queues must be a list'
+    if not all(isinstance(q, (int, float)) and not isinstance(q, bool) and math.isfinite(q) for q in queues):
+        return 'queues must be finite numbers'
+    if update.get('action') not in ACTIONS:
+        return f"action must be one of {', '.join(ACTIONS)}"
+    return None
+
+
+class IntersectionState:
+    """
+    Latest queues and decision of one junction.
+
+    Writers hold the entry's own lock, so updates to different intersections
+    never contend with each other.
+    """
+
+    def __init__(self, intersection_id):
+        self.intersection_id = intersection_id
+        self.lock = threading.Lock()
+        self.queues = []
+        self.last_action = 'KEEP'
+        self.last_update = None
+        self.updates = 0
+        self.predictions = 0
+
+    def apply_update(self, queues, action, count=1):
+        """
+        Stores the newest of `count` updates received together for this junction.
+        """
+        with self.lock:
+            self.queues = list(queues)
+            self.last_action = action
+            self.last_update = time.time()
+            self.updates += count
+
+    def record_prediction(self, queues, action):
+        with self.lock:
+            self.queues = list(queues)
+            self.last_action = action
+            self.last_update = time.time()
+            self.predictions += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'intersection': self.intersection_id,
+                'queues': list(self.queues),
+                'last_action': self.last_action,
+                'last_update': datetime.fromtimestamp(self.last_update).isoformat() if self.last_update else None,
+                'updates': self.updates,
+                'predictions': self.predictions,
+            }
+
+
+class IntersectionRegistry:
+    """
+    Intersection ID -> IntersectionState.
+
+    The registry lock only guards creating entries; all reads and writes of
+    an entry's data go through the entry's own lock. Only producers create
+    entries; the default junction exists from the start so a dashboard can
+    subscribe to it before the first update.
+    """
+
+    def __init__(self):
+        self._intersections = {DEFAULT_INTERSECTION: IntersectionState(DEFAULT_INTERSECTION)}
+        self._lock = threading.Lock()
+
+    def get(self, intersection_id=None, create=True):
+        """
+        Returns the entry for an intersection, creating it on first use.
+
+        With `create=False` an unknown intersection returns None instead, for
+        lookups on behalf of clients, which must not grow the registry.
+        """
+        intersection_id = str(intersection_id or DEFAULT_INTERSECTION)
+        state = self._intersections.get(intersection_id)
+        if state is None and create:
+            with self._lock:
+                state = self._intersections.setdefault(intersection_id, IntersectionState(intersection_id))
+        return state
+
+    def ids(self):
+        with self._lock:
+            return list(self._intersections)
+
+    def snapshot(self):
+        return {intersection_id: self.get(intersection_id).snapshot() for intersection_id in self.ids()}
+
+    def __contains__(self, intersection_id):
+        return str(intersection_id) in self._intersections
+
+    def __len__(self):
+        return len(self._intersections)
@@ -0,0 +1,174 @@
+"""
+🗄️ Persistent telemetry store
+============================
+Append-only SQLite (WAL) log of every ingested update and prediction,
+written in batches by a background thread.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+
+from history import MAX_ZONES
+
+ZONE_COLUMNS = [f'q{i}' for i in range(MAX_ZONES)]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    intersection TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    action TEXT,
+    switch INTEGER,
+    total_queue REAL,
+    latency_ms REAL,
+    queues TEXT,
+    {', '.join(f'{c} REAL' for c in ZONE_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS idx_events_intersection_ts ON events (intersection, ts);
+"""
+
+INSERT = (f"INSERT INTO events (ts, intersection, kind, action, switch, total_queue, latency_ms, queues, "
+          f"{', '.join(ZONE_COLUMNS)}) VALUES ({', '.join(['?'] * (8 + MAX_ZONES))})")
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
+
+
+class TelemetryStore:
+    """
+    SQLite event log behind app.py.
+
+    `record()` only enqueues; a writer thread wakes every `flush_interval`
+    seconds and inserts everything queued in one transaction. WAL mode lets
+    history queries read while the writer appends, and the
+    (intersection, ts) index keeps range queries off full scans. Queries share
+    one read connection, so request threads never leave connections behind.
+    """
+
+    def __init__(self, path, flush_interval=0.25, max_pending=100000):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-store", daemon=True)
+        self._read_connection = None
+        self._read_lock = threading.Lock()
+
+        # Counters
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def _connect(self, check_same_thread=True):
+        connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=check_same_thread)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _query(self, sql, parameters):
+        # One connection for every request thread, used by one query at a time
+        with self._read_lock:
+            if self._read_connection is None:
+                self._read_connection = self._connect(check_same_thread=False)
+            return self._read_connection.execute(sql, parameters).fetchall()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        """
+        Writes whatever is still queued, then stops the writer and closes the read connection.
+        """
+        self._stop.set()
+        if self._thread.ident is not None:  # A store opened only to read was never started
+            self._thread.join(timeout=5.0)
+        with self._read_lock:
+            if self._read_connection is not None:
+                self._read_connection.close()
+                self._read_connection = None
+
+    def record(self, intersection_id, timestamp, kind, queues, action=None, latency_ms=None):
+        """
+        Queues one event; never blocks the caller, drops (and counts) when the writer is behind.
+        """
+        queues = list(queues)
+        zones = (queues + [None] * MAX_ZONES)[:MAX_ZONES]
+        switch = None if action is None else int(action in ('SWITCH', 1))
+        row = (timestamp, intersection_id, kind, action, switch, float(sum(queues)), latency_ms,
+               json.dumps(queues), *zones)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                return rows
+
+    def _run(self):
+        connection = self._connect()
+        while True:
+            stopping = self._stop.wait(self.flush_interval)
+            rows = self._drain()
+            if rows:
+                try:
+                    with connection:
+                        connection.executemany(INSERT, rows)
+                    self.written += len(rows)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    self.errors += 1
+                    print(f"❌ Telemetry store write failed ({len(rows)} events): {e}")
+            if stopping:
+                break
+        connection.close()
+
+    def events(self, intersection_id, t_from, t_to, limit=10000):
+        """
+        Raw events in a time range, in the same point format as the in-memory raw history.
+        """
+        rows = self._query(
+            "SELECT ts, total_queue, switch, latency_ms, queues FROM events "
+            "WHERE intersection = ? AND ts BETWEEN ? AND ? ORDER BY ts LIMIT ?",
+            (intersection_id, t_from, t_to, limit))
+        return [{'t': ts, 'total_queue': total, 'switch': switch, 'latency_ms': latency,
+                 'queues': json.loads(queues)} for ts, total, switch, latency, queues in rows]
+
+    def rollup(self, intersection_id, t_from, t_to, seconds):
+        """
+        Events aggregated into `seconds`-wide buckets, in the in-memory rollup point format.
+        """
+        zone_means = ', '.join(f'AVG({c})' for c in ZONE_COLUMNS)
+        rows = self._query(
+            f"SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, COUNT(*), AVG(total_queue), MAX(total_queue), "
+            f"AVG(switch), AVG(latency_ms), MAX(latency_ms), {zone_means} FROM events "
+            f"WHERE intersection = ? AND ts BETWEEN ? AND ? GROUP BY bucket ORDER BY bucket",
+            (seconds, seconds, intersection_id, t_from, t_to))
+        points = []
+        for bucket, samples, total, total_max, switch_rate, latency, latency_max, *zones in rows:
+            points.append({'t': float(bucket), 'samples': samples, 'total_queue': _round(total),
+                           'total_queue_max': total_max, 'switch_rate': _round(switch_rate),
+                           'latency_ms': _round(latency), 'latency_ms_max': latency_max,
+                           'queues': [_round(z) for z in zones if z is not None]})
+        return points
+
+    def get_stats(self):
+        return {'path': self.path, 'written': self.written, 'batches': self.batches,
+                'pending': self._queue.qsize(), 'dropped': self.dropped, 'errors': self.errors}
@@ -0,0 +1,100 @@
+"""
+⚡ Async serving mode for the Flask-SocketIO servers
+==================================================
+Picks threading, eventlet or gevent and monkey-patches the standard library
+for the green-thread modes. Import and call this before flask, flask_socketio
+or anything that creates sockets or threads.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).parent.parent.parent / "config.json"
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+
+def requested_async_mode(argv=None, config_path=CONFIG_PATH):
+    """
+    --async-mode on the command line, else $TRAFFIC_ASYNC_MODE, else web_interface.async_mode, else threading.
+    """
+    argv = sys.argv if argv is None else argv
+    if '--async-mode' in argv:
+        return argv[argv.index('--async-mode') + 1]
+    if os.environ.get('TRAFFIC_ASYNC_MODE'):
+        return os.environ['TRAFFIC_ASYNC_MODE']
+    try:
+        with open(config_path) as f:
+            return json.load(f).get('web_interface', {}).get('async_mode', 'threading')
+    except (OSError, ValueError):
+        return 'threading'
+
+
+def setup_async_mode(mode=None):
+    """
+    Monkey-patches for the requested mode and returns the mode to pass to SocketIO(async_mode=...).
+
+    In eventlet/gevent mode every connection and emit is a green thread, so
+    one process holds thousands of idle dashboard sockets instead of one OS
+    thread each; threading.Thread, queue and time.sleep used by the server's
+    background workers are patched to cooperate. Falls back to threading
+    when the package is not installed.
+    """
+    mode = mode or requested_async_mode()
+    if mode not in ASYNC_MODES:
+        print(f"⚠️  Unknown async mode {mode}, use one of {', '.join(ASYNC_MODES)}; using threading")
+        return 'threading'
+    try:
+        if mode == 'eventlet':
+            import eventlet
+            eventlet.monkey_patch()
+        elif mode == 'gevent':
+            from gevent import monkey
+            monkey.patch_all()
+    except ImportError:
+        print(f"⚠️  {mode} is not installed (pip install {mode}), using threading")
+        return 'threading'
+    if mode != 'threading':
+        print(f"⚡ Async mode: {mode}")
+    return mode
+
+
+def unsafe_werkzeug_allowed(argv=None, config_path=CONFIG_PATH):
+    """
+    --allow-unsafe-werkzeug on the command line, else web_interface.allow_unsafe_werkzeug (off by default).
+    """
+    argv = sys.argv if argv is None else argv
+    if '--allow-unsafe-werkzeug' in argv:
+        return True
+    try:
+        with open(config_path) as f:
+            return bool(json.load(f).get('web_interface', {}).get('allow_unsafe_werkzeug', False))
+    except (OSError, ValueError):
+        return False
+
+
+def server_options(mode, max_connections=10000, allow_unsafe_werkzeug=None):
+    """
+    Extra socketio.run() arguments for a mode.
+
+    eventlet serves at most `max_size` requests at once (1024 by default)
+    and a client can hold two of them (its long poll and its websocket),
+    which caps a default server near 500 dashboards.
+
+    Threading mode runs on Werkzeug's development server, which
+    Flask-SocketIO refuses to start without a terminal (a service, the
+    load test). Allowing it anyway is the operator's explicit choice, see
+    unsafe_werkzeug_allowed(); eventlet or gevent is the production setup.
+    """
+    if mode == 'eventlet':
+        return {'max_size': 2 * max_connections}
+    if mode == 'threading':
+        if allow_unsafe_werkzeug is None:
+            allow_unsafe_werkzeug = unsafe_werkzeug_allowed()
+        if allow_unsafe_werkzeug:
+            print("⚠️  Serving on the Werkzeug development server (allow_unsafe_werkzeug); "
+                  "use --async-mode eventlet or gevent in production")
+            return {'allow_unsafe_werkzeug': True}
+    return {}
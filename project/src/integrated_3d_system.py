@@ -5,16 +5,20 @@
 Complete 3D visualization integrated with existing traffic AI system
 """
 
+# With --workers, each spawned camera process re-imports this script as
+# __mp_main__ before running workers.camera_worker. Only the server process
+# serves, simulates and loads models, so only it monkey-patches for the async
+# mode and pays for gym, sumo_rl, traci, flask and the vision processor
+SERVER_PROCESS = __name__ != '__mp_main__'
+
+if SERVER_PROCESS:
+    from async_mode import server_options, setup_async_mode
+    ASYNC_MODE = setup_async_mode()  # Monkey-patches eventlet/gevent before flask opens sockets or threads start
+
 import cv2
 import numpy as np
-import gymnasium as gym
-from stable_baselines3 import PPO
-import sumo_rl
 import threading
 import time
-from flask import Flask, render_template_string, jsonify
-from flask_socketio import SocketIO, emit
-import traci
 import json
 from datetime import datetime
 import sys
@@ -23,7 +27,20 @@ from pathlib import Path
 
 # Add vision processor
 sys.path.append(str(Path(__file__).parent / 'vision'))
-from processor import VisionProcessor
+sys.path.append(str(Path(__file__).parent / 'ai_core'))
+from sources import open_source
+from workers import CameraWorkerPool
+
+if SERVER_PROCESS:
+    import gymnasium as gym
+    import sumo_rl
+    import traci
+    from flask import Flask, jsonify
+    from flask_socketio import SocketIO, emit
+    from policy_cache import load_cached_policy
+    from static_assets import StaticAssets
+    from metrics import MODEL_PREDICT_SECONDS, SOCKET_EMIT_SECONDS, metrics_response, observe_intersection
+    from processor import VisionProcessor
 
 # --- CONFIGURATION ---
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -46,10 +63,12 @@ POLYGONS_VIDEO_2 = [
 ]
 
 class Integrated3DTrafficSystem:
-    def __init__(self):
-        self.app = Flask(__name__)
+    def __init__(self, use_workers=False):
+        self.use_workers = use_workers
+        self.app = Flask(__name__, static_folder=None)
         self.app.config['SECRET_KEY'] = 'integrated_3d_traffic_2024'
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        self.static_assets = StaticAssets().register(self.app)
+        self.socketio = SocketIO(self.app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
         
         # Initialize components
         self.setup_routes()
@@ -69,22 +88,33 @@ class Integrated3DTrafficSystem:
         # Analytics
         self.frame_count = 0
         self.last_action = 0
+        self.detected_vehicles = 0
         self.start_time = time.time()
         
     def init_ai_system(self):
         """Initialize AI model and vision system"""
         print("🤖 Loading AI model...")
-        self.model = PPO.load(MODEL_PATH)
+        self.model = load_cached_policy(MODEL_PATH)
         print("✅ AI model loaded!")
         
-        print("👁️  Initializing vision processor...")
-        self.processor = VisionProcessor()
-        print("✅ Vision system ready!")
-        
-        print("📹 Opening video streams...")
-        self.cap1 = cv2.VideoCapture(VIDEO_PATH_1)
-        self.cap2 = cv2.VideoCapture(VIDEO_PATH_2)
-        print("✅ Video streams connected!")
+        self.pool = None
+        if self.use_workers:
+            # One vision process per camera; the simulation loop only reads their latest counts
+            print("👷 Starting camera workers...")
+            self.pool = CameraWorkerPool([(VIDEO_PATH_1, POLYGONS_VIDEO_1), (VIDEO_PATH_2, POLYGONS_VIDEO_2)],
+                                         share_frames=False, source_kwargs={'loop': True})
+            self.pool.start()
+            print("✅ Camera workers running!")
+        else:
+            print("👁️  Initializing vision processor...")
+            self.processor = VisionProcessor()
+            print("✅ Vision system ready!")
+            
+            print("📹 Opening video streams...")
+            # Looping file sources; swap in rtsp:// or http:// URIs for real cameras
+            self.cap1 = open_source(VIDEO_PATH_1, loop=True)
+            self.cap2 = open_source(VIDEO_PATH_2, loop=True)
+            print("✅ Video streams connected!")
         
         print("🌐 Starting SUMO environment...")
         self.env = gym.make('sumo-rl-v0', 
@@ -100,7 +130,7 @@ class Integrated3DTrafficSystem:
     def setup_routes(self):
         @self.app.route('/')
         def dashboard():
-            return render_template_string(INTEGRATED_3D_HTML)
+            return self.static_assets.response('integrated_3d.html')
         
         @self.app.route('/api/3d_data')
         def get_3d_data():
@@ -116,6 +146,10 @@ class Integrated3DTrafficSystem:
                 "vehicles": len(self.simulation_data["vehicles"]),
                 "ai_decision": self.simulation_data["ai_decision"]
             })
+        
+        @self.app.route('/metrics')
+        def metrics():
+            return metrics_response()
     
     def setup_socketio(self):
         @self.socketio.on('connect')
@@ -129,18 +163,22 @@ class Integrated3DTrafficSystem:
     
     def process_video_feeds(self):
         """Process video feeds for queue detection"""
+        if self.pool is not None:
+            snapshots = [self.pool.latest(camera_id) for camera_id in range(2)]
+            self.detected_vehicles = sum(len(s.detections) for s in snapshots if s is not None)
+            return self.pool.latest_counts()
+        
         ret1, frame1 = self.cap1.read()
         ret2, frame2 = self.cap2.read()
         
         if not ret1 or not ret2:
-            # Reset videos if they end
-            self.cap1.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            self.cap2.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # Sources loop and reconnect by themselves; just report empty queues meanwhile
             return [0, 0, 0, 0]
         
         # Process frames for queue detection
-        queue_counts1, _ = self.processor.process_frame(frame1, POLYGONS_VIDEO_1)
-        queue_counts2, _ = self.processor.process_frame(frame2, POLYGONS_VIDEO_2)
+        (queue_counts1, detections1), (queue_counts2, detections2) = self.processor.process_frames(
+            [frame1, frame2], [POLYGONS_VIDEO_1, POLYGONS_VIDEO_2])
+        self.detected_vehicles = len(detections1) + len(detections2)
         
         # Ensure we have 4 zones
         if len(queue_counts1) != 2:
@@ -278,7 +316,8 @@ class Integrated3DTrafficSystem:
                     num_lanes = len(queue_state)
                     current_phase = self.obs[num_lanes:]
                     state_for_model = np.concatenate([queue_state, current_phase]).astype(np.float32)
-                    self.last_action, _ = self.model.predict(state_for_model, deterministic=True)
+                    with MODEL_PREDICT_SECONDS.time():
+                        self.last_action, _ = self.model.predict(state_for_model, deterministic=True)
                     print(f"🤖 AI Decision: {'SWITCH' if self.last_action == 1 else 'KEEP'} (Frame {self.frame_count})")
                 except Exception as e:
                     print(f"AI decision error: {e}")
@@ -313,13 +352,17 @@ class Integrated3DTrafficSystem:
                     "total_vehicles": len(vehicles_3d),
                     "avg_speed": np.mean([v["speed"] for v in vehicles_3d]) if vehicles_3d else 0,
                     "queue_total": sum(queue_state),
+                    "detected_vehicles": self.detected_vehicles,
                     "runtime": time.time() - self.start_time,
                     "frame_count": self.frame_count
                 }
             }
             
+            observe_intersection('default', queue_state, self.simulation_data["ai_decision"])
+            
             # Broadcast to connected clients
-            self.socketio.emit('3d_update', self.simulation_data)
+            with SOCKET_EMIT_SECONDS.time(event='3d_update'):
+                self.socketio.emit('3d_update', self.simulation_data)
             
             # Control simulation speed
             time.sleep(0.033)  # ~30 FPS
@@ -340,464 +383,10 @@ class Integrated3DTrafficSystem:
         print("="*60)
         
         # Start Flask server
-        self.socketio.run(self.app, host='0.0.0.0', port=5004, debug=False)
-
-# 3D Dashboard HTML
-INTEGRATED_3D_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🎮 Integrated 3D Traffic Management</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        
-        body {
-            background: linear-gradient(135deg, #0d1117 0%, #161b22 50%, #21262d 100%);
-            color: #f0f6fc;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            overflow: hidden;
-        }
-        
-        #container {
-            position: relative;
-            width: 100vw;
-            height: 100vh;
-        }
-        
-        #canvas-container {
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-        }
-        
-        .hud {
-            position: absolute;
-            top: 20px;
-            left: 20px;
-            z-index: 1000;
-            background: rgba(13, 17, 23, 0.9);
-            padding: 25px;
-            border-radius: 12px;
-            backdrop-filter: blur(16px);
-            border: 1px solid rgba(48, 54, 61, 0.5);
-            min-width: 280px;
-            box-shadow: 0 16px 40px rgba(0, 0, 0, 0.4);
-        }
-        
-        .hud h3 {
-            color: #58a6ff;
-            margin-bottom: 20px;
-            font-size: 1.3em;
-            font-weight: 600;
-        }
-        
-        .metric {
-            display: flex;
-            justify-content: space-between;
-            margin: 12px 0;
-            padding: 10px 0;
-            border-bottom: 1px solid rgba(48, 54, 61, 0.3);
-        }
-        
-        .metric:last-child { border-bottom: none; }
-        
-        .metric-value {
-            color: #3fb950;
-            font-weight: 600;
-            font-family: 'Courier New', monospace;
-        }
-        
-        .ai-status {
-            position: absolute;
-            top: 20px;
-            right: 20px;
-            z-index: 1000;
-            background: rgba(13, 17, 23, 0.9);
-            padding: 20px;
-            border-radius: 12px;
-            backdrop-filter: blur(16px);
-            border: 1px solid rgba(48, 54, 61, 0.5);
-            text-align: center;
-            min-width: 200px;
-        }
-        
-        .ai-decision {
-            font-size: 1.5em;
-            font-weight: bold;
-            margin: 10px 0;
-            padding: 15px;
-            border-radius: 8px;
-            text-transform: uppercase;
-        }
-        
-        .ai-keep {
-            background: linear-gradient(135deg, #238636, #2ea043);
-            color: white;
-        }
-        
-        .ai-switch {
-            background: linear-gradient(135deg, #d1242f, #f85149);
-            color: white;
-            animation: pulse 1.5s infinite;
-        }
-        
-        @keyframes pulse {
-            0%, 100% { opacity: 1; }
-            50% { opacity: 0.7; }
-        }
-        
-        .controls {
-            position: absolute;
-            bottom: 20px;
-            left: 20px;
-            z-index: 1000;
-            background: rgba(13, 17, 23, 0.9);
-            padding: 20px;
-            border-radius: 12px;
-            backdrop-filter: blur(16px);
-            border: 1px solid rgba(48, 54, 61, 0.5);
-        }
-        
-        .control-btn {
-            background: linear-gradient(135deg, #58a6ff, #1f6feb);
-            border: none;
-            color: white;
-            padding: 10px 16px;
-            margin: 5px;
-            border-radius: 6px;
-            cursor: pointer;
-            font-size: 13px;
-            transition: all 0.3s ease;
-        }
-        
-        .control-btn:hover {
-            background: linear-gradient(135deg, #1f6feb, #0969da);
-            transform: translateY(-2px);
-        }
-        
-        .loading {
-            position: absolute;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            z-index: 2000;
-            text-align: center;
-        }
-        
-        .spinner {
-            border: 4px solid rgba(88, 166, 255, 0.1);
-            border-left: 4px solid #58a6ff;
-            border-radius: 50%;
-            width: 60px;
-            height: 60px;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 20px;
-        }
-        
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-    </style>
-</head>
-<body>
-    <div id="container">
-        <div id="canvas-container"></div>
-        
-        <div class="loading" id="loading">
-            <div class="spinner"></div>
-            <h3>Loading 3D Traffic System...</h3>
-            <p>Initializing AI and simulation components</p>
-        </div>
-        
-        <div class="hud">
-            <h3>🚦 System Status</h3>
-            <div class="metric">
-                <span>Active Vehicles:</span>
-                <span class="metric-value" id="vehicle-count">0</span>
-            </div>
-            <div class="metric">
-                <span>Total Queue:</span>
-                <span class="metric-value" id="queue-total">0</span>
-            </div>
-            <div class="metric">
-                <span>Average Speed:</span>
-                <span class="metric-value" id="avg-speed">0.0</span> km/h
-            </div>
-            <div class="metric">
-                <span>Runtime:</span>
-                <span class="metric-value" id="runtime">0</span>s
-            </div>
-            <div class="metric">
-                <span>Frame Count:</span>
-                <span class="metric-value" id="frame-count">0</span>
-            </div>
-            <div class="metric">
-                <span>Connection:</span>
-                <span class="metric-value" id="connection-status">Connecting...</span>
-            </div>
-        </div>
-        
-        <div class="ai-status">
-            <h4>🤖 AI Decision Engine</h4>
-            <div class="ai-decision ai-keep" id="ai-decision">KEEP</div>
-            <p>Real-time traffic optimization</p>
-        </div>
-        
-        <div class="controls">
-            <h4>🎮 3D Controls</h4>
-            <button class="control-btn" onclick="resetView()">Reset Camera</button>
-            <button class="control-btn" onclick="togglePause()">Pause/Play</button>
-            <button class="control-btn" onclick="toggleWireframe()">Wireframe</button>
-        </div>
-    </div>
-
-    <script>
-        // 3D Scene variables
-        let scene, camera, renderer;
-        let vehicles = {};
-        let isPaused = false;
-        let wireframeMode = false;
-        
-        function init3D() {
-            // Scene setup
-            scene = new THREE.Scene();
-            scene.fog = new THREE.Fog(0x0d1117, 30, 100);
-            
-            // Camera
-            camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
-            camera.position.set(25, 20, 25);
-            
-            // Renderer
-            renderer = new THREE.WebGLRenderer({ antialias: true });
-            renderer.setSize(window.innerWidth, window.innerHeight);
-            renderer.setClearColor(0x0d1117);
-            renderer.shadowMap.enabled = true;
-            renderer.shadowMap.type = THREE.PCFSoftShadowMap;
-            document.getElementById('canvas-container').appendChild(renderer.domElement);
-            
-            // Lighting
-            const ambientLight = new THREE.AmbientLight(0x404040, 0.6);
-            scene.add(ambientLight);
-            
-            const directionalLight = new THREE.DirectionalLight(0xffffff, 0.8);
-            directionalLight.position.set(30, 30, 20);
-            directionalLight.castShadow = true;
-            scene.add(directionalLight);
-            
-            // Create intersection
-            createIntersection();
-            
-            // Mouse controls
-            setupControls();
-            
-            // Start animation
-            animate();
-            
-            // Hide loading
-            document.getElementById('loading').style.display = 'none';
-        }
-        
-        function createIntersection() {
-            // Ground
-            const groundGeometry = new THREE.PlaneGeometry(80, 80);
-            const groundMaterial = new THREE.MeshLambertMaterial({ color: 0x2a2a2a });
-            const ground = new THREE.Mesh(groundGeometry, groundMaterial);
-            ground.rotation.x = -Math.PI / 2;
-            ground.receiveShadow = true;
-            scene.add(ground);
-            
-            // Roads
-            const roadMaterial = new THREE.MeshLambertMaterial({ color: 0x1a1a1a });
-            
-            // Main roads
-            const nsRoad = new THREE.Mesh(new THREE.PlaneGeometry(6, 50), roadMaterial);
-            nsRoad.rotation.x = -Math.PI / 2;
-            nsRoad.position.y = 0.01;
-            scene.add(nsRoad);
-            
-            const ewRoad = new THREE.Mesh(new THREE.PlaneGeometry(50, 6), roadMaterial);
-            ewRoad.rotation.x = -Math.PI / 2;
-            ewRoad.position.y = 0.01;
-            scene.add(ewRoad);
-            
-            // Traffic lights
-            createTrafficLights();
-        }
-        
-        function createTrafficLights() {
-            const positions = [[4, 4], [-4, 4], [-4, -4], [4, -4]];
-            
-            positions.forEach(pos => {
-                const group = new THREE.Group();
-                
-                // Pole
-                const pole = new THREE.Mesh(
-                    new THREE.CylinderGeometry(0.1, 0.1, 5),
-                    new THREE.MeshLambertMaterial({ color: 0x333333 })
-                );
-                pole.position.y = 2.5;
-                group.add(pole);
-                
-                // Light housing
-                const housing = new THREE.Mesh(
-                    new THREE.BoxGeometry(0.4, 1.2, 0.2),
-                    new THREE.MeshLambertMaterial({ color: 0x222222 })
-                );
-                housing.position.y = 5.5;
-                group.add(housing);
-                
-                group.position.set(pos[0], 0, pos[1]);
-                scene.add(group);
-            });
-        }
-        
-        function setupControls() {
-            let mouseDown = false;
-            let mouseX = 0, mouseY = 0;
-            let cameraAngleX = 0, cameraAngleY = 0;
-            let cameraDistance = 40;
-            
-            renderer.domElement.addEventListener('mousedown', (e) => {
-                mouseDown = true;
-                mouseX = e.clientX;
-                mouseY = e.clientY;
-            });
-            
-            renderer.domElement.addEventListener('mouseup', () => mouseDown = false);
-            
-            renderer.domElement.addEventListener('mousemove', (e) => {
-                if (mouseDown) {
-                    cameraAngleX += (e.clientX - mouseX) * 0.01;
-                    cameraAngleY += (e.clientY - mouseY) * 0.01;
-                    cameraAngleY = Math.max(-Math.PI/2, Math.min(Math.PI/2, cameraAngleY));
-                    updateCamera();
-                    mouseX = e.clientX;
-                    mouseY = e.clientY;
-                }
-            });
-            
-            renderer.domElement.addEventListener('wheel', (e) => {
-                cameraDistance += e.deltaY * 0.1;
-                cameraDistance = Math.max(10, Math.min(80, cameraDistance));
-                updateCamera();
-            });
-            
-            function updateCamera() {
-                camera.position.x = Math.cos(cameraAngleX) * Math.cos(cameraAngleY) * cameraDistance;
-                camera.position.y = Math.sin(cameraAngleY) * cameraDistance;
-                camera.position.z = Math.sin(cameraAngleX) * Math.cos(cameraAngleY) * cameraDistance;
-                camera.lookAt(0, 0, 0);
-            }
-        }
-        
-        function updateVehicles(vehicleData) {
-            // Remove old vehicles
-            Object.keys(vehicles).forEach(id => {
-                if (!vehicleData.find(v => v.id === id)) {
-                    scene.remove(vehicles[id]);
-                    delete vehicles[id];
-                }
-            });
-            
-            // Add/update vehicles
-            vehicleData.forEach(vehicle => {
-                if (!vehicles[vehicle.id]) {
-                    const geometry = new THREE.BoxGeometry(0.8, 0.4, 1.6);
-                    const material = new THREE.MeshLambertMaterial({
-                        color: new THREE.Color(vehicle.color[0], vehicle.color[1], vehicle.color[2])
-                    });
-                    vehicles[vehicle.id] = new THREE.Mesh(geometry, material);
-                    vehicles[vehicle.id].castShadow = true;
-                    scene.add(vehicles[vehicle.id]);
-                }
-                
-                // Update position and rotation
-                vehicles[vehicle.id].position.set(
-                    vehicle.position.x,
-                    vehicle.position.y,
-                    vehicle.position.z
-                );
-                vehicles[vehicle.id].rotation.y = vehicle.rotation.y * Math.PI / 180;
-            });
-        }
-        
-        function animate() {
-            requestAnimationFrame(animate);
-            if (!isPaused) {
-                renderer.render(scene, camera);
-            }
-        }
-        
-        // Control functions
-        function resetView() {
-            camera.position.set(25, 20, 25);
-            camera.lookAt(0, 0, 0);
-        }
-        
-        function togglePause() {
-            isPaused = !isPaused;
-        }
-        
-        function toggleWireframe() {
-            wireframeMode = !wireframeMode;
-            scene.traverse(child => {
-                if (child.material) {
-                    child.material.wireframe = wireframeMode;
-                }
-            });
-        }
-        
-        // Socket.IO
-        const socket = io();
-        
-        socket.on('connect', () => {
-            document.getElementById('connection-status').textContent = 'Connected';
-            document.getElementById('connection-status').style.color = '#3fb950';
-        });
-        
-        socket.on('3d_update', (data) => {
-            if (data.vehicles) {
-                updateVehicles(data.vehicles);
-            }
-            
-            // Update UI
-            document.getElementById('vehicle-count').textContent = data.vehicles ? data.vehicles.length : 0;
-            
-            const aiDecision = document.getElementById('ai-decision');
-            aiDecision.textContent = data.ai_decision || 'KEEP';
-            aiDecision.className = `ai-decision ${data.ai_decision === 'SWITCH' ? 'ai-switch' : 'ai-keep'}`;
-            
-            if (data.performance_metrics) {
-                document.getElementById('queue-total').textContent = data.performance_metrics.queue_total || 0;
-                document.getElementById('avg-speed').textContent = (data.performance_metrics.avg_speed || 0).toFixed(1);
-                document.getElementById('runtime').textContent = Math.round(data.performance_metrics.runtime || 0);
-                document.getElementById('frame-count').textContent = data.performance_metrics.frame_count || 0;
-            }
-        });
-        
-        // Window resize
-        window.addEventListener('resize', () => {
-            camera.aspect = window.innerWidth / window.innerHeight;
-            camera.updateProjectionMatrix();
-            renderer.setSize(window.innerWidth, window.innerHeight);
-        });
-        
-        // Initialize
-        init3D();
-    </script>
-</body>
-</html>
-"""
+        self.socketio.run(self.app, host='0.0.0.0', port=5004, debug=False, **server_options(ASYNC_MODE))
 
 def main():
-    system = Integrated3DTrafficSystem()
+    system = Integrated3DTrafficSystem(use_workers='--workers' in sys.argv)
     system.start_system()
 
 if __name__ == '__main__':
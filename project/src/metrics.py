@@ -0,0 +1,287 @@
+"""
+📏 Shared metrics registry
+=========================
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus text
+exposition format. The API server, run_live.py and the 3D servers all import
+this module, so every process exports the same metric names.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from sub-millisecond cache hits up to a stalled network call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Vehicles waiting, or requests waiting in a queue
+DEPTH_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _format(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metric:
+    """
+    One metric family: a name, help text and a value per label combination.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) == len(self.label_names):
+            try:
+                return tuple([str(labels[name]) for name in self.label_names])
+            except KeyError:
+                pass
+        raise ValueError(f"{self.name} takes labels ({', '.join(self.label_names)}), got ({', '.join(labels)})")
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.label_names, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def remove(self, **labels):
+        """
+        Drops one label combination, e.g. an intersection that went away.
+        """
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + self._labels(key), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(f'{series} {_format(value)}' for series, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count; by convention the name ends in _total.
+    """
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down, set directly or read from a callback at scrape time.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """
+        Reads the (unlabelled) value from `function()` on every scrape.
+        """
+        self._function = function
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                return [(self.name, float(self._function()))]
+            except Exception:
+                return []
+        return super().samples()
+
+
+class Histogram(Metric):
+    """
+    Observations counted into fixed, cumulative `le` buckets plus their sum and count.
+
+    Buckets are fixed at creation, so an observation is one binary search and
+    one increment, and scrapes from different processes can be aggregated.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the wall time of a `with` block, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket{self._labels(key, [('le', _format(bound))])}", cumulative))
+            samples.append((f"{self.name}_sum{self._labels(key)}", total))
+            samples.append((f"{self.name}_count{self._labels(key)}", cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Name -> metric. Asking for an existing name returns the same metric, so
+    modules can declare what they record without coordinating.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labels, **kwargs)
+            elif type(metric) is not cls or metric.label_names != tuple(labels):
+                raise ValueError(f"{name} is already registered as a {metric.kind} with labels {metric.label_names}")
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._get(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        return self._get(Gauge, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, documentation, labels, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def metrics_response(registry=REGISTRY):
+    """
+    (body, status, headers) for a Flask `/metrics` route.
+    """
+    return registry.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+def serve_metrics(port, host='0.0.0.0', registry=REGISTRY):
+    """
+    Serves `/metrics` from a daemon thread, for processes without a web server of their own.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # One line per scrape would drown the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# --- Metrics every process records the same way ---
+PROCESS_START_TIME = gauge('process_start_time_seconds', 'Start time of the process since the unix epoch')
+PROCESS_START_TIME.set(time.time())
+
+MODEL_PREDICT_SECONDS = histogram('traffic_model_predict_seconds', 'Time to get one signal decision from the policy')
+SOCKET_EMIT_SECONDS = histogram('traffic_socket_emit_seconds', 'Time spent in one socket.io emit', ['event'])
+QUEUE_VEHICLES = histogram('traffic_queue_vehicles', 'Total vehicles queued at an intersection per observation',
+                           buckets=DEPTH_BUCKETS)
+
+INTERSECTION_ZONE_QUEUE = gauge('traffic_intersection_zone_queue_vehicles', 'Vehicles queued in one zone',
+                                ['intersection', 'zone'])
+INTERSECTION_QUEUE = gauge('traffic_intersection_queue_vehicles', 'Vehicles queued over all zones', ['intersection'])
+INTERSECTION_SWITCH = gauge('traffic_intersection_switch', '1 when the latest decision was SWITCH, else 0',
+                            ['intersection'])
+INTERSECTION_LAST_UPDATE = gauge('traffic_intersection_last_update_timestamp_seconds',
+                                 'Unix time of the latest observation', ['intersection'])
+INTERSECTION_OBSERVATIONS = counter('traffic_intersection_observations_total',
+                                    'Queue observations received for an intersection', ['intersection'])
+
+
+def observe_intersection(intersection_id, queues, action):
+    """
+    Records one observation of an intersection's queues and its current decision.
+    """
+    queues = list(queues)
+    total = sum(queues)
+    for zone, vehicles in enumerate(queues):
+        INTERSECTION_ZONE_QUEUE.set(vehicles, intersection=intersection_id, zone=zone)
+    INTERSECTION_QUEUE.set(total, intersection=intersection_id)
+    INTERSECTION_SWITCH.set(int(action in ('SWITCH', 1)), intersection=intersection_id)
+    INTERSECTION_LAST_UPDATE.set(time.time(), intersection=intersection_id)
+    INTERSECTION_OBSERVATIONS.inc(intersection=intersection_id)
+    QUEUE_VEHICLES.observe(total)
@@ -0,0 +1,207 @@
+"""
+📦 Precompressed static assets for the dashboards
+===============================================
+Loads the dashboard pages and vendored JS libraries once at startup,
+compresses each with gzip and brotli, and serves the best encoding the
+browser accepts with ETag revalidation and long-lived caching.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+import sys
+from pathlib import Path
+
+from flask import Response, redirect, request
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Vendored file (under static/) -> upstream copy, fetched by `python static_assets.py --vendor`.
+# While one is missing its page still works online: the request is redirected to the CDN.
+VENDOR = {
+    'vendor/socket.io-4.0.1.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.min.js',
+    'vendor/chart-4.4.1.umd.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js',
+    'vendor/three-r128.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js',
+    'vendor/dat.gui-0.7.9.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/dat-gui/0.7.9/dat.gui.min.js',
+    'vendor/fonts/orbitron-rajdhani.css': 'https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900'
+                                          '&family=Rajdhani:wght@300;400;600;700&display=swap',
+}
+
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# Pages are revalidated on every load (a 304 when unchanged); vendored files carry their version in the name
+PAGE_CACHE_CONTROL = 'no-cache'
+VENDOR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ASSET_CACHE_CONTROL = 'public, max-age=3600'
+
+
+class StaticAsset:
+    """
+    One file with its identity, gzip and (when available) brotli bodies and an ETag per encoding.
+    """
+
+    def __init__(self, name, content):
+        self.name = name
+        self.content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type == 'application/javascript':
+            self.content_type += '; charset=utf-8'
+        if name.endswith('.html'):
+            self.cache_control = PAGE_CACHE_CONTROL
+        elif name.startswith('vendor/'):
+            self.cache_control = VENDOR_CACHE_CONTROL
+        else:
+            self.cache_control = ASSET_CACHE_CONTROL
+
+        self.bodies = {'identity': content}
+        if self.content_type.startswith(COMPRESSIBLE):
+            compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(content, quality=11)
+            # Tiny files can grow when compressed
+            self.bodies.update({encoding: body for encoding, body in compressed.items() if len(body) < len(content)})
+
+        digest = hashlib.sha256(content).hexdigest()[:20]
+        self.etags = {encoding: f'"{digest}-{encoding}"' for encoding in self.bodies}
+
+    def pick_encoding(self, accept_encoding):
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return 'identity'
+
+
+def _accepted_encodings(header):
+    """
+    Codings of an Accept-Encoding header, leaving out any with q=0.
+    """
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        match = re.search(r'q=([0-9.]+)', params)
+        if coding and not (match and float(match.group(1)) == 0):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """
+    Everything under `directory`, held in memory in every encoding.
+
+    Files are read and compressed once, in the constructor, so a page hit is
+    a dict lookup plus a header check: `If-None-Match` answers 304 without a
+    body, otherwise the precompressed body for the browser's best encoding
+    (br, then gzip) is sent with `Vary: Accept-Encoding`.
+    """
+
+    def __init__(self, directory=STATIC_DIR, vendor=VENDOR):
+        self.directory = Path(directory)
+        self.vendor = vendor
+        self.assets = {}
+        for path in sorted(self.directory.rglob('*')):
+            if path.is_file():
+                name = path.relative_to(self.directory).as_posix()
+                self.assets[name] = StaticAsset(name, path.read_bytes())
+
+        # Missing libraries are served from their CDNs, so the dashboards only work offline once vendored
+        self.missing = [name for name in vendor if name not in self.assets]
+        if self.missing:
+            print(f"⚠️  {len(self.missing)} vendored libraries missing from {self.directory}, the dashboards load "
+                  f"them from their CDNs; run `python {Path(__file__).name} --vendor` to work offline")
+
+        # Counters
+        self.responses = {'identity': 0, 'gzip': 0, 'br': 0, 'not_modified': 0, 'redirected': 0}
+
+    def response(self, name):
+        """
+        Flask response for one asset, honouring If-None-Match and Accept-Encoding.
+        """
+        asset = self.assets.get(name)
+        if asset is None:
+            if name in self.vendor:
+                self.responses['redirected'] += 1
+                return redirect(self.vendor[name])
+            return Response('Not found', status=404, mimetype='text/plain')
+
+        encoding = asset.pick_encoding(request.headers.get('Accept-Encoding'))
+        if_none_match = request.headers.get('If-None-Match', '')
+        if any(etag in if_none_match for etag in asset.etags.values()) or if_none_match.strip() == '*':
+            self.responses['not_modified'] += 1
+            response = Response(status=304)
+        else:
+            self.responses[encoding] += 1
+            response = Response(asset.bodies[encoding], content_type=asset.content_type)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = asset.etags[encoding]
+        response.headers['Cache-Control'] = asset.cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    def register(self, app):
+        """
+        Serves every asset at /static/<name>.
+
+        Create the app with `static_folder=None` so Flask does not claim the route.
+        """
+        app.add_url_rule('/static/<path:name>', 'static_asset', self.response)
+        return self
+
+    def get_stats(self):
+        return {'assets': len(self.assets), 'missing_vendor': self.missing, 'brotli': brotli is not None,
+                'bytes': {name: {encoding: len(body) for encoding, body in asset.bodies.items()}
+                          for name, asset in self.assets.items() if name.endswith(('.html', '.js', '.css'))},
+                'responses': dict(self.responses)}
+
+
+def fetch_vendor(directory=STATIC_DIR, vendor=VENDOR):
+    """
+    Downloads every vendored library (and the font files its CSS points at) into `directory`.
+    """
+    import requests
+
+    # Google Fonts returns woff2 only to browsers it recognises
+    headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                             'Chrome/120.0 Safari/537.36'}
+    for name, url in vendor.items():
+        target = Path(directory) / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        response = requests.get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+        content = response.content
+
+        if name.endswith('.css'):
+            # Fetch the fonts too and point the CSS at the local copies
+            css = content.decode()
+            for font_url in sorted(set(re.findall(r'url\((https://[^)]+)\)', css))):
+                font_name = font_url.rstrip('/').split('/')[-1]
+                font = requests.get(font_url, headers=headers, timeout=30)
+                font.raise_for_status()
+                (target.parent / font_name).write_bytes(font.content)
+                css = css.replace(font_url, font_name)
+            content = css.encode()
+
+        target.write_bytes(content)
+        print(f"📥 {name} ({len(content) / 1024:.0f} KB)")
+
+
+def main():
+    """
+    python static_assets.py [--vendor]
+    Fetches the vendored libraries (--vendor), then reports the compressed sizes.
+    """
+    if '--vendor' in sys.argv:
+        fetch_vendor()
+    assets = StaticAssets()
+    for name, asset in assets.assets.items():
+        sizes = ', '.join(f"{encoding} {len(body) / 1024:.1f} KB" for encoding, body in asset.bodies.items())
+        print(f"📦 {name}: {sizes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,14 +5,16 @@
 Enhanced 3D visualization system for SUMO traffic simulation
 """
 
+from async_mode import server_options, setup_async_mode
+ASYNC_MODE = setup_async_mode()  # Monkey-patches eventlet/gevent before flask opens sockets or threads start
+
 import cv2
 import numpy as np
 import gymnasium as gym
-from stable_baselines3 import PPO
 import sumo_rl
 import threading
 import time
-from flask import Flask, jsonify, render_template_string
+from flask import Flask, jsonify
 from flask_socketio import SocketIO, emit
 import traci
 import json
@@ -23,7 +25,12 @@ from pathlib import Path
 
 # Add vision processor
 sys.path.append(str(Path(__file__).parent / 'vision'))
+sys.path.append(str(Path(__file__).parent / 'ai_core'))
+from policy_cache import load_cached_policy
+from static_assets import StaticAssets
+from metrics import MODEL_PREDICT_SECONDS, SOCKET_EMIT_SECONDS, metrics_response, observe_intersection
 from processor import VisionProcessor
+from sources import open_source
 
 # --- CONFIGURATION ---
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -62,19 +69,21 @@ simulation_3d_data = {
 
 class Unity3DTrafficSystem:
     def __init__(self):
-        self.app = Flask(__name__)
+        self.app = Flask(__name__, static_folder=None)
         self.app.config['SECRET_KEY'] = 'unity_3d_traffic_2024'
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        self.static_assets = StaticAssets().register(self.app)
+        self.socketio = SocketIO(self.app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
         self.setup_routes()
         self.setup_socketio()
         
         # Initialize AI and vision systems
-        self.model = PPO.load(MODEL_PATH)
+        self.model = load_cached_policy(MODEL_PATH)
         self.processor = VisionProcessor()
         
         # Video capture
-        self.cap1 = cv2.VideoCapture(VIDEO_PATH_1)
-        self.cap2 = cv2.VideoCapture(VIDEO_PATH_2)
+        # Looping file sources; swap in rtsp:// or http:// URIs for real cameras
+        self.cap1 = open_source(VIDEO_PATH_1, loop=True)
+        self.cap2 = open_source(VIDEO_PATH_2, loop=True)
         
         # SUMO environment
         self.env = gym.make('sumo-rl-v0', 
@@ -88,11 +97,12 @@ class Unity3DTrafficSystem:
         self.obs, self.info = self.env.reset()
         self.frame_count = 0
         self.last_action = 0
+        self.detected_vehicles = 0
         
     def setup_routes(self):
         @self.app.route('/')
         def unity_dashboard():
-            return render_template_string(UNITY_3D_DASHBOARD_HTML)
+            return self.static_assets.response('unity_3d.html')
         
         @self.app.route('/api/3d_data')
         def get_3d_data():
@@ -107,6 +117,10 @@ class Unity3DTrafficSystem:
                 "last_update": simulation_3d_data["timestamp"],
                 "ai_decision": simulation_3d_data["ai_decision"]
             })
+        
+        @self.app.route('/metrics')
+        def metrics():
+            return metrics_response()
     
     def setup_socketio(self):
         @self.socketio.on('connect')
@@ -231,9 +245,7 @@ class Unity3DTrafficSystem:
         ret2, frame2 = self.cap2.read()
         
         if not ret1 or not ret2:
-            # Reset videos if they end
-            self.cap1.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            self.cap2.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # Sources loop and reconnect by themselves; just report empty queues meanwhile
             return [0, 0, 0, 0]
         
         # Process frames for queue detection
@@ -242,8 +254,9 @@ class Unity3DTrafficSystem:
         polygons_2d_2 = [np.array([[100, 50], [400, 50], [400, 250], [100, 250]], np.int32),
                          np.array([[100, 300], [400, 300], [400, 470], [100, 470]], np.int32)]
         
-        queue_counts1, _ = self.processor.process_frame(frame1, polygons_2d_1)
-        queue_counts2, _ = self.processor.process_frame(frame2, polygons_2d_2)
+        (queue_counts1, detections1), (queue_counts2, detections2) = self.processor.process_frames(
+            [frame1, frame2], [polygons_2d_1, polygons_2d_2])
+        self.detected_vehicles = len(detections1) + len(detections2)
         
         return queue_counts1 + queue_counts2
     
@@ -264,7 +277,8 @@ class Unity3DTrafficSystem:
                 num_lanes = len(queue_state)
                 current_phase = self.obs[num_lanes:]
                 state_for_model = np.concatenate([queue_state, current_phase]).astype(np.float32)
-                self.last_action, _ = self.model.predict(state_for_model, deterministic=True)
+                with MODEL_PREDICT_SECONDS.time():
+                    self.last_action, _ = self.model.predict(state_for_model, deterministic=True)
             
             # Step SUMO simulation
             self.obs, reward, terminated, truncated, info = self.env.step(self.last_action)
@@ -289,12 +303,16 @@ class Unity3DTrafficSystem:
                     "total_vehicles": len(vehicles_3d),
                     "avg_speed": np.mean([v["speed"] for v in vehicles_3d]) if vehicles_3d else 0,
                     "queue_total": sum(queue_state),
+                    "detected_vehicles": self.detected_vehicles,
                     "throughput": len(vehicles_3d) * 3.6  # Rough throughput calculation
                 }
             }
             
+            observe_intersection('default', queue_state, simulation_3d_data["ai_decision"])
+            
             # Broadcast to Unity clients
-            self.socketio.emit('3d_data_update', simulation_3d_data)
+            with SOCKET_EMIT_SECONDS.time(event='3d_data_update'):
+                self.socketio.emit('3d_data_update', simulation_3d_data)
             
             if terminated or truncated:
                 self.obs, self.info = self.env.reset()
@@ -312,197 +330,7 @@ class Unity3DTrafficSystem:
         print("🌐 Unity Dashboard: http://localhost:5002")
         print("📡 3D Data API: http://localhost:5002/api/3d_data")
         
-        self.socketio.run(self.app, host='0.0.0.0', port=5002, debug=False)
-
-# Unity 3D Dashboard HTML
-UNITY_3D_DASHBOARD_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🎮 Unity 3D Traffic Visualization</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
-    <style>
-        body {
-            margin: 0;
-            padding: 0;
-            background: linear-gradient(135deg, #1a1a2e, #16213e);
-            color: white;
-            font-family: 'Arial', sans-serif;
-            overflow: hidden;
-        }
-        
-        #unity-container {
-            position: relative;
-            width: 100vw;
-            height: 100vh;
-        }
-        
-        #three-canvas {
-            position: absolute;
-            top: 0;
-            left: 0;
-            z-index: 1;
-        }
-        
-        .overlay {
-            position: absolute;
-            top: 20px;
-            left: 20px;
-            z-index: 10;
-            background: rgba(0, 0, 0, 0.8);
-            padding: 20px;
-            border-radius: 10px;
-            backdrop-filter: blur(10px);
-        }
-        
-        .metric {
-            margin: 10px 0;
-            font-size: 14px;
-        }
-        
-        .metric-value {
-            color: #00ff41;
-            font-weight: bold;
-        }
-        
-        .unity-instructions {
-            position: absolute;
-            bottom: 20px;
-            right: 20px;
-            z-index: 10;
-            background: rgba(0, 0, 0, 0.8);
-            padding: 15px;
-            border-radius: 10px;
-            max-width: 300px;
-        }
-    </style>
-</head>
-<body>
-    <div id="unity-container">
-        <canvas id="three-canvas"></canvas>
-        
-        <div class="overlay">
-            <h3>🎮 3D Traffic Simulation</h3>
-            <div class="metric">Vehicles: <span class="metric-value" id="vehicle-count">0</span></div>
-            <div class="metric">AI Decision: <span class="metric-value" id="ai-decision">KEEP</span></div>
-            <div class="metric">Queue Total: <span class="metric-value" id="queue-total">0</span></div>
-            <div class="metric">Avg Speed: <span class="metric-value" id="avg-speed">0</span> km/h</div>
-            <div class="metric">Status: <span class="metric-value" id="connection-status">Connecting...</span></div>
-        </div>
-        
-        <div class="unity-instructions">
-            <h4>🎯 Unity Integration</h4>
-            <p><strong>API Endpoint:</strong><br>
-            <code>http://localhost:5002/api/3d_data</code></p>
-            <p><strong>WebSocket:</strong><br>
-            <code>ws://localhost:5002</code></p>
-            <p>Connect your Unity project to this endpoint to receive real-time 3D traffic data.</p>
-        </div>
-    </div>
-
-    <script>
-        // Three.js 3D Visualization
-        let scene, camera, renderer;
-        let vehicles = {};
-        
-        function initThreeJS() {
-            scene = new THREE.Scene();
-            camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
-            renderer = new THREE.WebGLRenderer({ canvas: document.getElementById('three-canvas'), alpha: true });
-            renderer.setSize(window.innerWidth, window.innerHeight);
-            renderer.setClearColor(0x000000, 0);
-            
-            // Add lights
-            const ambientLight = new THREE.AmbientLight(0x404040, 0.6);
-            scene.add(ambientLight);
-            
-            const directionalLight = new THREE.DirectionalLight(0xffffff, 0.8);
-            directionalLight.position.set(10, 10, 5);
-            scene.add(directionalLight);
-            
-            // Add ground plane
-            const groundGeometry = new THREE.PlaneGeometry(50, 50);
-            const groundMaterial = new THREE.MeshLambertMaterial({ color: 0x333333 });
-            const ground = new THREE.Mesh(groundGeometry, groundMaterial);
-            ground.rotation.x = -Math.PI / 2;
-            scene.add(ground);
-            
-            // Position camera
-            camera.position.set(0, 15, 20);
-            camera.lookAt(0, 0, 0);
-            
-            animate();
-        }
-        
-        function animate() {
-            requestAnimationFrame(animate);
-            renderer.render(scene, camera);
-        }
-        
-        function updateVehicles(vehicleData) {
-            // Remove old vehicles
-            Object.keys(vehicles).forEach(id => {
-                if (!vehicleData.find(v => v.id === id)) {
-                    scene.remove(vehicles[id]);
-                    delete vehicles[id];
-                }
-            });
-            
-            // Add/update vehicles
-            vehicleData.forEach(vehicle => {
-                if (!vehicles[vehicle.id]) {
-                    // Create new vehicle
-                    const geometry = new THREE.BoxGeometry(0.5, 0.3, 1);
-                    const material = new THREE.MeshLambertMaterial({ 
-                        color: new THREE.Color(vehicle.color[0], vehicle.color[1], vehicle.color[2])
-                    });
-                    vehicles[vehicle.id] = new THREE.Mesh(geometry, material);
-                    scene.add(vehicles[vehicle.id]);
-                }
-                
-                // Update position
-                vehicles[vehicle.id].position.set(
-                    vehicle.position.x,
-                    vehicle.position.y,
-                    vehicle.position.z
-                );
-                vehicles[vehicle.id].rotation.y = vehicle.rotation.y * Math.PI / 180;
-            });
-        }
-        
-        // Socket.IO connection
-        const socket = io();
-        
-        socket.on('connect', function() {
-            document.getElementById('connection-status').textContent = 'Connected';
-        });
-        
-        socket.on('3d_data_update', function(data) {
-            updateVehicles(data.vehicles);
-            
-            // Update UI
-            document.getElementById('vehicle-count').textContent = data.vehicles.length;
-            document.getElementById('ai-decision').textContent = data.ai_decision;
-            document.getElementById('queue-total').textContent = data.performance_metrics.queue_total;
-            document.getElementById('avg-speed').textContent = data.performance_metrics.avg_speed.toFixed(1);
-        });
-        
-        // Initialize
-        initThreeJS();
-        
-        // Handle window resize
-        window.addEventListener('resize', function() {
-            camera.aspect = window.innerWidth / window.innerHeight;
-            camera.updateProjectionMatrix();
-            renderer.setSize(window.innerWidth, window.innerHeight);
-        });
-    </script>
-</body>
-</html>
-"""
+        self.socketio.run(self.app, host='0.0.0.0', port=5002, debug=False, **server_options(ASYNC_MODE))
 
 def main():
     unity_system = Unity3DTrafficSystem()
@@ -0,0 +1,71 @@
+# Save this file as: project/src/vision/adaptive.py
+
+import time
+from collections import deque
+
+
+class ResolutionController:
+    """
+    Feedback loop that keeps detector latency inside a per-frame budget.
+
+    Operating points form a ladder from best to cheapest: every image size of
+    the main model, then every image size of the light model. A smoothed
+    latency above the budget steps one rung down; a latency comfortably below
+    it (under `headroom` x budget) steps back up. After each change the
+    controller waits `cooldown` frames so the average can settle.
+    """
+
+    def __init__(self, latency_budget_ms, sizes=(640, 512, 416, 320), models=('yolov8m.pt', 'yolov8n.pt'),
+                 smoothing=0.3, headroom=0.6, cooldown=10, log_size=1000):
+        self.latency_budget_ms = latency_budget_ms
+        self.levels = [(model, size) for model in models for size in sorted(sizes, reverse=True)]
+        self.smoothing = smoothing
+        self.headroom = headroom
+        self.cooldown = cooldown
+
+        self.level = 0
+        self.smoothed_ms = None
+        self._frames_since_change = 0
+        self.log = deque(maxlen=log_size)
+
+    @property
+    def model_name(self):
+        return self.levels[self.level][0]
+
+    @property
+    def imgsz(self):
+        return self.levels[self.level][1]
+
+    def record(self, latency_ms, frames=1):
+        """
+        Logs the latency achieved at the current operating point and adapts.
+
+        `latency_ms` is the time of one detector call covering `frames` camera
+        frames (a batch); the budget is per frame, so it is compared per frame.
+        """
+        latency_ms /= max(frames, 1)
+        self.log.append({'timestamp': time.time(), 'model': self.model_name, 'imgsz': self.imgsz,
+                         'latency_ms': round(latency_ms, 2), 'frames': frames})
+
+        if self.smoothed_ms is None:
+            self.smoothed_ms = latency_ms
+        else:
+            self.smoothed_ms += self.smoothing * (latency_ms - self.smoothed_ms)
+
+        self._frames_since_change += 1
+        if self._frames_since_change < self.cooldown:
+            return
+
+        if self.smoothed_ms > self.latency_budget_ms and self.level < len(self.levels) - 1:
+            self._change_level(self.level + 1)
+        elif self.smoothed_ms < self.headroom * self.latency_budget_ms and self.level > 0:
+            self._change_level(self.level - 1)
+
+    def _change_level(self, level):
+        old_model, old_size = self.levels[self.level]
+        self.level = level
+        self._frames_since_change = 0
+        print(f"⚙️  Inference {old_model}@{old_size} → {self.model_name}@{self.imgsz} "
+              f"(latency {self.smoothed_ms:.0f} ms, budget {self.latency_budget_ms:.0f} ms)")
+        # Start the new operating point from a fresh average
+        self.smoothed_ms = None
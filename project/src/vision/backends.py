@@ -0,0 +1,319 @@
+# Save this file as: project/src/vision/backends.py
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from detections import Detections, non_max_suppression
+from tracker import box_iou, greedy_match
+
+REPO_ROOT = Path(__file__).parent.parent.parent.parent
+CONFIG_PATH = REPO_ROOT / "config.json"
+CALIBRATION_DIR = REPO_ROOT / "project" / "datasets" / "emergency_vehicles" / "train" / "images"
+
+# Used when config.json has no detection_settings.backend section
+DEFAULT_BACKEND_SETTINGS = {
+    'backend': 'ultralytics',
+    'onnx': {'int8': False, 'threads': 4, 'providers': ['CPUExecutionProvider'], 'calibration_images': 100},
+}
+
+
+def load_backend_settings(config_path=CONFIG_PATH):
+    """
+    Reads the detector backend settings from config.json, falling back to defaults.
+    """
+    settings = {'backend': DEFAULT_BACKEND_SETTINGS['backend'], 'onnx': dict(DEFAULT_BACKEND_SETTINGS['onnx'])}
+    try:
+        with open(config_path) as f:
+            detection = json.load(f).get('detection_settings', {})
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read {config_path} ({e}), using the default detector backend")
+        return settings
+    settings['backend'] = detection.get('backend', settings['backend'])
+    settings['onnx'].update(detection.get('onnx', {}))
+    return settings
+
+
+def letterbox(image, size, color=(114, 114, 114)):
+    """
+    Resizes keeping the aspect ratio and pads to a size x size square, like ultralytics.
+
+    Returns the padded image plus the scale and (pad_x, pad_y) needed to map boxes back.
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    if (new_w, new_h) != (width, height):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    padded = cv2.copyMakeBorder(image, pad_y, size - new_h - pad_y, pad_x, size - new_w - pad_x,
+                                cv2.BORDER_CONSTANT, value=color)
+    return padded, scale, (pad_x, pad_y)
+
+
+def preprocess(images, size):
+    """
+    BGR frames -> one float32 NCHW RGB batch in [0, 1], plus the letterbox parameters.
+    """
+    batch = np.empty((len(images), 3, size, size), dtype=np.float32)
+    transforms = []
+    for i, image in enumerate(images):
+        padded, scale, pad = letterbox(image, size)
+        batch[i] = padded[:, :, ::-1].transpose(2, 0, 1) / 255.0
+        transforms.append((scale, pad, image.shape[:2]))
+    return batch, transforms
+
+
+class UltralyticsBackend:
+    """
+    The PyTorch YOLO model, as VisionProcessor always used it.
+    """
+
+    name = 'ultralytics'
+
+    def __init__(self, weights):
+        from ultralytics import YOLO
+        self.weights = weights
+        self.model = YOLO(weights)
+
+    def detect(self, images, imgsz=None, conf=None):
+        """
+        Runs one batched forward pass and returns one Detections per image.
+
+        `conf` overrides ultralytics' 0.25 confidence cut-off, e.g. to keep the
+        weak detections the tracker's second association needs.
+        """
+        kwargs = {'imgsz': imgsz} if imgsz else {}
+        if conf is not None:
+            kwargs['conf'] = conf
+        return [Detections.from_yolo(result) for result in self.model(images, verbose=False, **kwargs)]
+
+
+class OnnxRuntimeBackend:
+    """
+    YOLOv8 exported to ONNX and run on ONNX Runtime, for CPU-only boxes.
+
+    The session uses a fixed intra-op thread pool so several camera workers
+    on one machine do not oversubscribe the cores. Pre-processing (letterbox)
+    and post-processing (confidence filter, class-aware NMS) match ultralytics'
+    defaults, so the outputs are interchangeable with UltralyticsBackend.
+    Other execution providers, e.g. 'OpenVINOExecutionProvider' from
+    onnxruntime-openvino, can be selected through `providers`.
+    """
+
+    name = 'onnxruntime'
+
+    def __init__(self, onnx_path, imgsz=640, conf_threshold=0.25, iou_threshold=0.7, max_detections=300,
+                 threads=4, providers=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.onnx_path = str(onnx_path)
+        self.session = ort.InferenceSession(self.onnx_path, sess_options=options,
+                                            providers=providers or ['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+
+    def detect(self, images, imgsz=None, conf=None):
+        """
+        Runs one batched forward pass and returns one Detections per image.
+
+        `conf` overrides `conf_threshold` for this call, as in UltralyticsBackend.
+        """
+        size = imgsz or self.imgsz
+        conf = self.conf_threshold if conf is None else conf
+        batch, transforms = preprocess(images, size)
+        output = self.session.run(None, {self.input_name: batch})[0]  # (B, 4 + classes, anchors)
+        return [self._decode(prediction, transform, conf) for prediction, transform in zip(output, transforms)]
+
+    def _decode(self, prediction, transform, conf):
+        prediction = prediction.T  # (anchors, 4 + classes)
+        class_scores = prediction[:, 4:]
+        class_id = class_scores.argmax(axis=1)
+        confidence = class_scores[np.arange(len(class_id)), class_id]
+        keep = confidence > conf
+        if not keep.any():
+            return Detections.empty()
+        xywh, class_id, confidence = prediction[keep, :4], class_id[keep], confidence[keep]
+
+        boxes = np.empty_like(xywh)
+        boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+        # Class-aware NMS: offsetting each class keeps boxes of different classes apart
+        offsets = class_id[:, None] * 7680.0
+        keep = non_max_suppression(boxes + offsets, confidence, self.iou_threshold)[:self.max_detections]
+        boxes, class_id, confidence = boxes[keep], class_id[keep], confidence[keep]
+
+        # Undo the letterbox
+        scale, (pad_x, pad_y), (height, width) = transform
+        boxes = (boxes - np.array([pad_x, pad_y, pad_x, pad_y])) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        return Detections(boxes, class_id, confidence)
+
+
+def export_onnx(weights, imgsz=640):
+    """
+    Exports YOLO weights to ONNX once; later calls reuse the file next to the weights.
+
+    Batch and image size stay dynamic so batched cameras, ROI crops and the
+    adaptive resolution controller keep working.
+    """
+    onnx_path = Path(weights).with_suffix('.onnx')
+    if not onnx_path.exists():
+        from ultralytics import YOLO
+        print(f"📦 Exporting {weights} to ONNX...")
+        onnx_path = Path(YOLO(weights).export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True))
+    return onnx_path
+
+
+class CalibrationReader:
+    """
+    Feeds letterboxed dataset images to the ONNX Runtime static quantizer.
+    """
+
+    def __init__(self, input_name, image_dir=CALIBRATION_DIR, num_images=100, imgsz=640):
+        paths = sorted(Path(image_dir).glob('*.jpg'))
+        step = max(1, len(paths) // num_images)
+        self.paths = paths[::step][:num_images]  # Spread over the whole dataset
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iterator = iter(self.paths)
+
+    def get_next(self):
+        for path in self._iterator:
+            image = cv2.imread(str(path))
+            if image is not None:
+                return {self.input_name: preprocess([image], self.imgsz)[0]}
+        return None
+
+    def rewind(self):
+        self._iterator = iter(self.paths)
+
+
+def quantize_onnx(onnx_path, image_dir=CALIBRATION_DIR, num_images=100, imgsz=640):
+    """
+    Static int8 quantization (QDQ, per-channel weights) calibrated on our own dataset frames.
+    """
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    onnx_path = Path(onnx_path)
+    int8_path = onnx_path.with_name(f"{onnx_path.stem}_int8.onnx")
+    if int8_path.exists():
+        return int8_path
+
+    print(f"🔢 Quantizing {onnx_path.name} to int8 with {num_images} calibration images...")
+    prepared_path = onnx_path.with_name(f"{onnx_path.stem}_prepared.onnx")
+    quant_pre_process(str(onnx_path), str(prepared_path))
+
+    import onnx
+    input_name = onnx.load(str(prepared_path)).graph.input[0].name
+    quantize_static(str(prepared_path), str(int8_path),
+                    CalibrationReader(input_name, image_dir, num_images, imgsz),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    os.remove(prepared_path)
+    return int8_path
+
+
+def create_backend(weights, backend=None, settings=None):
+    """
+    Builds the detector backend for `weights`.
+
+    Args:
+        weights: YOLO .pt weights; exported (and quantized) on first use for ONNX.
+        backend: 'ultralytics' or 'onnxruntime'. Defaults to config.json.
+        settings: Backend settings as returned by load_backend_settings().
+    """
+    settings = settings or load_backend_settings()
+    backend = backend or settings['backend']
+
+    if backend == 'ultralytics':
+        return UltralyticsBackend(weights)
+    if backend == 'onnxruntime':
+        onnx_settings = settings['onnx']
+        onnx_path = export_onnx(weights)
+        if onnx_settings.get('int8'):
+            onnx_path = quantize_onnx(onnx_path, num_images=onnx_settings.get('calibration_images', 100))
+        print(f"🧮 Detector {onnx_path.name} on ONNX Runtime ({onnx_settings.get('threads')} threads)")
+        return OnnxRuntimeBackend(onnx_path, threads=onnx_settings.get('threads', 4),
+                                  providers=onnx_settings.get('providers'))
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+
+def parity_check(reference, candidate, images, imgsz=640, match_iou=0.5):
+    """
+    Compares two backends on the same images.
+
+    Detections are matched one-to-one by IoU within the same class. Recall is
+    the share of reference detections the candidate reproduces, precision the
+    share of candidate detections that match a reference one.
+    """
+    report = {'images': len(images), 'reference': 0, 'candidate': 0, 'matched': 0,
+              'ious': [], 'reference_ms': 0.0, 'candidate_ms': 0.0}
+    for image in images:
+        start = time.perf_counter()
+        expected = reference.detect([image], imgsz)[0]
+        report['reference_ms'] += (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        actual = candidate.detect([image], imgsz)[0]
+        report['candidate_ms'] += (time.perf_counter() - start) * 1000
+
+        iou = box_iou(expected.boxes, actual.boxes)
+        iou[expected.class_id[:, None] != actual.class_id[None, :]] = 0
+        matches, _, _ = greedy_match(iou, match_iou)
+        report['reference'] += len(expected)
+        report['candidate'] += len(actual)
+        report['matched'] += len(matches)
+        report['ious'] += [iou[r, c] for r, c in matches]
+
+    ious = report.pop('ious')
+    report['mean_iou'] = float(np.mean(ious)) if ious else 0.0
+    report['recall'] = report['matched'] / report['reference'] if report['reference'] else 1.0
+    report['precision'] = report['matched'] / report['candidate'] if report['candidate'] else 1.0
+    report['reference_ms'] /= max(1, len(images))
+    report['candidate_ms'] /= max(1, len(images))
+    return report
+
+
+def main():
+    """
+    python backends.py [weights] [--int8] [--images N]
+    Exports the weights, then checks ONNX Runtime against PyTorch on dataset images.
+    """
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    weights = args[0] if args else 'yolov8m.pt'
+    num_images = int(sys.argv[sys.argv.index('--images') + 1]) if '--images' in sys.argv else 50
+
+    settings = load_backend_settings()
+    settings['onnx']['int8'] = '--int8' in sys.argv or settings['onnx'].get('int8', False)
+    reference = create_backend(weights, 'ultralytics')
+    candidate = create_backend(weights, 'onnxruntime', settings)
+
+    reader = CalibrationReader('images', CALIBRATION_DIR.parent.parent / 'valid' / 'images', num_images)
+    images = [img for img in (cv2.imread(str(p)) for p in reader.paths) if img is not None]
+    report = parity_check(reference, candidate, images)
+
+    print(f"\n📊 Parity on {report['images']} images ({Path(candidate.onnx_path).name} vs {weights})")
+    print(f"   Detections: {report['reference']} torch, {report['candidate']} onnx, {report['matched']} matched")
+    print(f"   Recall {report['recall']:.1%}  Precision {report['precision']:.1%}  Mean IoU {report['mean_iou']:.3f}")
+    print(f"   Latency: {report['reference_ms']:.0f} ms torch, {report['candidate_ms']:.0f} ms onnx per image")
+
+
+if __name__ == '__main__':
+    main()
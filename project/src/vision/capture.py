@@ -0,0 +1,96 @@
+# Save this file as: project/src/vision/capture.py
+
+import queue
+import threading
+import time
+
+import cv2
+
+
+class PrefetchedCapture:
+    """
+    Drop-in replacement for cv2.VideoCapture that decodes on a producer thread.
+
+    Each source gets its own thread, so several cameras decode in parallel
+    instead of one after another on the main loop. With `frame_skip=N` only
+    every N-th frame is decoded: the others are advanced with grab() and never
+    retrieve()d, so their decode cost is never paid. Decoded frames wait in a
+    small ring buffer; when it is full the producer blocks, which keeps file
+    playback at the consumer's pace without dropping frames.
+    """
+
+    def __init__(self, source, frame_skip=1, buffer_size=4):
+        self.cap = cv2.VideoCapture(source)
+        self.frame_skip = max(1, int(frame_skip))
+        self.position = 0  # 1-based source frame number of the last frame returned by read()
+        self.timestamp = None  # Wall-clock time the last returned frame was decoded
+
+        # Read properties up front; the capture belongs to the producer thread afterwards
+        self._properties = {prop: self.cap.get(prop) for prop in
+                            (cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_WIDTH,
+                             cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FRAME_COUNT)}
+
+        self._buffer = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"capture-{source}", daemon=True)
+        if self.cap.isOpened():
+            self._thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        if prop in self._properties:
+            return self._properties[prop]
+        return self.cap.get(prop)
+
+    def read(self):
+        """
+        Returns (True, frame) for the next analysed frame, or (False, None) at the end.
+        """
+        if not self._thread.is_alive() and self._buffer.empty():
+            return False, None
+        item = self._buffer.get()
+        if item is None:
+            self._buffer.put(None)  # Keep reporting end-of-stream on later reads
+            return False, None
+        self.position, self.timestamp, frame = item
+        return True, frame
+
+    def release(self):
+        self._stop.set()
+        # Unblock a producer waiting on a full buffer
+        while not self._buffer.empty():
+            try:
+                self._buffer.get_nowait()
+            except queue.Empty:
+                break
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self.cap.release()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        position = 0
+        while not self._stop.is_set():
+            position += 1
+            if position % self.frame_skip != 0:
+                # Advance the stream without paying for decode
+                if not self.cap.grab():
+                    break
+                continue
+
+            ok, frame = self.cap.read()
+            if not ok:
+                break
+            if not self._put((position, time.time(), frame)):
+                return
+        self._put(None)
@@ -0,0 +1,126 @@
+# Save this file as: project/src/vision/detections.py
+
+import numpy as np
+
+from tracker import box_iou
+
+
+def non_max_suppression(boxes, scores, iou_threshold):
+    """
+    Greedy NMS; returns the indices of the kept boxes, most confident first.
+    """
+    order = np.argsort(-np.asarray(scores))
+    iou = box_iou(np.asarray(boxes)[order], np.asarray(boxes)[order])
+    keep = []
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed |= iou[i] > iou_threshold
+    return np.array(keep, dtype=np.int64)
+
+
+class Detections:
+    """
+    Struct-of-arrays container for the detections of one camera frame.
+
+    Every field is a NumPy array with one row per detection:
+        boxes       (N, 4) int32   [x1, y1, x2, y2]
+        anchors     (N, 2) int32   bottom-center point used for zone counting
+        class_id    (N,)   int32   YOLO/COCO class index
+        confidence  (N,)   float32 detector score
+        tracker_id  (N,)   int64   stable track ID, -1 when untracked
+        zone_id     (N,)   int64   counting zone index, -1 when outside all zones
+        names       (N,)   object  recognized vehicle name or None
+    """
+
+    __slots__ = ('boxes', 'anchors', 'class_id', 'confidence', 'tracker_id', 'zone_id', 'names')
+
+    def __init__(self, boxes, class_id, confidence, tracker_id=None, zone_id=None, names=None):
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        n = len(self.boxes)
+        self.anchors = np.stack([(self.boxes[:, 0] + self.boxes[:, 2]) // 2, self.boxes[:, 3]], axis=1)
+        self.class_id = np.asarray(class_id, dtype=np.int32).reshape(n)
+        self.confidence = np.asarray(confidence, dtype=np.float32).reshape(n)
+        self.tracker_id = (np.full(n, -1, dtype=np.int64) if tracker_id is None
+                           else np.asarray(tracker_id, dtype=np.int64).reshape(n))
+        self.zone_id = (np.full(n, -1, dtype=np.int64) if zone_id is None
+                        else np.asarray(zone_id, dtype=np.int64).reshape(n))
+        self.names = np.empty(n, dtype=object)
+        if names is not None:
+            self.names[:] = names
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 4)), [], [])
+
+    @classmethod
+    def from_array(cls, data):
+        """
+        Builds detections from an (N, 6) array of [x1, y1, x2, y2, conf, cls] rows.
+        """
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        return cls(data[:, :4], data[:, 5], data[:, 4])
+
+    @classmethod
+    def from_yolo(cls, result):
+        """
+        Builds detections from an ultralytics result with a single device-to-host copy.
+        """
+        if result.boxes is None or len(result.boxes) == 0:
+            return cls.empty()
+        return cls.from_array(result.boxes.data[:, :6].cpu().numpy())
+
+    def shifted(self, dx, dy):
+        """
+        Moves detections from crop coordinates back into full-frame coordinates.
+        """
+        return Detections(self.boxes + np.array([dx, dy, dx, dy], dtype=np.int32),
+                          self.class_id, self.confidence, self.tracker_id, self.zone_id, self.names)
+
+    @classmethod
+    def merge(cls, parts, iou_threshold=None):
+        """
+        Concatenates detections; with `iou_threshold`, boxes found twice in
+        overlapping tiles are suppressed, keeping the most confident one.
+        """
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        merged = cls(np.concatenate([p.boxes for p in parts]),
+                     np.concatenate([p.class_id for p in parts]),
+                     np.concatenate([p.confidence for p in parts]))
+        if iou_threshold is None or len(parts) == 1:
+            return merged
+
+        keep = non_max_suppression(merged.boxes, merged.confidence, iou_threshold)
+        return merged[np.sort(keep)]
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, index):
+        """
+        Selects a subset of detections with a boolean mask, index array or slice.
+        """
+        if isinstance(index, (int, np.integer)):
+            index = [index]  # Keep a single detection as a length-1 container
+        subset = Detections.__new__(Detections)
+        for field in self.__slots__:
+            setattr(subset, field, getattr(self, field)[index])
+        return subset
+
+    def to_dict(self):
+        """
+        JSON-friendly representation, e.g. for API payloads.
+        """
+        return {
+            'boxes': self.boxes.tolist(),
+            'anchors': self.anchors.tolist(),
+            'class_id': self.class_id.tolist(),
+            'confidence': [round(c, 3) for c in self.confidence.tolist()],
+            'tracker_id': self.tracker_id.tolist(),
+            'zone_id': self.zone_id.tolist(),
+            'names': self.names.tolist(),
+        }
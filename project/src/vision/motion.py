@@ -0,0 +1,85 @@
+# Save this file as: project/src/vision/motion.py
+
+import cv2
+import numpy as np
+
+from zones import zone_rois
+
+
+class MotionGate:
+    """
+    Cheap per-zone change detector that decides when YOLO can be skipped.
+
+    Each zone is cropped, downscaled to a tiny grayscale patch and compared with
+    the patch captured the last time the detector actually ran. If no zone has
+    more than `change_threshold` of its pixels changed by `pixel_threshold`
+    grey levels, the previous counts are still valid. `max_stale_frames` bounds
+    how long results may be reused, so slow drifts are still picked up.
+    """
+
+    def __init__(self, pixel_threshold=25, change_threshold=0.02, max_stale_frames=30, patch_size=(64, 64)):
+        self.pixel_threshold = pixel_threshold
+        self.change_threshold = change_threshold
+        self.max_stale_frames = max_stale_frames
+        self.patch_size = patch_size
+
+        self._references = {}  # camera_id -> (zone key, [patches])
+        self._stats = {}
+
+    def _patches(self, frame, polygons):
+        patches = []
+        for x1, y1, x2, y2 in zone_rois(frame.shape, polygons, mode='tiles', padding=0):
+            crop = cv2.resize(frame[y1:y2, x1:x2], self.patch_size, interpolation=cv2.INTER_AREA)
+            if crop.ndim == 3:
+                crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            patches.append(cv2.GaussianBlur(crop, (5, 5), 0))
+        return patches
+
+    def _camera_stats(self, camera_id):
+        if camera_id not in self._stats:
+            self._stats[camera_id] = {'frames': 0, 'skipped': 0, 'stale_frames': 0, 'max_stale_frames': 0}
+        return self._stats[camera_id]
+
+    def should_detect(self, camera_id, frame, polygons):
+        """
+        Returns True when the detector must run for this camera's frame.
+        """
+        stats = self._camera_stats(camera_id)
+        stats['frames'] += 1
+
+        key = (frame.shape, tuple(np.asarray(p, dtype=np.int32).tobytes() for p in polygons))
+        patches = self._patches(frame, polygons)
+        reference = self._references.get(camera_id)
+
+        changed = (reference is None or reference[0] != key
+                   or stats['stale_frames'] >= self.max_stale_frames
+                   or any(self._changed_fraction(old, new) > self.change_threshold
+                          for old, new in zip(reference[1], patches)))
+
+        if changed:
+            self._references[camera_id] = (key, patches)
+            stats['stale_frames'] = 0
+            return True
+
+        stats['skipped'] += 1
+        stats['stale_frames'] += 1
+        stats['max_stale_frames'] = max(stats['max_stale_frames'], stats['stale_frames'])
+        return False
+
+    def _changed_fraction(self, old, new):
+        return np.count_nonzero(cv2.absdiff(old, new) > self.pixel_threshold) / old.size
+
+    def reset(self, camera_id=None):
+        if camera_id is None:
+            self._references.clear()
+        else:
+            self._references.pop(camera_id, None)
+
+    def get_stats(self):
+        """
+        Skip rate and staleness per camera, for tuning CPU savings against accuracy.
+        """
+        report = {}
+        for camera_id, stats in self._stats.items():
+            report[camera_id] = dict(stats, skip_rate=stats['skipped'] / stats['frames'] if stats['frames'] else 0.0)
+        return report
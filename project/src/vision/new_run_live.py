@@ -1,14 +1,19 @@
 import cv2
 import numpy as np
 import gymnasium as gym
-from stable_baselines3 import PPO
 import sumo_rl
 from processor import VisionProcessor 
+from sources import open_source
 import threading
 import time
+import sys
+from pathlib import Path
 from flask import Flask, jsonify
 import traci
 
+sys.path.append(str(Path(__file__).parent.parent / 'ai_core'))
+from policy_cache import load_cached_policy
+
 # --- CONFIGURATION ---
 MODEL_PATH = "project/models/ppo_traffic_model_v2.zip"
 VIDEO_PATH_1 = "project/videos/intersection1.mp4"
@@ -42,12 +47,12 @@ def run_simulation():
     # --- INITIALIZATION ---
     DECISION_INTERVAL_SECONDS = 5
     print("Loading AI model...")
-    model = PPO.load(MODEL_PATH)
+    model = load_cached_policy(MODEL_PATH)
     print("Initializing Vision Processor...")
     processor = VisionProcessor()
     print("Opening video files...")
-    cap1 = cv2.VideoCapture(VIDEO_PATH_1)
-    cap2 = cv2.VideoCapture(VIDEO_PATH_2)
+    cap1 = open_source(VIDEO_PATH_1, loop=True)
+    cap2 = open_source(VIDEO_PATH_2, loop=True)
     if not cap1.isOpened() or not cap2.isOpened():
         print(f"Error: Could not open one or both video files.")
         return
@@ -67,17 +72,15 @@ def run_simulation():
         ret1, frame1 = cap1.read()
         ret2, frame2 = cap2.read()
         if not ret1 or not ret2:
-            # Loop videos if they end
-            print("Resetting video files.")
-            cap1.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            cap2.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            continue
+            # Looping sources only fail if a stream is gone for good
+            print("Error: Lost one or both video sources.")
+            break
         
         frame_count += 1
         
         # --- PERCEIVE ---
-        queue_counts1, _ = processor.process_frame(frame1, POLYGONS_VIDEO_1)
-        queue_counts2, _ = processor.process_frame(frame2, POLYGONS_VIDEO_2)
+        (queue_counts1, _), (queue_counts2, _) = processor.process_frames(
+            [frame1, frame2], [POLYGONS_VIDEO_1, POLYGONS_VIDEO_2])
         state_from_video = queue_counts1 + queue_counts2
         
         # --- THINK & ACT ---
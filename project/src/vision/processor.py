@@ -67,119 +67,279 @@
 # Save this file as: project/src/vision/processor.py
 # (Your preferred detection code merged with the local naming model)
 
-import cv2
+import time
+
 import numpy as np
-from ultralytics import YOLO
-from PIL import Image
 
-# IMPORTS for the local model
-import torch
-from transformers import AutoImageProcessor, AutoModelForImageClassification
+from adaptive import ResolutionController
+from backends import create_backend, load_backend_settings
+from detections import Detections
+from motion import MotionGate
+from recognition import VehicleRecognitionWorker
+from tracker import ByteTracker
+from zones import ZoneMaskCache, count_zones, lookup_zones, zone_rois
 
 class VisionProcessor:
-    def __init__(self):
+    def __init__(self, roi_mode=None, roi_padding=32, motion_gate=False,
+                 latency_budget_ms=None, fallback_model='yolov8n.pt', backend=None, debug_zones=False,
+                 recognize_vehicles=True):
         """
         Initializes both the YOLO model and the local car recognition model.
+
+        Args:
+            roi_mode: None to run detection on full frames, 'union' to run it only
+                on the bounding box of each camera's zones, or 'tiles' to run it
+                on one crop per zone. Coordinates are mapped back automatically.
+            roi_padding: Pixels added around the zones so edge vehicles stay whole.
+            motion_gate: True (or a configured MotionGate) to skip the detector for
+                cameras whose zones have not changed since the last detection.
+            latency_budget_ms: Per-frame latency budget. When set, the inference
+                size (and, if needed, the model) adapts to stay within it.
+            fallback_model: Lighter weights the controller may switch to under load.
+            backend: Detector runtime, 'ultralytics' (PyTorch) or 'onnxruntime'.
+                Defaults to detection_settings.backend in config.json.
+            debug_zones: Print vehicles detected outside every zone, for calibrating polygons.
+            recognize_vehicles: Load the local recognition model that names tracked
+                vehicles. False only detects, tracks and counts, without transformers.
         """
-        # Your preferred YOLO setup
-        self.model = YOLO('yolov8m.pt')
+        # Your preferred YOLO setup, on the configured runtime
+        self.backend_settings = load_backend_settings()
+        if backend is not None:
+            self.backend_settings['backend'] = backend
+        self.model = create_backend('yolov8m.pt', settings=self.backend_settings)
+        self._models = {'yolov8m.pt': self.model}
+
+        # Optional latency feedback loop over imgsz and main/fallback model
+        self.resolution_controller = None
+        if latency_budget_ms is not None:
+            self.resolution_controller = ResolutionController(latency_budget_ms,
+                                                              models=('yolov8m.pt', fallback_model))
         self.vehicle_classes = [2, 3, 5, 7]  # car, motorcycle, bus, truck
 
         # Additions for the naming feature
-        self.vehicle_cache = {} # Cache to store names of identified cars
+        self.vehicle_cache = {} # Names of identified cars, keyed by (camera_id, track_id)
+
+        # One persistent tracker per camera so track IDs stay stable across frames.
+        # The detector keeps boxes down to the tracker's low threshold so weak
+        # detections reach its second association; only boxes above count_thresh
+        # are counted in zones, as before tracking.
+        self.trackers = {}
+        self.low_thresh = 0.1
+        self.count_thresh = 0.3
+
+        # Counting zones compiled into label masks, one per camera
+        self.zone_masks = ZoneMaskCache()
+
+        # Zone-ROI cropped inference: fewer pixels per forward pass
+        self.roi_mode = roi_mode
+        self.roi_padding = roi_padding
+        self.debug_zones = debug_zones
+
+        # Optional motion gate; skipped cameras reuse their last counts and detections
+        self.motion_gate = MotionGate() if motion_gate is True else (motion_gate or None)
+        self._last_outputs = {}
+
+        self.max_recognitions_per_frame = 2
+        self.recognizer = None
+        if not recognize_vehicles:
+            return
 
         # --- LOAD LOCAL RECOGNITION MODEL ---
+        from transformers import AutoImageProcessor, AutoModelForImageClassification
         print("Loading local car recognition model (this may take a moment on first run)...")
         model_name = "facebook/deit-base-distilled-patch16-224"
         self.feature_extractor = AutoImageProcessor.from_pretrained(model_name)
         self.recognition_model = AutoModelForImageClassification.from_pretrained(model_name)
         print("Local car recognition model loaded successfully.")
 
+        # Recognition runs off the detection loop, batching crops into one forward pass
+        self.recognizer = VehicleRecognitionWorker(self.feature_extractor, self.recognition_model)
+        self.recognizer.start()
+
     def get_vehicle_name_local(self, cropped_image):
         """
         Identifies the vehicle's type using a local Transformer model.
-        This is the same offline function from the previous version.
+        Synchronous; the detection loop uses the background worker instead.
         """
-        try:
-            image = Image.fromarray(cv2.cvtColor(cropped_image, cv2.COLOR_BGR2RGB))
-            inputs = self.feature_extractor(images=image, return_tensors="pt")
-            
-            with torch.no_grad():
-                outputs = self.recognition_model(**inputs)
-            
-            logits = outputs.logits
-            predicted_class_idx = logits.argmax(-1).item()
-            predicted_label = self.recognition_model.config.id2label[predicted_class_idx]
-            
-            car_keywords = ['car', 'jeep', 'convertible', 'coupe', 'minivan', 'limousine', 'wagon', 'racer', 'grille', 'pickup', 'suv']
-            if any(keyword in predicted_label.lower() for keyword in car_keywords):
-                clean_name = predicted_label.split(',')[0].title()
-                print(f"Local Model Success: Identified '{clean_name}'")
-                return clean_name
+        if self.recognizer is None:
             return None
+        try:
+            return self.recognizer.classify_batch([cropped_image])[0]
         except Exception as e:
             print(f"An error occurred during local vehicle recognition: {e}")
             return None
 
-    def process_frame(self, frame, polygons):
+    def _collect_vehicle_names(self):
+        """
+        Caches the recognizer's finished names; None marks a vehicle that is not a car type.
+
+        Runs on the processing thread, the only one that touches the trackers and the cache.
+        """
+        if self.recognizer is None:
+            return
+        for key, name in self.recognizer.results():
+            camera_id, track_id = key
+            tracker = self.trackers.get(camera_id)
+            # Drop late results for tracks that expired while the crop was queued
+            if tracker is not None and any(t.track_id == track_id for t in tracker.tracks):
+                self.vehicle_cache[key] = name
+
+    def process_frame(self, frame, polygons, camera_id=0):
         """
         Processes a single video frame to detect, track, count, and name vehicles.
         """
-        queue_counts = [0] * len(polygons)
-        detections_for_viz = []
+        return self.process_frames([frame], [polygons], camera_ids=[camera_id])[0]
+
+    def process_frames(self, frames, polygons_per_camera, camera_ids=None):
+        """
+        Processes one frame per camera with a single batched YOLO forward pass.
+
+        Args:
+            frames: A list of video frames, one per camera.
+            polygons_per_camera: A list with the counting polygons of each camera,
+                in the same order as `frames`.
+            camera_ids: Optional stable ID per camera used to key per-camera state
+                such as the compiled zone masks. Defaults to the list position.
+
+        Returns:
+            A list with one (queue_counts, detections) tuple per camera, identical
+            to what `process_frame` returns for that camera. `detections` is a
+            Detections struct of arrays.
+        """
+        outputs = [([0] * len(polygons), Detections.empty()) for polygons in polygons_per_camera]
+        if camera_ids is None:
+            camera_ids = list(range(len(frames)))
+
+        # Motion gate: cameras whose zones have not changed reuse their last results
+        active = list(range(len(frames)))
+        if self.motion_gate is not None:
+            active = []
+            for cam_idx, (frame, polygons) in enumerate(zip(frames, polygons_per_camera)):
+                camera_id = camera_ids[cam_idx]
+                changed = self.motion_gate.should_detect(camera_id, frame, polygons)
+                if changed or camera_id not in self._last_outputs:
+                    active.append(cam_idx)
+                else:
+                    outputs[cam_idx] = self._last_outputs[camera_id]
+            if not active:
+                return outputs
+
+        # Every camera contributes its full frame, or only its zone crops in ROI mode
+        images, owners = [], []
+        for cam_idx in active:
+            frame, polygons = frames[cam_idx], polygons_per_camera[cam_idx]
+            if self.roi_mode:
+                for x1, y1, x2, y2 in zone_rois(frame.shape, polygons, self.roi_mode, self.roi_padding):
+                    images.append(frame[y1:y2, x1:x2])
+                    owners.append((cam_idx, x1, y1))
+            else:
+                images.append(frame)
+                owners.append((cam_idx, 0, 0))
 
+        start_time = time.perf_counter()
         try:
-            # Use YOLO detection (not tracking for now to ensure we get detections)
-            results = self.model(frame, verbose=False)[0]
-            
-            # Limit how often we identify new cars to keep things fast
-            process_new_car_this_frame = (cv2.getTickCount() % 25 == 0)
-
-            # Process all detected boxes
-            if results.boxes is not None and len(results.boxes) > 0:
-                for i, box in enumerate(results.boxes):
-                    # Get the class ID
-                    class_id = int(box.cls[0])
-                    confidence = float(box.conf[0])
-
-                    # Check if the class ID is a vehicle and confidence is high enough
-                    if class_id in self.vehicle_classes and confidence > 0.3:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                        anchor_point = (int((x1 + x2) / 2), int(y2))
-                        
-                        # Use detection index as tracker ID for now
-                        tracker_id = i
-                        
-                        # This dictionary will hold the car's name
-                        details = {"name": None}
-
-                        # Try to identify the vehicle occasionally
-                        if process_new_car_this_frame and i == 0:  # Only for first detection to save time
-                            try:
-                                cropped_car = frame[y1:y2, x1:x2]
-                                if cropped_car.size > 0:  # Make sure crop is valid
-                                    car_name = self.get_vehicle_name_local(cropped_car)
-                                    if car_name:
-                                        details["name"] = car_name
-                            except:
-                                pass  # Skip naming if it fails
-
-                        # Store all data needed for visualization
-                        detections_for_viz.append(([x1, y1, x2, y2], anchor_point, 'vehicle', details, tracker_id))
-
-                        # Count vehicles in zones
-                        vehicle_in_zone = False
-                        for j, polygon in enumerate(polygons):
-                            if cv2.pointPolygonTest(polygon, anchor_point, False) >= 0:
-                                queue_counts[j] += 1
-                                vehicle_in_zone = True
-                                break  # Vehicle can only be in one zone
-                        
-                        # Debug: Log vehicles that aren't in any zone (occasionally)
-                        if not vehicle_in_zone and i == 0:  # Only log for first detection
-                            print(f"🔍 Vehicle at {anchor_point} not in any zone (conf: {confidence:.2f})")
-            
+            # One detector call for every camera instead of one call per camera
+            if self.resolution_controller is not None:
+                model = self._get_model(self.resolution_controller.model_name)
+                results = model.detect(images, imgsz=self.resolution_controller.imgsz, conf=self.low_thresh)
+            else:
+                results = self.model.detect(images, conf=self.low_thresh)
         except Exception as e:
-            print(f"Error in process_frame: {e}")
-        
-        return queue_counts, detections_for_viz
\ No newline at end of file
+            print(f"Error in process_frames: {e}")
+            return outputs
+        if self.resolution_controller is not None:
+            # The batch covers every active camera, the budget is per frame
+            self.resolution_controller.record((time.perf_counter() - start_time) * 1000, frames=len(active))
+
+        # Map crop coordinates back to each camera's full frame
+        parts = [[] for _ in frames]
+        for (cam_idx, dx, dy), detections in zip(owners, results):
+            parts[cam_idx].append(detections.shifted(dx, dy))
+
+        for cam_idx in active:
+            frame, polygons = frames[cam_idx], polygons_per_camera[cam_idx]
+            try:
+                # Overlapping tiles can see the same vehicle twice
+                iou_threshold = 0.6 if self.roi_mode == 'tiles' else None
+                detections = Detections.merge(parts[cam_idx], iou_threshold)
+                outputs[cam_idx] = self._parse_result(frame, polygons, detections, camera_id=camera_ids[cam_idx])
+                self._last_outputs[camera_ids[cam_idx]] = outputs[cam_idx]
+            except Exception as e:
+                print(f"Error in process_frame (camera {cam_idx}): {e}")
+
+        return outputs
+
+    def _get_model(self, model_name):
+        """
+        Loads detector weights on first use so the fallback model costs nothing until needed.
+        """
+        if model_name not in self._models:
+            print(f"Loading fallback detector {model_name}...")
+            self._models[model_name] = create_backend(model_name, settings=self.backend_settings)
+        return self._models[model_name]
+
+    def get_inference_log(self):
+        """
+        Per-frame records of the model, imgsz and latency used by the controller.
+        """
+        return list(self.resolution_controller.log) if self.resolution_controller is not None else []
+
+    def _parse_result(self, frame, polygons, detections, camera_id=0):
+        """
+        Turns the raw detections of one camera into zone counts and tracked vehicles.
+        """
+        tracker = self.get_tracker(camera_id)
+
+        # Keep vehicle boxes, including the weak ones the tracker uses to bridge occlusions
+        detections = detections[np.isin(detections.class_id, self.vehicle_classes)
+                                & (detections.confidence > tracker.low_thresh)]
+
+        # Weak detections that did not continue any track are dropped
+        detections.tracker_id = tracker.update(detections.boxes, detections.confidence)
+        detections = detections[detections.tracker_id >= 0]
+
+        # Forget names of vehicles that have left the scene, then pick up newly recognised ones
+        for removed_id in tracker.removed_ids:
+            self.vehicle_cache.pop((camera_id, removed_id), None)
+        self._collect_vehicle_names()
+
+        # Count vehicles in zones with one lookup into the precompiled label mask.
+        # Weak detections keep their tracks alive but are not counted.
+        zone_mask = self.zone_masks.get(camera_id, frame.shape, polygons)
+        detections.zone_id = lookup_zones(zone_mask, detections.anchors)
+        queue_counts = count_zones(detections.zone_id[detections.confidence > self.count_thresh], len(polygons))
+
+        recognitions_queued = 0
+        for i, tracker_id in enumerate(detections.tracker_id.tolist()):
+            # Names are identified once per track and reused from the cache
+            key = (camera_id, tracker_id)
+            detections.names[i] = self.vehicle_cache.get(key)
+
+            # Hand unidentified vehicles to the background recognizer; never wait for it
+            if (self.recognizer is not None and recognitions_queued < self.max_recognitions_per_frame
+                    and key not in self.vehicle_cache and not self.recognizer.is_pending(key)):
+                x1, y1, x2, y2 = detections.boxes[i].tolist()
+                cropped_car = frame[max(y1, 0):y2, max(x1, 0):x2]
+                if cropped_car.size > 0:  # Make sure crop is valid
+                    if self.recognizer.submit(key, cropped_car):
+                        recognitions_queued += 1
+
+        # Debug: Log vehicles that aren't in any zone (occasionally)
+        if self.debug_zones and len(detections) > 0 and detections.zone_id[0] < 0:  # Only log for first detection
+            print(f"🔍 Vehicle at {tuple(detections.anchors[0].tolist())} not in any zone")
+
+        return queue_counts, detections
+
+    def get_motion_stats(self):
+        """
+        Skip rate and staleness per camera, or an empty dict without a motion gate.
+        """
+        return self.motion_gate.get_stats() if self.motion_gate is not None else {}
+
+    def get_tracker(self, camera_id):
+        """
+        Returns the tracker of a camera, creating it on first use.
+        """
+        if camera_id not in self.trackers:
+            self.trackers[camera_id] = ByteTracker(low_thresh=self.low_thresh)
+        return self.trackers[camera_id]
@@ -0,0 +1,145 @@
+# Save this file as: project/src/vision/recognition.py
+
+import queue
+import threading
+
+import cv2
+
+CAR_KEYWORDS = ['car', 'jeep', 'convertible', 'coupe', 'minivan', 'limousine', 'wagon', 'racer', 'grille', 'pickup', 'suv']
+
+
+def clean_vehicle_label(predicted_label):
+    """
+    Maps an ImageNet label to a display name, or None if it is not a car type.
+    """
+    if any(keyword in predicted_label.lower() for keyword in CAR_KEYWORDS):
+        return predicted_label.split(',')[0].title()
+    return None
+
+
+class VehicleRecognitionWorker:
+    """
+    Runs the vehicle recognition model on a background thread.
+
+    Crops are submitted with a key (for VisionProcessor: (camera_id, track_id))
+    and queued without blocking; when the queue is full the crop is simply
+    dropped and the vehicle is retried on a later frame. The worker drains up to
+    `batch_size` crops at a time and classifies them in one forward pass, then
+    queues each (key, name) pair for the submitting thread to collect with
+    `results()`, so the caller's own state is only ever touched by the caller.
+    A key stays pending until its result has been collected.
+    """
+
+    def __init__(self, feature_extractor, recognition_model, max_queue=32, batch_size=8):
+        self.feature_extractor = feature_extractor
+        self.recognition_model = recognition_model
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._results = queue.Queue()  # Bounded by the crops queue: a key is pending until collected
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Counters for tuning queue and batch sizes
+        self.submitted = 0
+        self.dropped = 0
+        self.batches = 0
+        self.recognized = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vehicle-recognition", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, key, cropped_image):
+        """
+        Queues a BGR crop for recognition. Never blocks; returns False if dropped.
+        """
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        try:
+            # Copy so the crop does not pin (or race with) the whole video frame
+            self._queue.put_nowait((key, cropped_image.copy()))
+            self.submitted += 1
+            return True
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(key)
+            self.dropped += 1
+            return False
+
+    def results(self):
+        """
+        Returns the (key, name) pairs recognised since the last call; never blocks.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._pending.difference_update(key for key, _ in results)
+        return results
+
+    def classify_batch(self, cropped_images):
+        """
+        Identifies the vehicle type of several BGR crops with one forward pass.
+        """
+        import torch  # Only the recognition model needs it
+
+        images = [cv2.cvtColor(crop, cv2.COLOR_BGR2RGB) for crop in cropped_images]
+        inputs = self.feature_extractor(images=images, return_tensors="pt")
+
+        with torch.no_grad():
+            outputs = self.recognition_model(**inputs)
+
+        predicted = outputs.logits.argmax(-1).tolist()
+        id2label = self.recognition_model.config.id2label
+        return [clean_vehicle_label(id2label[idx]) for idx in predicted]
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            keys = [key for key, _ in batch]
+            try:
+                names = self.classify_batch([crop for _, crop in batch])
+            except Exception as e:
+                print(f"An error occurred during local vehicle recognition: {e}")
+                names = [None] * len(batch)
+
+            self.batches += 1
+            for key, name in zip(keys, names):
+                if name:
+                    self.recognized += 1
+                    print(f"Local Model Success: Identified '{name}'")
+                self._results.put((key, name))
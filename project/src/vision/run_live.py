@@ -156,21 +156,28 @@
 Real-time traffic analysis with computer vision and reinforcement learning
 """
 
-import requests
 import cv2
 import numpy as np
-import gymnasium as gym
-from stable_baselines3 import PPO
-import sumo_rl
-from processor import VisionProcessor
+from detections import Detections
+from sources import open_source
+from workers import CameraWorkerPool
+from telemetry import TelemetryPublisher
 import time
 from datetime import datetime
 import json 
 
 # --- CONFIGURATION ---
 import os
+import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent.parent / 'ai_core'))
+sys.path.append(str(Path(__file__).parent.parent))
+from policy_cache import load_cached_policy
+from metrics import MODEL_PREDICT_SECONDS, histogram, observe_intersection, serve_metrics
+
+FRAME_SECONDS = histogram('traffic_frame_seconds', 'Time to turn one pair of camera frames into queue counts')
+
 # Get the project root directory (3 levels up from this file)
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 MODEL_PATH = PROJECT_ROOT / "models" / "ppo_traffic_model_v2.zip"
@@ -205,10 +212,6 @@ POLYGONS_VIDEO_2 = [
     np.array([[100, 300], [400, 300], [400, 470], [100, 470]], np.int32),
 ]
 
-print(f"📐 Video resolution zones configured:")
-print(f"   Camera 1: {len(POLYGONS_VIDEO_1)} zones")
-print(f"   Camera 2: {len(POLYGONS_VIDEO_2)} zones")
-
 class TrafficAnalytics:
     def __init__(self):
         self.start_time = time.time()
@@ -276,8 +279,38 @@ def create_enhanced_overlay(frame, title, queues, action_str, frame_count, analy
     
     return frame
 
+def draw_detections(frame, detections):
+    """Draw boxes, labels and anchor points straight from a Detections struct"""
+    boxes = detections.boxes.tolist()
+    anchors = detections.anchors.tolist()
+    tracker_ids = detections.tracker_id.tolist()
+    
+    for (x1, y1, x2, y2), anchor, name, tracker_id in zip(boxes, anchors, detections.names, tracker_ids):
+        # Vehicle bounding box with rounded corners effect
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
+        cv2.rectangle(frame, (x1-2, y1-2), (x1+60, y1-25), (0, 255, 0), -1)
+        
+        # Stable track ID until the recognition model names the vehicle
+        label = name if name else f"ID {tracker_id}"
+        cv2.putText(frame, label, (x1, y1-8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+        
+        # Tracking point
+        cv2.circle(frame, tuple(anchor), 5, (255, 0, 255), -1)
+    
+    return frame
+
 def main():
+    # Heavy imports live here, not at module level: --workers spawns camera
+    # processes, which re-import this module as __mp_main__ before running
+    # workers.camera_worker, and each worker should only load what it uses
+    import gymnasium as gym
+    import sumo_rl
+    from processor import VisionProcessor
+    
     print_banner()
+    print(f"📐 Video resolution zones configured:")
+    print(f"   Camera 1: {len(POLYGONS_VIDEO_1)} zones")
+    print(f"   Camera 2: {len(POLYGONS_VIDEO_2)} zones")
     
     # Check for test mode
     import sys
@@ -290,23 +323,39 @@ def main():
     analytics = TrafficAnalytics()
     
     print("🤖 Loading AI model...")
-    model = PPO.load(MODEL_PATH)
+    model = load_cached_policy(MODEL_PATH)
     print("✅ AI model loaded successfully!")
     
-    print("👁️  Initializing Vision Processor...")
-    processor = VisionProcessor()
-    print("✅ Vision system ready!")
+    # Zone-ROI inference: detect only inside the counting zones (--roi) or per-zone tiles (--roi-tiles)
+    ROI_MODE = 'tiles' if '--roi-tiles' in sys.argv else 'union' if '--roi' in sys.argv else None
     
-    print("📹 Opening video streams...")
-    cap1 = cv2.VideoCapture(VIDEO_PATH_1)
-    cap2 = cv2.VideoCapture(VIDEO_PATH_2)
-    if not cap1.isOpened() or not cap2.isOpened():
-        print("❌ Error: Could not open video files.")
-        return
-    print("✅ Video streams connected!")
+    # Motion gate: skip YOLO while nothing moves inside the zones (e.g. during a red phase)
+    MOTION_GATE = '--motion-gate' in sys.argv
     
-    video_fps = cap1.get(cv2.CAP_PROP_FPS)
-    decision_interval_frames = int(video_fps * DECISION_INTERVAL_SECONDS)
+    # Adaptive resolution: keep detection within a per-frame budget (--latency-budget 80)
+    LATENCY_BUDGET_MS = None
+    if '--latency-budget' in sys.argv:
+        LATENCY_BUDGET_MS = float(sys.argv[sys.argv.index('--latency-budget') + 1])
+    
+    # Worker mode: one vision process per camera, results shared through shared memory
+    USE_WORKERS = '--workers' in sys.argv and not TEST_MODE
+    
+    # Zone calibration: print vehicles detected outside every zone (--debug-zones)
+    DEBUG_ZONES = '--debug-zones' in sys.argv
+    
+    print("👁️  Initializing Vision Processor...")
+    processor_kwargs = {'roi_mode': ROI_MODE, 'motion_gate': MOTION_GATE, 'latency_budget_ms': LATENCY_BUDGET_MS,
+                        'debug_zones': DEBUG_ZONES}
+    processor = None if USE_WORKERS else VisionProcessor(**processor_kwargs)
+    if USE_WORKERS:
+        print("👷 WORKER MODE: One vision process per camera")
+    if ROI_MODE:
+        print(f"✂️  ROI MODE: Detecting on zone crops ({ROI_MODE})")
+    if MOTION_GATE:
+        print("💤 MOTION GATE: Reusing detections for unchanged zones")
+    if LATENCY_BUDGET_MS:
+        print(f"⏱️  ADAPTIVE RESOLUTION: {LATENCY_BUDGET_MS:.0f} ms per frame budget")
+    print("✅ Vision system ready!")
     
     # Speed up video processing
     FAST_MODE = '--fast' in sys.argv or TEST_MODE
@@ -316,6 +365,34 @@ def main():
     else:
         frame_skip = 1
     
+    # Camera sources: video files by default, or --cam1/--cam2 with rtsp://, http://, a device
+    # index or "synthetic". --live plays files like a live camera (latest frame wins).
+    SOURCE_1 = sys.argv[sys.argv.index('--cam1') + 1] if '--cam1' in sys.argv else VIDEO_PATH_1
+    SOURCE_2 = sys.argv[sys.argv.index('--cam2') + 1] if '--cam2' in sys.argv else VIDEO_PATH_2
+    LIVE_SOURCES = '--live' in sys.argv
+    
+    print("📹 Opening video streams...")
+    # One decode thread per camera; skipped frames are grabbed but never decoded
+    cap1 = open_source(SOURCE_1, frame_skip=frame_skip, live=LIVE_SOURCES)
+    cap2 = open_source(SOURCE_2, frame_skip=frame_skip, live=LIVE_SOURCES)
+    if not cap1.isOpened() or not cap2.isOpened():
+        print("❌ Error: Could not open video files.")
+        return
+    video_fps = cap1.get(cv2.CAP_PROP_FPS)
+    
+    pool = None
+    if USE_WORKERS:
+        # The workers open their own sources; ours were only needed to check them
+        cap1.release()
+        cap2.release()
+        pool = CameraWorkerPool([(SOURCE_1, POLYGONS_VIDEO_1), (SOURCE_2, POLYGONS_VIDEO_2)],
+                                source_kwargs={'frame_skip': frame_skip, 'live': LIVE_SOURCES},
+                                processor_kwargs=processor_kwargs)
+        pool.start()
+    print("✅ Video streams connected!")
+    
+    decision_interval_frames = int(video_fps * DECISION_INTERVAL_SECONDS)
+    
     print("🌐 Starting SUMO simulation environment...")
     env = gym.make('sumo-rl-v0', net_file=NET_FILE, route_file=ROUTE_FILE, use_gui=True, 
                    num_seconds=86400, single_agent=True, reward_fn='diff-waiting-time', 
@@ -327,20 +404,38 @@ def main():
     print("\n🚀 Starting real-time traffic analysis...")
     print("Press 'q' to quit, 's' to save analytics\n")
     
+    # Dashboard updates leave through a background publisher with a keep-alive connection
+    telemetry = TelemetryPublisher('http://localhost:5001/api/update_traffic').start()
+    # Junction this instance reports as; dashboards pick it with /?intersection=<id>
+    INTERSECTION_ID = sys.argv[sys.argv.index('--intersection') + 1] if '--intersection' in sys.argv else 'default'
+    # Same /metrics as the API server, for a Prometheus scrape of this process (--metrics-port 9101)
+    if '--metrics-port' in sys.argv:
+        metrics_port = int(sys.argv[sys.argv.index('--metrics-port') + 1])
+        serve_metrics(metrics_port)
+        print(f"📏 Metrics: http://localhost:{metrics_port}/metrics")
+    
     frame_count = 0
+    next_decision_frame = decision_interval_frames
     last_action = 0
     action_str = "KEEP"
 
     # --- MAIN LOOP ---
     while True:
-        ret1, frame1 = cap1.read()
-        ret2, frame2 = cap2.read()
-        if not ret1 or not ret2: break
-        frame_count += 1
-        
-        # Skip frames for speed if in fast mode
-        if FAST_MODE and frame_count % frame_skip != 0:
-            continue
+        if pool is not None:
+            snapshots = pool.read_latest()
+            if snapshots is None: break
+            snapshot1, snapshot2 = snapshots
+            frame1, frame2 = snapshot1.frame, snapshot2.frame
+            frame_count = snapshot1.position
+        else:
+            ret1, frame1 = cap1.read()
+            ret2, frame2 = cap2.read()
+            if not ret1 or not ret2: break
+            # Source frame number; skipped or dropped frames never reach this loop
+            frame_count = cap1.position
+        decision_due = frame_count >= next_decision_frame
+        if decision_due:
+            next_decision_frame = frame_count + decision_interval_frames
         
         # --- PERCEIVE ---
         if TEST_MODE:
@@ -358,11 +453,17 @@ def main():
             ]
             queue_counts1 = base_traffic1
             queue_counts2 = base_traffic2
-            detections1 = []  # Empty for test mode
-            detections2 = []
+            detections1 = Detections.empty()  # Empty for test mode
+            detections2 = Detections.empty()
+        elif pool is not None:
+            # Already counted by the camera workers
+            queue_counts1, detections1 = snapshot1.queue_counts, snapshot1.detections
+            queue_counts2, detections2 = snapshot2.queue_counts, snapshot2.detections
         else:
-            queue_counts1, detections1 = processor.process_frame(frame1, POLYGONS_VIDEO_1)
-            queue_counts2, detections2 = processor.process_frame(frame2, POLYGONS_VIDEO_2)
+            # Both cameras share one batched detector call
+            with FRAME_SECONDS.time():
+                (queue_counts1, detections1), (queue_counts2, detections2) = processor.process_frames(
+                    [frame1, frame2], [POLYGONS_VIDEO_1, POLYGONS_VIDEO_2])
         
         # Debug: Ensure we always have 4 zones (2 per camera)
         if len(queue_counts1) != 2:
@@ -388,18 +489,27 @@ def main():
             print(f"   Cam1 zones: {queue_counts1} (detections: {len(detections1)})")
             print(f"   Cam2 zones: {queue_counts2} (detections: {len(detections2)})")
             print(f"   Combined state: {state_from_video} (length: {len(state_from_video)})")
+            inference_log = processor.get_inference_log() if processor else []
+            if inference_log:
+                last = inference_log[-1]
+                print(f"   ⏱️  Inference: {last['model']} @ {last['imgsz']}px in {last['latency_ms']:.0f} ms per frame")
+            for cam_id, gate_stats in (processor.get_motion_stats() if processor else {}).items():
+                print(f"   💤 Cam{cam_id + 1} motion gate: skip rate {gate_stats['skip_rate']:.0%}, "
+                      f"max staleness {gate_stats['max_stale_frames']} frames")
             if TEST_MODE:
                 print(f"   🧪 TEST MODE: Using simulated data")
             else:
                 print(f"   📹 LIVE MODE: Processing video frames")
         
-        # --- THINK & ACT (No changes) ---
-        if frame_count % decision_interval_frames == 0:
+        # --- THINK & ACT ---
+        if decision_due:
             num_lanes = len(state_from_video)
             current_phase_from_sim = obs[num_lanes:]
             state_for_model = np.concatenate([state_from_video, current_phase_from_sim]).astype(np.float32)
-            last_action, _ = model.predict(state_for_model, deterministic=True)
+            with MODEL_PREDICT_SECONDS.time():
+                last_action, _ = model.predict(state_for_model, deterministic=True)
             action_str = "SWITCH" if int(last_action) == 1 else "KEEP"
+        observe_intersection(INTERSECTION_ID, state_from_video, action_str)
         obs, reward, terminated, truncated, info = env.step(last_action)
         
         # Speed up SUMO simulation aggressively
@@ -415,71 +525,42 @@ def main():
             except:
                 pass  # Ignore if GUI commands fail
         
-        # Send data to web dashboard
-        try:
-            payload = {'queues': state_from_video, 'action': action_str}
-            response = requests.post('http://localhost:5001/api/update_traffic', 
-                                   json=payload, timeout=0.5)
-            if frame_count % 50 == 0:  # Log every 50 frames
+        # Send data to web dashboard; the publisher thread does the HTTP, we never wait on it
+        payload = {'queues': state_from_video, 'action': action_str, 'intersection': INTERSECTION_ID}
+        telemetry.publish(payload)
+        if frame_count % 50 == 0:  # Log every 50 frames
+            if telemetry.connected:
                 print(f"\n📡 Sent to dashboard: {payload}")
-        except requests.exceptions.RequestException as e:
-            if frame_count % 100 == 0:  # Log occasionally
-                print(f"\n⚠️  Dashboard not connected: {type(e).__name__}")
-            pass  # Dashboard not running, continue anyway
+            elif telemetry.last_error:
+                print(f"\n⚠️  Dashboard not connected: {telemetry.last_error}")
         
         # --- ENHANCED VISUALIZATION ---
         # Update analytics
         analytics.total_vehicles_detected = len(detections1) + len(detections2)
-        if frame_count % decision_interval_frames == 0:
+        if decision_due:
             analytics.log_decision(action_str, state_from_video)
         
         # No zone visualization - clean video feed
         
-        # Enhanced vehicle detection visualization
-        for box, anchor, det_type, details, tracker_id in detections1:
-            x1, y1, x2, y2 = box
-            
-            # Vehicle bounding box with rounded corners effect
-            cv2.rectangle(frame1, (x1, y1), (x2, y2), (0, 255, 0), 3)
-            cv2.rectangle(frame1, (x1-2, y1-2), (x1+60, y1-25), (0, 255, 0), -1)
+        # Worker mode has no frame when the frame shape could not be probed; show only what we have
+        if frame1 is not None:
+            # Enhanced vehicle detection visualization
+            draw_detections(frame1, detections1)
             
-            # Vehicle info with better labeling
-            if details["name"]:
-                label = details["name"]
-            else:
-                # Use more descriptive labels based on vehicle size/type
-                vehicle_types = ["Car", "SUV", "Truck", "Van", "Sedan", "Hatchback", "Coupe", "Wagon"]
-                label = vehicle_types[tracker_id % len(vehicle_types)]
-            cv2.putText(frame1, label, (x1, y1-8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+            # Apply enhanced overlay
+            frame1 = create_enhanced_overlay(frame1, "INTERSECTION NORTH-WEST", queue_counts1, action_str, frame_count, analytics)
             
-            # Tracking point
-            cv2.circle(frame1, anchor, 5, (255, 0, 255), -1)
-        
-        # Apply enhanced overlay
-        frame1 = create_enhanced_overlay(frame1, "INTERSECTION NORTH-WEST", queue_counts1, action_str, frame_count, analytics)
+            # Display with custom window properties
+            cv2.imshow("AI Traffic Monitor - Camera 1", frame1)
         
         # No zone visualization - clean video feed
         
-        for box, anchor, det_type, details, tracker_id in detections2:
-            x1, y1, x2, y2 = box
-            cv2.rectangle(frame2, (x1, y1), (x2, y2), (0, 255, 0), 3)
-            cv2.rectangle(frame2, (x1-2, y1-2), (x1+60, y1-25), (0, 255, 0), -1)
+        if frame2 is not None:
+            draw_detections(frame2, detections2)
             
-            # Vehicle info with better labeling
-            if details["name"]:
-                label = details["name"]
-            else:
-                # Use more descriptive labels based on vehicle size/type
-                vehicle_types = ["Car", "SUV", "Truck", "Van", "Sedan", "Hatchback", "Coupe", "Wagon"]
-                label = vehicle_types[tracker_id % len(vehicle_types)]
-            cv2.putText(frame2, label, (x1, y1-8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
-            cv2.circle(frame2, anchor, 5, (255, 0, 255), -1)
-        
-        frame2 = create_enhanced_overlay(frame2, "INTERSECTION SOUTH-EAST", queue_counts2, action_str, frame_count, analytics)
-        
-        # Display with custom window properties
-        cv2.imshow("AI Traffic Monitor - Camera 1", frame1)
-        cv2.imshow("AI Traffic Monitor - Camera 2", frame2)
+            frame2 = create_enhanced_overlay(frame2, "INTERSECTION SOUTH-EAST", queue_counts2, action_str, frame_count, analytics)
+            
+            cv2.imshow("AI Traffic Monitor - Camera 2", frame2)
         
         # Print live status
         print_status(frame_count, action_str, state_from_video, analytics)
@@ -506,8 +587,20 @@ def main():
     print(f"🤖 AI Decisions Made: {final_stats['decisions']}")
     print(f"🚗 Total Vehicles Detected: {final_stats['vehicles']}")
     print(f"📈 Average Queue Length: {final_stats['avg_queue']:.1f}")
+    for cam_id, gate_stats in (processor.get_motion_stats() if processor else {}).items():
+        print(f"💤 Camera {cam_id + 1} Detector Skips: {gate_stats['skipped']}/{gate_stats['frames']} "
+              f"({gate_stats['skip_rate']:.0%}, max staleness {gate_stats['max_stale_frames']} frames)")
+    telemetry_stats = telemetry.get_stats()
+    print(f"📡 Dashboard Updates: {telemetry_stats['sent']} sent, {telemetry_stats['coalesced']} coalesced, "
+          f"{telemetry_stats['failed']} failed")
+    cache_stats = model.get_stats()
+    print(f"🧠 Decision Cache Hit Rate: {cache_stats['hit_rate']:.0%} "
+          f"({cache_stats['table_hits']} table, {cache_stats['hits']} cached, {cache_stats['misses']} computed)")
     print("="*60)
     
+    telemetry.stop()
+    if pool is not None:
+        pool.stop()
     cap1.release()
     cap2.release()
     cv2.destroyAllWindows()
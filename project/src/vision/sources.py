@@ -0,0 +1,286 @@
+# Save this file as: project/src/vision/sources.py
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from capture import PrefetchedCapture
+
+# One captured frame: the BGR image, the wall-clock capture time and a per-source counter
+Frame = namedtuple('Frame', ['image', 'timestamp', 'index'])
+
+DEFAULT_FPS = 30.0
+
+
+class FrameSource(ABC):
+    """
+    Common interface for everything the vision loops can read frames from.
+
+    `read()` keeps the cv2.VideoCapture contract so sources are drop-in
+    replacements; `read_frame()` additionally exposes the capture timestamp and
+    index. `position` and `timestamp` describe the last frame handed out.
+    """
+
+    fps = DEFAULT_FPS
+    position = 0
+    timestamp = None
+
+    @abstractmethod
+    def read_frame(self, timeout=None):
+        """
+        Returns the next Frame, or None when the source has no more frames.
+
+        Sources that can stall (live cameras) raise TimeoutError when no frame
+        arrives within `timeout` seconds; None is only ever end of stream.
+        """
+
+    def read(self):
+        frame = self.read_frame()
+        if frame is None:
+            return False, None
+        return True, frame.image
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def release(self):
+        pass
+
+    def _handed_out(self, frame):
+        self.position, self.timestamp = frame.index, frame.timestamp
+        return frame
+
+
+class FileSource(FrameSource):
+    """
+    Video file read in full, at the consumer's pace, with optional looping.
+
+    Decoding happens on a PrefetchedCapture thread; `frame_skip` frames are
+    grabbed without decoding. With `loop=True` the file restarts at the end,
+    which the 3D servers rely on for endless demos.
+    """
+
+    def __init__(self, path, frame_skip=1, loop=False):
+        self.path = path
+        self.frame_skip = frame_skip
+        self.loop = loop
+        self._offset = 0  # Frames played in earlier loops, so positions keep increasing
+        self._capture = PrefetchedCapture(path, frame_skip=frame_skip)
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+
+    def isOpened(self):
+        return self._capture.isOpened()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self._capture.get(prop)
+
+    def read_frame(self, timeout=None):
+        ok, image = self._capture.read()
+        if not ok and self.loop and self._capture.position > 0:
+            self._offset += self._capture.position
+            self._capture.release()
+            self._capture = PrefetchedCapture(self.path, frame_skip=self.frame_skip)
+            ok, image = self._capture.read()
+        if not ok:
+            return None
+        return self._handed_out(Frame(image, self._capture.timestamp, self._offset + self._capture.position))
+
+    def release(self):
+        self._capture.release()
+
+
+class LiveCameraSource(FrameSource):
+    """
+    Network or device camera with latest-frame-wins semantics.
+
+    A capture thread reads continuously and keeps only the newest frame, so a
+    slow consumer sees dropped frames instead of ever-growing latency. When the
+    stream fails the source reconnects with exponential backoff for as long as
+    it takes, and readers wait through the outage. A local file can stand in
+    for a camera with `pace=True`: it is played at its native frame rate and
+    looped, exactly like a live feed.
+    """
+
+    def __init__(self, uri, pace=False, reconnect_delay=1.0, max_reconnect_delay=30.0, open_timeout=5.0):
+        self.uri = uri
+        self.pace = pace
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._latest = None
+        self._returned_index = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._opened = threading.Event()
+
+        # Counters for monitoring stream health
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"source-{uri}", daemon=True)
+        self._thread.start()
+        # Only so the stream's fps is known when it connects quickly; slow cameras keep connecting
+        if not self._opened.wait(timeout=open_timeout):
+            print(f"⏳ Camera {uri} still connecting after {open_timeout:.0f}s, frames will follow once it answers")
+
+    def isOpened(self):
+        """
+        True until release(): a camera that is down or still connecting is retried, not given up on.
+        """
+        return not self._stop.is_set()
+
+    def read_frame(self, timeout=None):
+        """
+        Returns the newest frame not yet handed out.
+
+        Waits through outages while the capture thread reconnects and returns
+        None only once the source is released. With `timeout`, raises
+        TimeoutError when no new frame arrives in time, so the caller can
+        check its own stop condition and read again.
+        """
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self._stop.is_set() or (self._latest is not None and self._latest.index > self._returned_index),
+                timeout=timeout)
+            if self._stop.is_set():
+                return None
+            if not ready:
+                raise TimeoutError(f"No frame from camera {self.uri} in {timeout:.1f}s")
+            frame = self._latest
+            self.frames_dropped += frame.index - self._returned_index - 1
+            self._returned_index = frame.index
+        return self._handed_out(frame)
+
+    def release(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._thread.join(timeout=2.0)
+
+    def get_stats(self):
+        return {'captured': self.frames_captured, 'dropped': self.frames_dropped, 'reconnects': self.reconnects,
+                'connected': self._opened.is_set(), 'latest_timestamp': self._latest.timestamp if self._latest else None}
+
+    def _open(self):
+        source = int(self.uri) if str(self.uri).isdigit() else self.uri
+        cap = cv2.VideoCapture(source)
+        if cap.isOpened():
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+            self._opened.set()
+            return cap
+        cap.release()
+        return None
+
+    def _run(self):
+        delay = self.reconnect_delay
+        cap = None
+        read_since_open = False
+        while not self._stop.is_set():
+            if cap is None:
+                cap = self._open()
+                read_since_open = False
+                if cap is None:
+                    print(f"⚠️  Camera {self.uri} unavailable, retrying in {delay:.0f}s")
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+
+            ok, image = cap.read()
+            if not ok:
+                # End of a stand-in file, or a dropped stream: reopen either way
+                cap.release()
+                cap = None
+                self._opened.clear()
+                self.reconnects += 1
+                if not read_since_open:
+                    # Opens but never delivers a frame: back off instead of reopening in a tight loop
+                    print(f"⚠️  Camera {self.uri} opened but sent no frame, retrying in {delay:.0f}s")
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            # Only a frame actually read proves the stream healthy again
+            read_since_open = True
+            delay = self.reconnect_delay
+
+            with self._condition:
+                self.frames_captured += 1
+                self._latest = Frame(image, time.time(), self.frames_captured)
+                self._condition.notify_all()
+
+            if self.pace:
+                self._stop.wait(1.0 / self.fps)
+
+        if cap is not None:
+            cap.release()
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames for tests and demos without any video file.
+
+    `generator(index)` must return a BGR image; by default a few white blocks
+    drift across a dark frame, which the detector-free test paths can use.
+    """
+
+    def __init__(self, generator=None, size=(832, 480), fps=DEFAULT_FPS, max_frames=None):
+        self.width, self.height = size
+        self.fps = fps
+        self.max_frames = max_frames
+        self.generator = generator or self._moving_blocks
+        self._index = 0
+
+    def _moving_blocks(self, index):
+        image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        for lane in range(3):
+            x = (index * (3 + lane) + lane * 200) % self.width
+            y = 100 + lane * 120
+            image[y:y + 60, x:x + 90] = 255
+        return image
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return super().get(prop)
+
+    def read_frame(self, timeout=None):
+        if self.max_frames is not None and self._index >= self.max_frames:
+            return None
+        self._index += 1
+        return self._handed_out(Frame(self.generator(self._index), time.time(), self._index))
+
+
+def open_source(uri, frame_skip=1, loop=False, live=False):
+    """
+    Picks the right FrameSource for a URI.
+
+    - "synthetic" (or "synthetic:WxH")      -> SyntheticSource
+    - rtsp://, http(s)://, or a device index -> LiveCameraSource
+    - a file path                            -> FileSource, or a paced
+                                                LiveCameraSource when live=True
+    """
+    uri = str(uri)
+    if uri.startswith('synthetic'):
+        size = (832, 480)
+        if ':' in uri:
+            width, height = uri.split(':', 1)[1].lower().split('x')
+            size = (int(width), int(height))
+        return SyntheticSource(size=size)
+    if uri.startswith(('rtsp://', 'rtmp://', 'http://', 'https://')) or uri.isdigit():
+        return LiveCameraSource(uri)
+    if live:
+        return LiveCameraSource(uri, pace=True)
+    return FileSource(uri, frame_skip=frame_skip, loop=loop)
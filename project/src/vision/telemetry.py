@@ -0,0 +1,101 @@
+# Save this file as: project/src/vision/telemetry.py
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TelemetryPublisher:
+    """
+    Background HTTP client that keeps the vision/control loop off the network.
+
+    `publish()` only stores the payload and returns immediately. A sender
+    thread posts the newest payload over one pooled keep-alive session;
+    whatever was published while a request was in flight is coalesced into
+    the next one, since the dashboard only cares about the latest state.
+    When the server is unreachable the sender backs off exponentially and
+    newer payloads keep replacing the pending one, so nothing queues up.
+    """
+
+    def __init__(self, url, timeout=0.5, max_backoff=5.0):
+        self.url = url
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+
+        self._pending = None
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+
+        # Counters
+        self.published = 0
+        self.sent = 0
+        self.coalesced = 0  # Replaced by a newer payload before it could be sent
+        self.failed = 0
+        self.last_error = None
+        self.last_sent_at = None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def publish(self, payload):
+        """
+        Hands a payload to the sender without ever blocking on the network.
+        """
+        with self._condition:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = payload
+            self.published += 1
+            self._condition.notify()
+
+    def stop(self, flush_timeout=1.0):
+        """
+        Gives the sender a moment to deliver the last payload, then shuts it down.
+        """
+        deadline = time.time() + flush_timeout
+        while self._pending is not None and self.last_error is None and time.time() < deadline:
+            time.sleep(0.01)
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+        self._thread.join(timeout=self.timeout + 1.0)
+        self.session.close()
+
+    @property
+    def connected(self):
+        return self.last_error is None and self.sent > 0
+
+    def get_stats(self):
+        return {'published': self.published, 'sent': self.sent, 'coalesced': self.coalesced,
+                'failed': self.failed, 'connected': self.connected, 'last_error': self.last_error}
+
+    def _run(self):
+        backoff = 0.0
+        while not self._stop.is_set():
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stop.is_set())
+                if self._stop.is_set():
+                    break
+                payload, self._pending = self._pending, None
+
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                self.sent += 1
+                self.last_sent_at = time.time()
+                self.last_error = None
+                backoff = 0.0
+            except requests.exceptions.RequestException as e:
+                self.failed += 1
+                self.last_error = type(e).__name__
+                # Dashboard down: wait before retrying, newer payloads replace this one meanwhile
+                backoff = min(self.max_backoff, max(self.timeout, backoff * 2))
+                self._stop.wait(backoff)
@@ -0,0 +1,211 @@
+# Save this file as: project/src/vision/tracker.py
+
+import numpy as np
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise IoU between two sets of [x1, y1, x2, y2] boxes.
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)))
+
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def greedy_match(iou, threshold):
+    """
+    Matches rows to columns by repeatedly taking the highest remaining IoU.
+
+    Returns a list of (row, col) pairs plus the unmatched rows and columns.
+    """
+    matches = []
+    if iou.size:
+        iou = iou.copy()
+        while True:
+            row, col = np.unravel_index(np.argmax(iou), iou.shape)
+            if iou[row, col] < threshold:
+                break
+            matches.append((int(row), int(col)))
+            iou[row, :] = -1
+            iou[:, col] = -1
+    matched_rows = {r for r, _ in matches}
+    matched_cols = {c for _, c in matches}
+    unmatched_rows = [r for r in range(iou.shape[0]) if r not in matched_rows]
+    unmatched_cols = [c for c in range(iou.shape[1]) if c not in matched_cols]
+    return matches, unmatched_rows, unmatched_cols
+
+
+class KalmanBoxFilter:
+    """
+    Constant-velocity Kalman filter over the box state [cx, cy, w, h, vx, vy, vw, vh].
+
+    Noise is scaled by the box height, as in SORT/ByteTrack, so that small far-away
+    vehicles and large close ones are tracked with the same relative tolerance.
+    """
+
+    std_position = 1.0 / 20
+    std_velocity = 1.0 / 160
+
+    def __init__(self):
+        self.motion = np.eye(8)
+        self.motion[:4, 4:] = np.eye(4)
+        self.observation = np.eye(4, 8)
+
+    @staticmethod
+    def _to_measurement(box):
+        x1, y1, x2, y2 = box
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+    @staticmethod
+    def to_box(mean):
+        cx, cy, w, h = mean[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+    def initiate(self, box):
+        measurement = self._to_measurement(box)
+        mean = np.concatenate([measurement, np.zeros(4)])
+        h = measurement[3]
+        std = [2 * self.std_position * h] * 4 + [10 * self.std_velocity * h] * 4
+        return mean, np.diag(np.square(std))
+
+    def predict(self, mean, covariance):
+        h = mean[3]
+        std = [self.std_position * h] * 4 + [self.std_velocity * h] * 4
+        mean = self.motion @ mean
+        covariance = self.motion @ covariance @ self.motion.T + np.diag(np.square(std))
+        return mean, covariance
+
+    def update(self, mean, covariance, box):
+        measurement = self._to_measurement(box)
+        h = mean[3]
+        innovation_cov = (self.observation @ covariance @ self.observation.T
+                          + np.diag(np.square([self.std_position * h] * 4)))
+        gain = covariance @ self.observation.T @ np.linalg.inv(innovation_cov)
+        mean = mean + gain @ (measurement - self.observation @ mean)
+        covariance = covariance - gain @ self.observation @ covariance
+        return mean, covariance
+
+
+class Track:
+    def __init__(self, track_id, mean, covariance, score):
+        self.track_id = track_id
+        self.mean = mean
+        self.covariance = covariance
+        self.score = score
+        self.hits = 1
+        self.frames_since_update = 0
+
+    @property
+    def box(self):
+        return KalmanBoxFilter.to_box(self.mean)
+
+
+class ByteTracker:
+    """
+    Lightweight ByteTrack-style multi-object tracker written in pure NumPy.
+
+    High-confidence detections are associated with all live tracks first; the
+    tracks left over then get a second chance against the low-confidence
+    detections, which keeps IDs alive through partial occlusion. Unmatched
+    high-confidence detections start new tracks, and tracks that go unmatched
+    for more than `max_age` frames are dropped.
+    """
+
+    def __init__(self, high_thresh=0.3, low_thresh=0.1, new_track_thresh=0.3,
+                 match_iou=0.3, low_match_iou=0.5, max_age=30):
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.new_track_thresh = new_track_thresh
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_age = max_age
+
+        self.kalman = KalmanBoxFilter()
+        self.tracks = []
+        self.removed_ids = []
+        self._next_id = 1
+
+    def update(self, boxes, scores):
+        """
+        Advances the tracker by one frame.
+
+        Args:
+            boxes: (N, 4) array of [x1, y1, x2, y2] detections.
+            scores: (N,) array of detection confidences.
+
+        Returns:
+            An (N,) int array with the track ID assigned to each detection, or -1
+            for low-confidence detections that did not continue any track.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        track_ids = np.full(len(boxes), -1, dtype=np.int64)
+        self.removed_ids = []
+
+        for track in self.tracks:
+            track.mean, track.covariance = self.kalman.predict(track.mean, track.covariance)
+
+        high = np.flatnonzero(scores >= self.high_thresh)
+        low = np.flatnonzero((scores >= self.low_thresh) & (scores < self.high_thresh))
+
+        # First association: every track against the confident detections
+        track_boxes = np.array([t.box for t in self.tracks]).reshape(-1, 4)
+        matches, unmatched_tracks, unmatched_high = greedy_match(
+            box_iou(track_boxes, boxes[high]), self.match_iou)
+        updated = set()
+        for t, d in matches:
+            self._apply(self.tracks[t], high[d], boxes, scores, track_ids)
+            updated.add(self.tracks[t].track_id)
+
+        # Second association: tracks still visible last frame against weak detections
+        recent = [t for t in unmatched_tracks if self.tracks[t].frames_since_update == 0]
+        matches, _, _ = greedy_match(
+            box_iou(track_boxes[recent], boxes[low]), self.low_match_iou)
+        for t, d in matches:
+            self._apply(self.tracks[recent[t]], low[d], boxes, scores, track_ids)
+            updated.add(self.tracks[recent[t]].track_id)
+
+        # Age every track that was not refreshed this frame
+        for track in self.tracks:
+            if track.track_id not in updated:
+                track.frames_since_update += 1
+
+        # Unmatched confident detections start new tracks
+        for d in unmatched_high:
+            det = high[d]
+            if scores[det] < self.new_track_thresh:
+                continue
+            mean, covariance = self.kalman.initiate(boxes[det])
+            track = Track(self._next_id, mean, covariance, scores[det])
+            self._next_id += 1
+            self.tracks.append(track)
+            track_ids[det] = track.track_id
+
+        alive = []
+        for track in self.tracks:
+            if track.frames_since_update > self.max_age:
+                self.removed_ids.append(track.track_id)
+            else:
+                alive.append(track)
+        self.tracks = alive
+
+        return track_ids
+
+    def _apply(self, track, det, boxes, scores, track_ids):
+        track.mean, track.covariance = self.kalman.update(track.mean, track.covariance, boxes[det])
+        track.score = scores[det]
+        track.hits += 1
+        track.frames_since_update = 0
+        track_ids[det] = track.track_id
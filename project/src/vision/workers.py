@@ -0,0 +1,248 @@
+# Save this file as: project/src/vision/workers.py
+
+import multiprocessing as mp
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from detections import Detections
+from sources import open_source
+
+# Latest results of one camera as seen by the orchestrator
+CameraSnapshot = namedtuple('CameraSnapshot', ['queue_counts', 'detections', 'frame', 'timestamp', 'position', 'seq'])
+
+DETECTION_COLUMNS = 8  # x1, y1, x2, y2, conf, cls, track_id, zone_id
+
+
+class SharedCameraState:
+    """
+    Ring buffer in one multiprocessing.shared_memory block, written by a camera
+    worker and read by the orchestrator without pickling or copying through pipes.
+
+    Layout (all slots the same size):
+        header      int64[2 + slots]              seq, latest slot, detection count per slot
+        meta        float64[slots, 2 + zones]     timestamp, source position, zone counts...
+        detections  float64[slots, max_det, 8]    one row per vehicle
+        frames      uint8[slots, H, W, 3]         optional copy of the analysed frame
+
+    The writer fills the slot after the latest one and only then publishes it
+    by bumping `seq`. A reader copies the latest slot and re-checks `seq`; the
+    copy is consistent unless the writer lapped the whole ring meanwhile.
+    """
+
+    def __init__(self, num_zones, frame_shape=None, slots=3, max_detections=256, name=None, create=False):
+        self.num_zones = num_zones
+        self.frame_shape = tuple(frame_shape) if frame_shape is not None else None
+        self.slots = slots
+        self.max_detections = max_detections
+
+        shapes = [('header', np.int64, (2 + slots,)),
+                  ('meta', np.float64, (slots, 2 + num_zones)),
+                  ('detections', np.float64, (slots, max_detections, DETECTION_COLUMNS))]
+        if self.frame_shape is not None:
+            shapes.append(('frames', np.uint8, (slots,) + self.frame_shape))
+
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, dtype, shape in shapes)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self.shm.name
+
+        offset = 0
+        for field, dtype, shape in shapes:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, field, array)
+            offset += array.nbytes
+        if create:
+            self.header[:] = 0
+        if self.frame_shape is None:
+            self.frames = None
+
+    def spec(self):
+        """
+        Everything another process needs to attach to this block.
+        """
+        return {'name': self.name, 'num_zones': self.num_zones, 'frame_shape': self.frame_shape,
+                'slots': self.slots, 'max_detections': self.max_detections}
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec['num_zones'], spec['frame_shape'], spec['slots'], spec['max_detections'], name=spec['name'])
+
+    def write(self, queue_counts, detections, frame, timestamp, position):
+        seq = int(self.header[0])
+        slot = (seq + 1) % self.slots
+
+        n = min(len(detections), self.max_detections)
+        rows = self.detections[slot]
+        rows[:n, :4] = detections.boxes[:n]
+        rows[:n, 4] = detections.confidence[:n]
+        rows[:n, 5] = detections.class_id[:n]
+        rows[:n, 6] = detections.tracker_id[:n]
+        rows[:n, 7] = detections.zone_id[:n]
+        self.header[2 + slot] = n
+
+        self.meta[slot, 0] = timestamp
+        self.meta[slot, 1] = position
+        self.meta[slot, 2:] = queue_counts[:self.num_zones]
+
+        if self.frames is not None and frame is not None and frame.shape == self.frame_shape:
+            self.frames[slot] = frame
+
+        # Publish only after the slot is complete
+        self.header[1] = slot
+        self.header[0] = seq + 1
+
+    def read_latest(self):
+        """
+        Returns a CameraSnapshot of the newest published slot, or None before the first write.
+        """
+        while True:
+            seq = int(self.header[0])
+            if seq == 0:
+                return None
+            slot = int(self.header[1])
+            n = int(self.header[2 + slot])
+            meta = self.meta[slot].copy()
+            rows = self.detections[slot, :n].copy()
+            frame = self.frames[slot].copy() if self.frames is not None else None
+            if int(self.header[0]) - seq < self.slots - 1:
+                break  # The writer did not reach our slot while we were copying
+
+        detections = Detections(rows[:, :4], rows[:, 5], rows[:, 4], rows[:, 6], rows[:, 7])
+        queue_counts = [int(c) for c in meta[2:]]
+        return CameraSnapshot(queue_counts, detections, frame, float(meta[0]), int(meta[1]), seq)
+
+    def close(self, unlink=False):
+        # Drop our views before closing, otherwise the buffer is still exported
+        self.header = self.meta = self.detections = self.frames = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def camera_worker(camera_id, source_uri, polygons, state_spec, source_kwargs, processor_kwargs, stop_event):
+    """
+    Entry point of a camera worker process: decode, detect, count, publish.
+    """
+    # Imported here, in the child only: the orchestrator (run_live) keeps its
+    # heavy imports inside main(), so the spawn re-import of it stays cheap
+    from processor import VisionProcessor
+
+    state = SharedCameraState.attach(state_spec)
+    source = open_source(source_uri, **source_kwargs)
+    processor = VisionProcessor(**processor_kwargs)
+    print(f"👷 Camera worker {camera_id} ready ({source_uri})")
+
+    try:
+        while not stop_event.is_set():
+            try:
+                frame = source.read_frame(timeout=1.0)
+            except TimeoutError:
+                continue  # Camera outage: the source keeps reconnecting, we keep checking stop_event
+            if frame is None:
+                break
+            queue_counts, detections = processor.process_frame(frame.image, polygons, camera_id=camera_id)
+            state.write(queue_counts, detections, frame.image, frame.timestamp, frame.index)
+    finally:
+        source.release()
+        if processor.recognizer is not None:
+            processor.recognizer.stop()
+        state.close()
+
+
+class CameraWorkerPool:
+    """
+    One VisionProcessor per camera, each in its own process.
+
+    Decode, inference, tracking and counting run outside the orchestrator's
+    GIL; results come back through SharedCameraState ring buffers, so the
+    orchestrator only reads the latest per-zone counts (and, with
+    `share_frames`, the analysed frame for display).
+    """
+
+    def __init__(self, cameras, share_frames=True, source_kwargs=None, processor_kwargs=None):
+        """
+        Args:
+            cameras: A list of (source_uri, polygons) pairs, one per camera.
+            share_frames: Also publish each analysed frame, e.g. for run_live's windows.
+            source_kwargs: Passed to open_source in every worker (frame_skip, loop, live).
+            processor_kwargs: Passed to VisionProcessor in every worker.
+        """
+        self.cameras = cameras
+        self.source_kwargs = source_kwargs or {}
+        self.processor_kwargs = processor_kwargs or {}
+        self._ctx = mp.get_context('spawn')  # Same behaviour on Linux, macOS and Windows
+        self._stop_event = self._ctx.Event()
+        self._processes = []
+        self._last_seq = [0] * len(cameras)
+
+        self.states = []
+        for uri, polygons in cameras:
+            frame_shape = self._probe_frame_shape(uri) if share_frames else None
+            self.states.append(SharedCameraState(len(polygons), frame_shape, create=True))
+
+    @staticmethod
+    def _probe_frame_shape(uri, timeout=30.0):
+        source = open_source(uri)
+        try:
+            frame = source.read_frame(timeout=timeout)
+            return frame.image.shape if frame is not None else None
+        except TimeoutError:
+            print(f"⚠️  No frame from {uri} in {timeout:.0f}s, its analysed frames will not be shared")
+            return None
+        finally:
+            source.release()
+
+    def start(self):
+        for camera_id, ((uri, polygons), state) in enumerate(zip(self.cameras, self.states)):
+            process = self._ctx.Process(
+                target=camera_worker, name=f"camera-worker-{camera_id}", daemon=True,
+                args=(camera_id, uri, polygons, state.spec(), self.source_kwargs,
+                      self.processor_kwargs, self._stop_event))
+            process.start()
+            self._processes.append(process)
+
+    def is_alive(self):
+        return any(p.is_alive() for p in self._processes)
+
+    def latest(self, camera_id):
+        return self.states[camera_id].read_latest()
+
+    def latest_counts(self):
+        """
+        Concatenated latest zone counts of all cameras (zeros until a camera reports).
+        """
+        counts = []
+        for (_, polygons), state in zip(self.cameras, self.states):
+            snapshot = state.read_latest()
+            counts += snapshot.queue_counts if snapshot is not None else [0] * len(polygons)
+        return counts
+
+    def read_latest(self, timeout=None):
+        """
+        Waits until the first camera publishes something new, then returns the
+        latest snapshot of every camera. Returns None once the workers are gone.
+
+        Waits through camera outages, since the workers' sources reconnect; with
+        `timeout`, raises TimeoutError when nothing new arrives in time.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while deadline is None or time.time() < deadline:
+            snapshots = [state.read_latest() for state in self.states]
+            if all(s is not None for s in snapshots) and snapshots[0].seq > self._last_seq[0]:
+                self._last_seq = [s.seq for s in snapshots]
+                return snapshots
+            if not self.is_alive():
+                return None
+            time.sleep(0.002)
+        raise TimeoutError(f"No new camera snapshot in {timeout:.1f}s")
+
+    def stop(self):
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        for state in self.states:
+            state.close(unlink=True)
@@ -0,0 +1,109 @@
+# Save this file as: project/src/vision/zones.py
+
+import cv2
+import numpy as np
+
+
+def compile_zone_mask(frame_shape, polygons):
+    """
+    Rasterizes the counting polygons into an integer label mask.
+
+    Pixel value 0 means "no zone", value i + 1 means polygon i. Polygons are
+    drawn in reverse order so that, where zones overlap, the first polygon wins,
+    matching the old "break on first match" behaviour of the per-box loop.
+    """
+    height, width = frame_shape[:2]
+    dtype = np.uint8 if len(polygons) < 255 else np.uint16
+    mask = np.zeros((height, width), dtype=dtype)
+    for label in range(len(polygons), 0, -1):
+        polygon = np.asarray(polygons[label - 1], dtype=np.int32).reshape(-1, 1, 2)
+        cv2.fillPoly(mask, [polygon], int(label))
+        # fillPoly can miss a few pixels on the outline; pointPolygonTest counted them
+        cv2.polylines(mask, [polygon], isClosed=True, color=int(label), thickness=1)
+    return mask
+
+
+def lookup_zones(mask, anchors):
+    """
+    Returns the zone index of every anchor point (-1 when outside all zones).
+    """
+    anchors = np.asarray(anchors, dtype=np.int64).reshape(-1, 2)
+    if len(anchors) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    height, width = mask.shape[:2]
+    xs, ys = anchors[:, 0], anchors[:, 1]
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+
+    labels = np.zeros(len(anchors), dtype=np.int64)
+    labels[inside] = mask[ys[inside], xs[inside]]
+    return labels - 1
+
+
+def count_zones(zone_ids, num_zones):
+    """
+    Counts how many anchors fall into each zone, given the output of lookup_zones.
+    """
+    zone_ids = np.asarray(zone_ids, dtype=np.int64)
+    counts = np.bincount(zone_ids[zone_ids >= 0], minlength=num_zones)
+    return [int(c) for c in counts[:num_zones]]
+
+
+class ZoneMaskCache:
+    """
+    Keeps one compiled label mask per camera.
+
+    A mask is rebuilt only when the frame size or the polygons of that camera
+    change, so the common case is a single dictionary lookup per frame.
+    """
+
+    def __init__(self):
+        self._masks = {}
+
+    @staticmethod
+    def _key(frame_shape, polygons):
+        return (tuple(frame_shape[:2]),
+                tuple(np.asarray(p, dtype=np.int32).tobytes() for p in polygons))
+
+    def get(self, camera_id, frame_shape, polygons):
+        key = self._key(frame_shape, polygons)
+        cached = self._masks.get(camera_id)
+        if cached is None or cached[0] != key:
+            cached = (key, compile_zone_mask(frame_shape, polygons))
+            self._masks[camera_id] = cached
+        return cached[1]
+
+    def invalidate(self, camera_id=None):
+        if camera_id is None:
+            self._masks.clear()
+        else:
+            self._masks.pop(camera_id, None)
+
+
+def zone_rois(frame_shape, polygons, mode='union', padding=32):
+    """
+    Returns the [x1, y1, x2, y2] regions the detector should look at.
+
+    mode='union' gives one box around all zones of the camera, mode='tiles' one
+    box per zone. Boxes are padded so vehicles straddling a zone edge are still
+    seen whole, and clipped to the frame.
+    """
+    height, width = frame_shape[:2]
+    rects = []
+    for polygon in polygons:
+        x, y, w, h = cv2.boundingRect(np.asarray(polygon, dtype=np.int32))
+        rects.append([x, y, x + w, y + h])
+    if not rects:
+        return [[0, 0, width, height]]
+
+    rects = np.array(rects)
+    if mode == 'union':
+        rects = np.array([[rects[:, 0].min(), rects[:, 1].min(), rects[:, 2].max(), rects[:, 3].max()]])
+    elif mode != 'tiles':
+        raise ValueError(f"Unknown ROI mode: {mode}")
+
+    rects[:, :2] -= padding
+    rects[:, 2:] += padding
+    rects[:, [0, 2]] = np.clip(rects[:, [0, 2]], 0, width)
+    rects[:, [1, 3]] = np.clip(rects[:, [1, 3]], 0, height)
+    return [r for r in rects.tolist() if r[2] > r[0] and r[3] > r[1]]
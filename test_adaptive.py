@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+🧪 Adaptive Resolution Test
+==========================
+Regression tests for the latency feedback loop that steps the detector's
+image size and model down under load and back up once there is headroom
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from adaptive import ResolutionController
+
+
+def controller(**kwargs):
+    options = dict(sizes=(640, 320), models=('big.pt', 'small.pt'), smoothing=1.0, headroom=0.6, cooldown=3)
+    options.update(kwargs)
+    return ResolutionController(100.0, **options)
+
+
+def feed(control, latency_ms, times, frames=1):
+    for _ in range(times):
+        control.record(latency_ms, frames=frames)
+
+
+def test_ladder_goes_from_best_to_cheapest():
+    assert controller().levels == [('big.pt', 640), ('big.pt', 320), ('small.pt', 640), ('small.pt', 320)]
+
+
+def test_steps_down_over_budget_and_back_up_with_headroom():
+    control = controller()
+    feed(control, 150.0, 2)
+    assert control.level == 0  # Still in the cooldown
+    feed(control, 150.0, 1)
+    assert (control.model_name, control.imgsz) == ('big.pt', 320)
+    feed(control, 150.0, 6)
+    assert (control.model_name, control.imgsz) == ('small.pt', 320)
+    feed(control, 150.0, 6)
+    assert control.level == 3  # Nothing cheaper left
+
+    # Inside the budget but above the headroom: stay
+    feed(control, 80.0, 6)
+    assert control.level == 3
+    feed(control, 50.0, 3)
+    assert control.level == 2
+    feed(control, 50.0, 6)
+    assert control.level == 0
+    feed(control, 10.0, 6)
+    assert control.level == 0
+
+
+def test_batched_latency_is_compared_per_frame():
+    # 4 cameras in 240 ms is 60 ms a frame: inside a 100 ms budget
+    control = controller()
+    feed(control, 240.0, 6, frames=4)
+    assert control.level == 0
+    assert control.log[-1]['latency_ms'] == 60.0 and control.log[-1]['frames'] == 4
+
+    # The same batch time for a single frame is over budget
+    feed(control, 240.0, 3, frames=1)
+    assert control.level == 1
+
+
+def test_smoothing_absorbs_a_single_spike():
+    control = controller(smoothing=0.3, cooldown=1)
+    feed(control, 70.0, 5)
+    control.record(150.0)  # 70 + 0.3 * 80 = 94 ms, within budget
+    assert control.level == 0
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
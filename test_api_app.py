@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+🧪 API Server Test
+=================
+Socket.io and HTTP tests against api/app.py, imported from a temporary copy
+of the tracked files so its telemetry database and model registry live
+outside the working tree
+"""
+
+import atexit
+import importlib.util
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent
+_server = None
+
+
+def server():
+    """
+    The api/app.py module, imported once per test run.
+    """
+    global _server
+    if _server is None:
+        tree = Path(tempfile.mkdtemp(prefix='traffic-api-'))
+        atexit.register(shutil.rmtree, tree, ignore_errors=True)
+        files = subprocess.run(['git', 'ls-files', '-z', 'config.json', 'project/src'], cwd=ROOT,
+                               capture_output=True, check=True).stdout.decode().split('\0')
+        for name in filter(None, files):
+            (tree / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(ROOT / name, tree / name)
+
+        api = tree / 'project' / 'src' / 'api'
+        sys.path.insert(0, str(api))
+        spec = importlib.util.spec_from_file_location('traffic_api_app', api / 'app.py')
+        _server = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_server)
+    return _server
+
+
+def received(client, name):
+    return [message['args'][0] for message in client.get_received() if message['name'] == name]
+
+
+def wait_for(client, name, timeout=2.0):
+    """
+    Messages of one event, waiting for the broadcaster's next flush.
+    """
+    deadline = time.time() + timeout
+    messages = []
+    while time.time() < deadline and not messages:
+        time.sleep(0.05)
+        messages = received(client, name)
+    return messages
+
+
+def ingest(updates):
+    response = server().app.test_client().post('/api/update_traffic', json=updates)
+    return response.status_code, response.get_json()
+
+
+def test_subscribe_joins_only_known_intersections():
+    app = server()
+    client = app.socketio.test_client(app.app)
+    client.get_received()
+
+    client.emit('subscribe', {'intersection': 'nowhere'})
+    errors = received(client, 'subscribe_error')
+    assert errors and errors[0]['intersection'] == 'nowhere'
+    assert 'nowhere' not in app.intersections
+
+    client.emit('subscribe', {'intersection': 'default'})
+    subscribed = received(client, 'subscribed')
+    assert subscribed and subscribed[0]['intersection'] == 'default'
+    client.disconnect()
+
+
+def test_pushes_reach_only_the_subscribed_room():
+    app = server()
+    assert ingest({'queues': [1, 2], 'action': 'KEEP', 'intersection': 'rooms-north'})[0] == 200
+    assert ingest({'queues': [3, 4], 'action': 'KEEP', 'intersection': 'rooms-south'})[0] == 200
+    north = app.socketio.test_client(app.app)
+    south = app.socketio.test_client(app.app)
+    north.emit('subscribe', {'intersection': 'rooms-north'})
+    south.emit('subscribe', {'intersection': 'rooms-south'})
+    north.get_received()
+    south.get_received()
+
+    ingest({'queues': [5, 6], 'action': 'SWITCH', 'intersection': 'rooms-north'})
+    pushes = wait_for(north, 'traffic_update')
+    assert pushes[-1]['queues'] == [5, 6]
+    assert {p['intersection'] for p in pushes} == {'rooms-north'}
+    assert all(p['intersection'] == 'rooms-south' for p in received(south, 'traffic_update'))
+
+    # After unsubscribing, the room's pushes stop
+    north.emit('unsubscribe', {'intersection': 'rooms-north'})
+    ingest({'queues': [7, 8], 'action': 'KEEP', 'intersection': 'rooms-north'})
+    time.sleep(0.5)
+    assert received(north, 'traffic_update') == []
+    north.disconnect()
+    south.disconnect()
+
+
+def test_unknown_intersection_lookups_are_404():
+    app = server()
+    client = app.app.test_client()
+    assert client.get('/api/intersections/never-reported').status_code == 404
+    assert client.get('/api/intersections/default').status_code == 200
+    assert 'never-reported' not in app.intersections
+
+
+def test_history_is_kept_only_for_registered_intersections():
+    app = server()
+    assert ingest({'queues': [1, 2], 'action': 'KEEP', 'intersection': 'history-east'})[0] == 200
+    assert 'history-east' in app.intersections and 'history-east' in app.history
+    dropped = app.history.dropped
+    assert not app.history.record('history-nowhere', time.time(), [1, 2], 'KEEP')
+    assert 'history-nowhere' not in app.history and app.history.dropped == dropped + 1
+
+
+class ParityPolicy:
+    """
+    SWITCH when the first queue is longer than the second, with the
+    HotSwapPolicy attributes /api/stats reports.
+    """
+
+    version, shadow_version = 'parity', None
+
+    def get_stats(self):
+        return {}
+
+    def predict(self, observations, state=None, episode_start=None, deterministic=False):
+        observations = np.asarray(observations)
+        return (observations[..., 0] > observations[..., 1]).astype(np.int64), state
+
+
+def with_model(app):
+    """
+    Serves ParityPolicy through the server's inference queue.
+    """
+    if getattr(app, '_test_queue', None) is None:
+        app._test_queue = app.InferenceQueue(ParityPolicy(), max_wait_ms=1.0).start()
+    app.model, app.inference_queue = ParityPolicy(), app._test_queue
+    return app
+
+
+def test_predictions_for_unknown_intersections_are_rejected():
+    app = with_model(server())
+    client = app.socketio.test_client(app.app)
+    client.get_received()
+    known = len(app.intersections)
+
+    client.emit('get_ai_action', {'queues': [3, 1], 'intersection': 'made-up-junction'})
+    errors = received(client, 'error')
+    assert errors and errors[0]['intersection'] == 'made-up-junction'
+    assert received(client, 'ai_action_response') == []
+    assert len(app.intersections) == known and 'made-up-junction' not in app.intersections
+    assert 'made-up-junction' not in app.history
+
+    client.emit('get_ai_action', {'queues': [3, 1]})
+    responses = received(client, 'ai_action_response')
+    assert responses and responses[0]['action_str'] == 'SWITCH' and responses[0]['intersection'] == 'default'
+    client.disconnect()
+
+
+def scraped(app, sample):
+    text = app.app.test_client().get('/metrics').get_data(as_text=True)
+    values = [float(line.split()[-1]) for line in text.splitlines() if line.startswith(sample + ' ')]
+    return values[0] if values else 0.0
+
+
+def test_decision_latency_metric_includes_the_queue_wait():
+    app = with_model(server())
+    client = app.socketio.test_client(app.app)
+    decisions = scraped(app, 'traffic_decision_seconds_count')
+    batches = scraped(app, 'traffic_inference_batch_seconds_count')
+
+    client.emit('get_ai_action', {'queues': [1, 3]})
+    assert received(client, 'ai_action_response')[0]['action_str'] == 'KEEP'
+    # End to end under its own name; the policy call alone is the batch histogram
+    assert scraped(app, 'traffic_decision_seconds_count') == decisions + 1
+    assert scraped(app, 'traffic_inference_batch_seconds_count') == batches + 1
+    assert scraped(app, 'traffic_model_predict_seconds_count') == 0
+    client.disconnect()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
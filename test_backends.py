@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+🧪 Detector Backend Test
+=======================
+Regression tests for the ONNX Runtime backend's letterbox pre-processing and
+its confidence filter, class-aware NMS and box mapping, with a scripted
+session standing in for a real exported model
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from backends import OnnxRuntimeBackend, letterbox, load_backend_settings, preprocess
+
+NUM_CLASSES = 3
+SIZE = 64
+
+
+class ScriptedSession:
+    """
+    onnxruntime.InferenceSession stand-in returning a fixed (B, 4 + classes, anchors) output.
+    """
+
+    def __init__(self, output):
+        self.output = np.asarray(output, dtype=np.float32)
+        self.feeds = []
+
+    def run(self, output_names, feed):
+        self.feeds.append(feed)
+        return [self.output[:len(feed['images'])]]
+
+
+def scripted_backend(output, **kwargs):
+    # The session is all __init__ would build from the .onnx file
+    backend = OnnxRuntimeBackend.__new__(OnnxRuntimeBackend)
+    backend.session, backend.input_name, backend.imgsz = ScriptedSession(output), 'images', SIZE
+    backend.conf_threshold, backend.iou_threshold, backend.max_detections = 0.25, 0.7, 300
+    for name, value in kwargs.items():
+        setattr(backend, name, value)
+    return backend
+
+
+def anchors(rows, count=8):
+    """
+    (4 + classes, count) model output from (xywh in letterbox pixels, class, score) rows.
+    """
+    output = np.zeros((4 + NUM_CLASSES, count), dtype=np.float32)
+    for i, ((x, y, w, h), class_id, score) in enumerate(rows):
+        output[:4, i] = x, y, w, h
+        output[4 + class_id, i] = score
+    return output
+
+
+def test_letterbox_keeps_the_aspect_ratio_and_centres_the_image():
+    image = np.full((128, 256, 3), 255, dtype=np.uint8)
+    padded, scale, (pad_x, pad_y) = letterbox(image, SIZE)
+    assert padded.shape == (SIZE, SIZE, 3) and scale == 0.25 and (pad_x, pad_y) == (0, 16)
+    assert (padded[:16] == 114).all() and (padded[48:] == 114).all() and (padded[16:48] == 255).all()
+
+    # Odd padding puts the extra pixel at the bottom/right, like ultralytics
+    padded, scale, (pad_x, pad_y) = letterbox(np.zeros((64, 35, 3), dtype=np.uint8), SIZE)
+    assert padded.shape == (SIZE, SIZE, 3) and (pad_x, pad_y) == (14, 0)
+    assert (padded[:, :14] == 114).all() and (padded[:, 49:] == 114).all()
+
+
+def test_preprocess_builds_an_rgb_nchw_batch():
+    image = np.zeros((SIZE, SIZE, 3), dtype=np.uint8)
+    image[..., 0] = 255  # Blue in BGR
+    batch, transforms = preprocess([image, image[:32]], SIZE)
+    assert batch.shape == (2, 3, SIZE, SIZE) and batch.dtype == np.float32
+    assert (batch[0, 2] == 1.0).all() and (batch[0, 0] == 0.0).all()
+    assert transforms[0] == (1.0, (0, 0), (SIZE, SIZE)) and transforms[1] == (1.0, (0, 16), (32, SIZE))
+
+
+def test_decode_filters_suppresses_and_maps_back_to_each_frame():
+    wide = np.zeros((128, 256, 3), dtype=np.uint8)   # scale 0.25, pad (0, 16)
+    square = np.zeros((128, 128, 3), dtype=np.uint8)  # scale 0.5, no padding
+    output = np.stack([
+        anchors([
+            ((24, 32, 16, 16), 2, 0.9),   # Frame box [64, 32, 128, 96]
+            ((25, 32, 16, 16), 2, 0.6),   # Same car, same class: suppressed
+            ((25, 32, 16, 16), 1, 0.5),   # Same place, other class: kept
+            ((48, 20, 8, 8), 0, 0.2),     # Under the confidence threshold
+            ((62, 40, 8, 8), 0, 0.4),     # Crosses the right edge: clipped
+        ]),
+        anchors([((16, 16, 8, 8), 2, 0.8)]),
+    ])
+    backend = scripted_backend(output)
+    first, second = backend.detect([wide, square])
+
+    assert backend.session.feeds[0]['images'].shape == (2, 3, SIZE, SIZE)
+    assert first.boxes.tolist() == [[64, 32, 128, 96], [68, 32, 132, 96], [232, 80, 256, 112]]
+    assert first.class_id.tolist() == [2, 1, 0]
+    assert np.allclose(first.confidence, [0.9, 0.5, 0.4])
+    assert second.boxes.tolist() == [[24, 24, 40, 40]] and second.class_id.tolist() == [2]
+
+    # A lower per-call threshold keeps the weak box for the tracker
+    weak, _ = backend.detect([wide, square], conf=0.1)
+    assert len(weak) == 4 and [176, 0, 208, 32] in weak.boxes.tolist()
+
+
+def test_decode_caps_detections_and_handles_empty_output():
+    rows = [((8 + 12 * i, 32, 8, 8), 2, 0.9 - 0.1 * i) for i in range(5)]
+    backend = scripted_backend(np.stack([anchors(rows)]), max_detections=2)
+    image = np.zeros((SIZE, SIZE, 3), dtype=np.uint8)
+    detections = backend.detect([image])[0]
+    assert len(detections) == 2 and np.allclose(detections.confidence, [0.9, 0.8])
+
+    empty = scripted_backend(np.stack([anchors([])])).detect([image])[0]
+    assert len(empty) == 0 and empty.boxes.shape == (0, 4)
+
+
+def test_backend_settings_fall_back_to_defaults():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Path(tmp) / 'config.json'
+        config.write_text(json.dumps({'detection_settings': {'backend': 'onnxruntime', 'onnx': {'threads': 2}}}))
+        settings = load_backend_settings(config)
+        assert settings['backend'] == 'onnxruntime'
+        assert settings['onnx']['threads'] == 2 and settings['onnx']['int8'] is False
+        assert load_backend_settings(Path(tmp) / 'missing.json')['backend'] == 'ultralytics'
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
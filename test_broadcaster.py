@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+🧪 Broadcaster Test
+==================
+Regression tests for the coalescing dashboard broadcaster: bursts collapse
+into one emit per channel carrying the newest payload, and the background
+task holds emits to max_rate_hz, with a recording stand-in for Flask-SocketIO
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "api"))
+from broadcaster import COALESCED, Broadcaster
+
+
+class RecordingSocketIO:
+    """
+    Flask-SocketIO stand-in recording every emit, with real threads for the background task.
+    """
+
+    def __init__(self, fail_events=()):
+        self.emits = []
+        self.fail_events = set(fail_events)
+        self.threads = []
+
+    def emit(self, event, data, to=None, namespace=None):
+        if event in self.fail_events:
+            raise ConnectionError("client went away")
+        self.emits.append((event, data, to, namespace))
+
+    def start_background_task(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return thread
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+def test_burst_collapses_to_the_newest_payload_per_channel():
+    socketio = RecordingSocketIO()
+    broadcaster = Broadcaster(socketio)
+    before = COALESCED._values.get(('traffic_update',), 0)
+    for i in range(100):
+        broadcaster.publish('traffic_update', {'frame': i}, room='north')
+    broadcaster.publish('traffic_update', {'frame': 'south'}, room='south')
+    broadcaster.publish('stats', {'fps': 30}, namespace='/ingest')
+    broadcaster.flush()
+
+    assert sorted(socketio.emits, key=str) == sorted([
+        ('traffic_update', {'frame': 99}, 'north', None),
+        ('traffic_update', {'frame': 'south'}, 'south', None),
+        ('stats', {'fps': 30}, None, '/ingest'),
+    ], key=str)
+    stats = broadcaster.get_stats()
+    assert stats['published'] == 102 and stats['emitted'] == 3 and stats['coalesced'] == 99
+    assert stats['channels']['traffic_update@north'] == {'published': 100, 'emitted': 1, 'coalesced': 99}
+    assert stats['channels']['stats@*'] == {'published': 1, 'emitted': 1, 'coalesced': 0}
+    assert COALESCED._values[('traffic_update',)] - before == 99
+
+    # Nothing changed since the last flush: nothing is sent again
+    broadcaster.flush()
+    assert len(socketio.emits) == 3
+
+
+def test_failed_emit_does_not_stop_other_channels():
+    socketio = RecordingSocketIO(fail_events={'broken'})
+    broadcaster = Broadcaster(socketio)
+    broadcaster.publish('broken', {'x': 1})
+    broadcaster.publish('traffic_update', {'x': 2}, room='north')
+    broadcaster.flush()
+
+    assert socketio.emits == [('traffic_update', {'x': 2}, 'north', None)]
+    stats = broadcaster.get_stats()
+    assert stats['emitted'] == 1 and stats['channels']['broken@*']['emitted'] == 0
+    # The failed payload is dropped rather than retried on the next tick
+    broadcaster.flush()
+    assert len(socketio.emits) == 1
+
+
+def test_background_task_holds_emits_to_the_rate_limit():
+    socketio = RecordingSocketIO()
+    broadcaster = Broadcaster(socketio, max_rate_hz=20.0).start()
+    broadcaster.start()  # Already running: no second task
+    assert len(socketio.threads) == 1
+
+    deadline = time.monotonic() + 0.5
+    published = 0
+    while time.monotonic() < deadline:
+        broadcaster.publish('traffic_update', {'frame': published}, room='north')
+        published += 1
+        time.sleep(0.001)
+    time.sleep(0.1)  # The last tick picks up the final payload
+    broadcaster.stop()
+    socketio.threads[0].join(timeout=1.0)
+    assert not socketio.threads[0].is_alive()
+
+    # About 0.6s at 20Hz, whatever the publish rate
+    assert published > 100 and 5 <= len(socketio.emits) <= 15
+    frames = [data['frame'] for _, data, _, _ in socketio.emits]
+    assert frames == sorted(frames) and frames[-1] == published - 1
+    stats = broadcaster.get_stats()
+    assert stats['max_rate_hz'] == 20.0 and stats['published'] == published
+    assert stats['emitted'] + stats['coalesced'] == published
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
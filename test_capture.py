@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+🧪 Prefetched Capture Test
+=========================
+Regression tests for the decode-ahead capture: frame skipping with grab(),
+the bounded buffer and end of stream, with a counting stand-in for
+cv2.VideoCapture and a small video file written on the fly
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+import capture
+from capture import PrefetchedCapture
+from sources import FileSource
+
+
+class CountingCapture:
+    """
+    cv2.VideoCapture stand-in over `frames` frames, counting grabs and decodes.
+    """
+
+    frames = 10
+    instances = []
+
+    def __init__(self, source):
+        self.next_index = 1
+        self.grabs = 0
+        self.decodes = 0
+        self.lock = threading.Lock()
+        CountingCapture.instances.append(self)
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FPS: 30.0, cv2.CAP_PROP_FRAME_COUNT: float(self.frames)}.get(prop, 0.0)
+
+    def grab(self):
+        with self.lock:
+            if self.next_index > self.frames:
+                return False
+            self.grabs += 1
+            self.next_index += 1
+            return True
+
+    def read(self):
+        with self.lock:
+            if self.next_index > self.frames:
+                return False, None
+            self.decodes += 1
+            frame = np.full((2, 2, 3), self.next_index, dtype=np.uint8)
+            self.next_index += 1
+            return True, frame
+
+    def release(self):
+        pass
+
+
+@contextmanager
+def counting_capture(frames):
+    original = cv2.VideoCapture
+    CountingCapture.frames, CountingCapture.instances = frames, []
+    capture.cv2.VideoCapture = CountingCapture
+    try:
+        yield CountingCapture.instances
+    finally:
+        capture.cv2.VideoCapture = original
+
+
+def read_all(cap):
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            return frames
+        frames.append((cap.position, int(frame[0, 0, 0])))
+
+
+def test_skipped_frames_are_grabbed_not_decoded():
+    with counting_capture(10) as instances:
+        cap = PrefetchedCapture('video.mp4', frame_skip=3)
+        frames = read_all(cap)
+        # Every third frame, with its source frame number
+        assert frames == [(3, 3), (6, 6), (9, 9)]
+        assert instances[0].decodes == 3 and instances[0].grabs == 7
+        assert cap.get(cv2.CAP_PROP_FPS) == 30.0
+        cap.release()
+
+
+def test_end_of_stream_is_sticky():
+    with counting_capture(2):
+        cap = PrefetchedCapture('video.mp4')
+        assert [cap.read()[0] for _ in range(5)] == [True, True, False, False, False]
+        assert cap.position == 2
+        cap.release()
+
+
+def test_full_buffer_holds_the_producer_back():
+    with counting_capture(100) as instances:
+        cap = PrefetchedCapture('video.mp4', buffer_size=2)
+        time.sleep(0.2)
+        # Two frames buffered, at most one more decoded and waiting for room
+        assert instances[0].decodes <= 3
+        ok, frame = cap.read()
+        assert ok and cap.position == 1 and frame[0, 0, 0] == 1
+
+        start = time.perf_counter()
+        cap.release()
+        assert time.perf_counter() - start < 1.0 and not cap._thread.is_alive()
+
+
+def test_file_source_skips_through_a_real_video():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'clip.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (64, 48))
+        for index in range(1, 13):
+            writer.write(np.full((48, 64, 3), index * 20, dtype=np.uint8))
+        writer.release()
+
+        source = FileSource(path, frame_skip=4)
+        frames = []
+        while (frame := source.read_frame()) is not None:
+            frames.append(frame)
+        source.release()
+        assert [f.index for f in frames] == [4, 8, 12]
+        # The decoded frames are the 4th, 8th and 12th written
+        assert [round(float(f.image.mean()) / 20) for f in frames] == [4, 8, 12]
+        assert frames[0].image.shape == (48, 64, 3)
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+🧪 Detections Test
+=================
+Regression tests for the struct-of-arrays Detections container
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from detections import Detections, non_max_suppression
+
+
+def sample():
+    return Detections.from_array([[10, 20, 50, 80, 0.9, 2],
+                                  [100, 100, 141, 130, 0.4, 7],
+                                  [0, 0, 5, 5, 0.2, 3]])
+
+
+def test_from_array_fields_and_anchors():
+    detections = sample()
+    assert len(detections) == 3
+    assert detections.boxes.dtype == np.int32
+    assert detections.class_id.tolist() == [2, 7, 3]
+    assert np.allclose(detections.confidence, [0.9, 0.4, 0.2])
+    # Bottom-center anchors
+    assert detections.anchors.tolist() == [[30, 80], [120, 130], [2, 5]]
+    assert detections.tracker_id.tolist() == [-1, -1, -1]
+    assert detections.zone_id.tolist() == [-1, -1, -1]
+    assert detections.names.tolist() == [None, None, None]
+
+
+def test_empty():
+    detections = Detections.empty()
+    assert len(detections) == 0
+    assert detections.boxes.shape == (0, 4) and detections.anchors.shape == (0, 2)
+    assert Detections.from_array([]).boxes.shape == (0, 4)
+
+
+def test_indexing_keeps_every_field_aligned():
+    detections = sample()
+    detections.tracker_id[:] = [5, 6, 7]
+    detections.names[:] = ['car', 'truck', None]
+
+    confident = detections[detections.confidence > 0.3]
+    assert len(confident) == 2
+    assert confident.tracker_id.tolist() == [5, 6]
+    assert confident.names.tolist() == ['car', 'truck']
+    assert confident.anchors.tolist() == [[30, 80], [120, 130]]
+
+    single = detections[1]
+    assert len(single) == 1 and single.class_id.tolist() == [7]
+    assert detections[np.int64(2)].boxes.tolist() == [[0, 0, 5, 5]]
+
+
+def test_shifted_moves_boxes_and_anchors():
+    shifted = sample().shifted(100, 200)
+    assert shifted.boxes[0].tolist() == [110, 220, 150, 280]
+    assert shifted.anchors[0].tolist() == [130, 280]
+    assert shifted.class_id.tolist() == [2, 7, 3]
+
+
+def test_non_max_suppression():
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [50, 50, 60, 60]])
+    assert non_max_suppression(boxes, [0.5, 0.9, 0.7], 0.5).tolist() == [1, 2]
+    assert non_max_suppression(boxes, [0.5, 0.9, 0.7], 0.95).tolist() == [1, 2, 0]
+
+
+def test_merge_drops_duplicates_from_overlapping_tiles():
+    left = Detections.from_array([[90, 10, 130, 50, 0.6, 2], [0, 0, 20, 20, 0.8, 2]])
+    right = Detections.from_array([[92, 10, 130, 50, 0.9, 2]])
+    merged = Detections.merge([left, Detections.empty(), right], iou_threshold=0.5)
+    assert len(merged) == 2
+    # Original order is kept and the duplicate keeps its most confident copy
+    assert merged.boxes.tolist() == [[0, 0, 20, 20], [92, 10, 130, 50]]
+    assert len(Detections.merge([left, right])) == 3
+    assert len(Detections.merge([])) == 0
+
+
+def test_to_dict():
+    payload = sample()[[0]].to_dict()
+    assert payload == {'boxes': [[10, 20, 50, 80]], 'anchors': [[30, 80]], 'class_id': [2],
+                       'confidence': [0.9], 'tracker_id': [-1], 'zone_id': [-1], 'names': [None]}
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
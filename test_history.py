@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+🧪 History Test
+==============
+Regression tests for the ring-buffer traffic history and its rollups
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "api"))
+from history import HistoryStore, IntersectionHistory, RingBuffer, RollupTier
+
+
+def test_ring_buffer_wraps_and_keeps_time_order():
+    ring = RingBuffer(4, 1)
+    for t in range(6):
+        ring.append(float(t), [t * 10])
+    assert ring.oldest() == 2.0
+    times, values = ring.range(0, 10)
+    assert times.tolist() == [2, 3, 4, 5]
+    assert values[:, 0].tolist() == [20, 30, 40, 50]
+    # A range that spans the wrap point, inclusive at both ends
+    times, _ = ring.range(3, 4)
+    assert times.tolist() == [3, 4]
+    assert ring.range(7, 9)[0].size == 0
+    assert RingBuffer(3, 1).oldest() is None
+
+
+def test_rollup_buckets_by_floor_of_time():
+    tier = RollupTier(1, 10, 1)
+    for t, value in [(0.2, 1), (0.7, 3), (1.1, 10), (2.0, 4), (2.99, np.nan)]:
+        tier.add(t, np.array([value], dtype=float))
+    times, rows = tier.range(0.5, 5)  # t_from rounds down to its bucket
+    assert times.tolist() == [0, 1, 2]
+    # samples, mean, max per bucket; NaN samples count but do not enter the mean
+    assert rows[:, 0].tolist() == [2, 1, 2]
+    assert rows[:, 1].tolist() == [2, 10, 4]
+    assert rows[:, 2].tolist() == [3, 10, 4]
+    assert tier.oldest() == 0
+
+
+def test_intersection_history_rollups():
+    history = IntersectionHistory(raw_capacity=100, rollups={'1s': (1, 100), '1m': (60, 10)})
+    history.record(120.0, [2, 4], 'SWITCH', latency_ms=5)
+    history.record(120.5, [4, 6], 'KEEP', latency_ms=15)
+    history.record(121.0, [0, 0, 9], 1)
+
+    raw = history.query(0, 1000, 'raw')
+    assert [p['total_queue'] for p in raw] == [6, 10, 9]
+    assert raw[0]['queues'] == [2, 4] and raw[2]['queues'] == [0, 0, 9]
+    assert raw[2]['latency_ms'] is None
+
+    seconds = history.query(120, 121, '1s')
+    assert [p['t'] for p in seconds] == [120, 121]
+    first = seconds[0]
+    assert (first['samples'], first['total_queue'], first['total_queue_max']) == (2, 8, 10)
+    assert (first['switch_rate'], first['latency_ms'], first['latency_ms_max']) == (0.5, 10, 15)
+    assert first['queues'] == [3, 5]
+
+    minute = history.query(0, 1000, '1m')
+    assert len(minute) == 1 and minute[0]['t'] == 120 and minute[0]['samples'] == 3
+    assert history.oldest('raw') == 120.0 and history.oldest('1m') == 120
+
+
+def test_store_resolution_and_unknown_intersections():
+    store = HistoryStore(max_points=1000)
+    assert store.pick_resolution(0, 600) == '1s'
+    assert store.pick_resolution(0, 6 * 3600) == '1m'
+    assert store.pick_resolution(0, 30 * 86400) == '1h'
+    assert store.pick_resolution(0, 10 ** 9) == '1h'
+
+    store.record('north', 10.0, [1, 2], 'KEEP')
+    assert store.query('north', 0, 100) == ('1s', store.query('north', 0, 100, '1s')[1])
+    assert len(store.query('north', 0, 100, 'raw')[1]) == 1
+    # Reading an unknown intersection must not create it
+    assert store.query('south', 0, 100) == ('1s', [])
+    assert store.oldest('south', 'raw') is None
+    assert 'south' not in store
+    try:
+        store.query('north', 0, 100, '5m')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown resolution accepted")
+
+
+def test_store_drops_samples_for_intersections_the_registry_does_not_know():
+    registry = {'north'}
+    store = HistoryStore(max_points=1000, known=registry.__contains__)
+    assert store.record('north', 10.0, [1, 2], 'KEEP')
+    assert not store.record('made-up', 10.0, [1, 2], 'KEEP')
+    assert 'made-up' not in store and store.dropped == 1
+    assert store.query('made-up', 0, 100, 'raw') == ('raw', [])
+    # Once registered, the intersection's samples are kept
+    registry.add('made-up')
+    assert store.record('made-up', 11.0, [3, 4], 'SWITCH')
+    assert len(store.query('made-up', 0, 100, 'raw')[1]) == 1
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
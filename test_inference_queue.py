@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+🧪 Inference Queue Test
+======================
+Regression tests for the micro-batching prediction queue
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+SRC = Path(__file__).parent / "project" / "src"
+sys.path.insert(0, str(SRC))
+sys.path.insert(0, str(SRC / "api"))
+from inference_queue import InferenceQueue
+
+
+class SumPolicy:
+    """
+    Action = sum of the observation mod 2; slow enough that concurrent requests pile up.
+    """
+
+    def __init__(self, delay_s=0.02, fail_width=None):
+        self.delay_s = delay_s
+        self.fail_width = fail_width
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def predict(self, observations, deterministic=False):
+        assert deterministic and observations.ndim == 2
+        if observations.shape[1] == self.fail_width:
+            raise ValueError("bad observation width")
+        with self.lock:
+            self.batch_sizes.append(len(observations))
+        time.sleep(self.delay_s)
+        return observations.sum(axis=1).astype(np.int64) % 2, None
+
+
+def test_each_caller_gets_its_own_action():
+    policy = SumPolicy()
+    inference = InferenceQueue(policy, max_batch_size=8, max_wait_ms=5.0).start()
+    try:
+        observations = [[i, 0, 0, 0] for i in range(40)]
+        with ThreadPoolExecutor(max_workers=40) as pool:
+            actions = list(pool.map(inference.predict, observations))
+        assert actions == [i % 2 for i in range(40)]
+        assert all(isinstance(action, int) for action in actions)
+
+        stats = inference.get_stats()
+        assert stats['requests'] == 40 and stats['errors'] == 0
+        assert stats['batches'] < 40 and stats['mean_batch_size'] > 1
+        assert max(policy.batch_sizes) <= 8
+    finally:
+        inference.stop()
+
+
+def test_observation_shapes_are_batched_separately():
+    policy = SumPolicy()
+    inference = InferenceQueue(policy, max_batch_size=32, max_wait_ms=50.0).start()
+    try:
+        observations = [[1, 0, 0, 0], [1, 1, 1, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0, 0, 0]]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            actions = list(pool.map(inference.predict, observations))
+        assert actions == [1, 1, 0, 1]
+    finally:
+        inference.stop()
+
+
+def test_policy_errors_reach_only_their_group():
+    policy = SumPolicy(delay_s=0.0, fail_width=6)
+    inference = InferenceQueue(policy, max_batch_size=32, max_wait_ms=50.0).start()
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            good = pool.submit(inference.predict, [1, 0, 0, 0])
+            bad = pool.submit(inference.predict, [1, 0, 0, 0, 0, 0])
+            assert good.result() == 1
+            try:
+                bad.result()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("policy error was swallowed")
+        assert inference.get_stats()['errors'] == 1
+    finally:
+        inference.stop()
+
+
+def test_timeout_when_nothing_drains_the_queue():
+    inference = InferenceQueue(SumPolicy(), timeout_s=0.05)  # Never started
+    try:
+        inference.predict([0, 0, 0, 0])
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("predict returned without a worker")
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
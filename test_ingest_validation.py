@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+🧪 Ingest Validation Test
+========================
+Regression tests for the per-update checks on /api/update_traffic batches
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "api"))
+from state import update_error
+
+
+def test_valid_updates():
+    assert update_error({'queues': [3, 0, 1.5, 2], 'action': 'SWITCH'}) is None
+    assert update_error({'queues': [], 'action': 'KEEP', 'intersection': 'north'}) is None
+
+
+def test_invalid_updates_get_a_reason():
+    for update in ('not a dict',
+                   None,
+                   {'action': 'KEEP'},                               # No queues
+                   {'queues': '3,1', 'action': 'KEEP'},              # Not a list
+                   {'queues': (3, 1), 'action': 'KEEP'},
+                   {'queues': [3, '1'], 'action': 'KEEP'},           # Not numbers
+                   {'queues': [3, None], 'action': 'KEEP'},
+                   {'queues': [True, 1], 'action': 'KEEP'},          # bool is not a count
+                   {'queues': [float('nan')], 'action': 'KEEP'},     # Not finite
+                   {'queues': [float('inf')], 'action': 'KEEP'},
+                   {'queues': [1, 2]},                               # No action
+                   {'queues': [1, 2], 'action': 'switch'},           # Unknown action
+                   {'queues': [1, 2], 'action': 1}):
+        reason = update_error(update)
+        assert isinstance(reason, str) and reason, update
+
+
+def test_bad_items_are_rejected_individually():
+    batch = [{'queues': [1, 2], 'action': 'KEEP'},
+             {'queues': [1, 'x'], 'action': 'KEEP'},
+             {'queues': [4, 0], 'action': 'SWITCH', 'intersection': 'east'},
+             {'queues': [1, 2], 'action': 'HOLD'}]
+    assert [update_error(u) is None for u in batch] == [True, False, True, False]
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+🧪 Intersection State Test
+=========================
+Regression tests for the per-intersection registry of the API server
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "api"))
+from state import DEFAULT_INTERSECTION, IntersectionRegistry, room_for
+
+
+def test_default_intersection_exists_from_the_start():
+    registry = IntersectionRegistry()
+    assert registry.ids() == [DEFAULT_INTERSECTION]
+    assert registry.get(create=False) is registry.get(DEFAULT_INTERSECTION)
+    assert registry.get(None, create=False).intersection_id == DEFAULT_INTERSECTION
+
+
+def test_client_lookups_never_create_entries():
+    registry = IntersectionRegistry()
+    for intersection_id in ('north', 'x' * 500, '../etc'):
+        assert registry.get(intersection_id, create=False) is None
+    assert len(registry) == 1 and 'north' not in registry
+
+    # Producers create entries; IDs are normalised to strings
+    north = registry.get('north')
+    assert registry.get('north', create=False) is north
+    assert registry.get(7) is registry.get('7', create=False)
+    assert sorted(registry.ids()) == ['7', DEFAULT_INTERSECTION, 'north']
+
+
+def test_updates_and_snapshots():
+    registry = IntersectionRegistry()
+    registry.get('north').apply_update([3, 1], 'SWITCH', count=4)
+    registry.get('north').record_prediction([2, 2], 'KEEP')
+    snapshot = registry.snapshot()['north']
+    assert snapshot['queues'] == [2, 2] and snapshot['last_action'] == 'KEEP'
+    assert (snapshot['updates'], snapshot['predictions']) == (4, 1)
+    assert snapshot['last_update'] is not None
+    assert registry.snapshot()[DEFAULT_INTERSECTION]['last_update'] is None
+    assert room_for('north') == 'intersection:north'
+
+
+def test_concurrent_producers_create_one_entry_each():
+    registry = IntersectionRegistry()
+    seen = []
+
+    def produce():
+        for i in range(50):
+            state = registry.get(f"junction-{i % 5}")
+            state.apply_update([i], 'KEEP')
+            seen.append(state)
+
+    threads = [threading.Thread(target=produce) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(registry) == 6
+    assert len({id(state) for state in seen}) == 5
+    assert sum(registry.get(f"junction-{i}").snapshot()['updates'] for i in range(5)) == 400
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
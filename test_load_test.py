@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+🧪 Load Test Tool Test
+=====================
+Regression tests for load_test.py's arguments and JSON report, plus one
+small run against a spawned API server
+"""
+
+import json
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT / "project" / "src" / "api"))
+import load_test
+
+
+def test_arguments_default_and_sort_the_steps():
+    args = load_test.parse_args([])
+    assert args.steps == [10, 50, 100, 250, 500] and args.spawn is None and args.output is None
+    args = load_test.parse_args(['--steps', '200,5,50', '--spawn', 'threading, eventlet,', '--rate', '2'])
+    assert args.steps == [5, 50, 200] and args.spawn == ['threading', 'eventlet'] and args.rate == 2.0
+
+
+@pytest.mark.parametrize('argv', [
+    ['--steps', '10,lots'],
+    ['--steps', '0,10'],
+    ['--rate', '0'],
+    ['--duration', '-1'],
+    ['--workers', '0'],
+])
+def test_invalid_arguments_are_rejected(argv):
+    with pytest.raises(SystemExit) as error:
+        load_test.parse_args(argv)
+    assert error.value.code == 2
+
+
+def test_report_turns_missing_percentiles_into_null():
+    row = {'connections': 3, 'connect_failed': 0, 'connect_ms_p50': 4.5, 'ack_ms_p50': 1.0, 'ack_ms_p99': 2.0,
+           'ack_failed': 0, 'fanout_ms_p50': load_test.percentile([], 50),
+           'fanout_ms_p99': load_test.percentile([], 99), 'deliveries_per_s': 0.0}
+    load_test.print_row(row)  # A step without deliveries still prints
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'report.json'
+        load_test.save_results({'threading': [row]}, path)
+        # Strict JSON: no NaN tokens other tools would choke on
+        report = json.loads(path.read_text(), parse_constant=lambda token: pytest.fail(f"{token} in report"))
+    assert report['threading'][0]['fanout_ms_p50'] is None
+    assert report['threading'][0]['connect_ms_p50'] == 4.5 and row['fanout_ms_p50'] != row['fanout_ms_p50']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_spawned_run_writes_a_report():
+    # Run from a copy of the tracked files, so the spawned app.py keeps its database there
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = Path(tmp)
+        files = subprocess.run(['git', 'ls-files', '-z', 'config.json', 'project/src'], cwd=ROOT,
+                               capture_output=True, check=True).stdout.decode().split('\0')
+        for name in filter(None, files):
+            (tree / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(ROOT / name, tree / name)
+
+        output = tree / 'report.json'
+        result = subprocess.run([sys.executable, 'load_test.py', '--spawn', 'threading', '--port', str(free_port()),
+                                 '--steps', '2,1', '--duration', '0.5', '--rate', '10', '--workers', '2',
+                                 '--output', str(output)],
+                                cwd=tree / 'project' / 'src' / 'api', capture_output=True, text=True, timeout=180)
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert '💾 Results saved' in result.stdout
+        rows = json.loads(output.read_text())['threading']
+    assert [row['connections'] for row in rows] == [1, 2]
+    assert all(row['connect_failed'] == 0 and row['ack_failed'] == 0 for row in rows)
+    assert all(row['ack_ms_p50'] is not None and row['deliveries_per_s'] > 0 for row in rows)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
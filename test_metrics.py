@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+🧪 Metrics Test
+==============
+Regression tests for the shared Prometheus-style metrics registry
+"""
+
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src"))
+from metrics import Registry, _format, serve_metrics
+
+
+def test_format():
+    assert _format(3) == '3' and _format(2.0) == '2' and _format(0.25) == '0.25'
+    assert _format(float('inf')) == '+Inf' and _format(float('-inf')) == '-Inf'
+    assert _format(float('nan')) == 'NaN'
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests served', ['route'])
+    requests.inc(route='/api')
+    requests.inc(2, route='/api')
+    requests.inc(route='say "hi"\n')
+    depth = registry.gauge('depth', 'Queue depth')
+    depth.set(5)
+    depth.dec(2)
+
+    text = registry.render()
+    assert text.endswith('\n')
+    assert '# HELP requests_total Requests served\n# TYPE requests_total counter' in text
+    assert 'requests_total{route="/api"} 3' in text
+    assert 'requests_total{route="say \\"hi\\"\\n"} 1' in text
+    assert '# TYPE depth gauge\ndepth 3' in text
+
+    requests.remove(route='/api')
+    assert 'route="/api"' not in registry.render()
+
+
+def test_gauge_function_is_read_at_scrape_time():
+    registry = Registry()
+    values = [1.5]
+    registry.gauge('live', 'Callback gauge').set_function(lambda: values[-1])
+    assert 'live 1.5' in registry.render()
+    values.append(7)
+    assert 'live 7' in registry.render()
+    registry.gauge('broken', 'Failing callback').set_function(lambda: 1 / 0)
+    assert '# TYPE broken gauge' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', ['op'], buckets=(0.5, 0.1, 1))
+    for value in (0.05, 0.1, 0.3, 0.7, 3):
+        latency.observe(value, op='read')
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{op="read",le="0.1"} 2' in lines  # Bounds are inclusive
+    assert 'latency_seconds_bucket{op="read",le="0.5"} 3' in lines
+    assert 'latency_seconds_bucket{op="read",le="1"} 4' in lines
+    assert 'latency_seconds_bucket{op="read",le="+Inf"} 5' in lines
+    assert 'latency_seconds_count{op="read"} 5' in lines
+    assert 'latency_seconds_sum{op="read"} 4.15' in lines
+
+    with latency.time(op='write'):
+        pass
+    assert 'latency_seconds_count{op="write"} 1' in registry.render()
+
+
+def test_registry_reuses_and_checks_metrics():
+    registry = Registry()
+    first = registry.counter('events_total', 'Events', ['kind'])
+    assert registry.counter('events_total', 'Events again', ['kind']) is first
+    for clash in (lambda: registry.gauge('events_total', 'Events', ['kind']),
+                  lambda: registry.counter('events_total', 'Events', ['other']),
+                  lambda: first.inc(),
+                  lambda: first.inc(kind='a', extra='b'),
+                  lambda: first.inc(other='a')):
+        try:
+            clash()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("mismatched metric or labels accepted")
+
+
+def test_serve_metrics():
+    registry = Registry()
+    registry.counter('scrapes_total', 'Scrapes').inc()
+    server = serve_metrics(0, host='127.0.0.1', registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'scrapes_total 1' in response.read().decode()
+        try:
+            urllib.request.urlopen(f"{url}/other", timeout=5)
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+        else:
+            raise AssertionError("non-metrics path served")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
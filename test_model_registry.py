@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+🧪 Model Registry Test
+=====================
+Regression tests for LIVE/SHADOW pointers, probe validation and hot swaps
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "ai_core"))
+import model_registry
+from model_registry import HotSwapPolicy, ModelRegistry
+from numpy_policy import NumpyPolicy
+from policy_cache import CachedPolicy
+
+CACHE_SETTINGS = {'maxsize': 64, 'precompute': False, 'num_counts': 2, 'max_count': 5, 'num_phases': 2}
+
+
+def linear_policy(switch_when_first_longer=True):
+    """
+    Single-layer policy over [q0, q1, phase0, phase1]: SWITCH when q0 > q1, or q1 > q0 when flipped.
+    """
+    sign = 1 if switch_when_first_longer else -1
+    return NumpyPolicy([], [], [[0, 0, 0, 0], [sign, -sign, 0, 0]], [0.5, 0])
+
+
+def make_registry(tmp, expected=None, **overrides):
+    root = Path(tmp) / 'registry'
+    root.mkdir()
+    rng = np.random.default_rng(1)
+    counts = rng.integers(0, 6, size=(200, 2))
+    counts = counts[counts[:, 0] != counts[:, 1]]  # No ties, so the two policies disagree everywhere
+    observations = np.concatenate([counts, np.eye(2)[rng.integers(0, 2, len(counts))]], axis=1)
+    probes = {'observations': observations.astype(np.float32)}
+    if expected is not None:
+        probes['actions'] = linear_policy(expected).predict(probes['observations'], deterministic=True)[0]
+    np.savez(root / 'probes.npz', **probes)
+
+    settings = dict(model_registry.DEFAULT_REGISTRY_SETTINGS, path=root, probe_path=root / 'probes.npz',
+                    shadow_log=Path(tmp) / 'shadow.jsonl', poll_interval_s=3600)
+    settings.update(overrides)
+    return ModelRegistry(settings)
+
+
+def deploy(registry, version, switch_when_first_longer=True):
+    (registry.root / version).mkdir()
+    linear_policy(switch_when_first_longer).save(registry.root / version / 'model.npz')
+
+
+def point(registry, name, version):
+    (registry.root / name).write_text(version + '\n')
+
+
+def hot_swap(registry):
+    live = CachedPolicy(linear_policy(), maxsize=64)
+    return HotSwapPolicy(registry, 'base', live, cache_settings=CACHE_SETTINGS)
+
+
+def test_only_live_pointer_selects_a_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp)
+        deploy(registry, 'v1')
+        deploy(registry, 'v10')
+        deploy(registry, 'v2')
+        assert registry.versions() == ['v1', 'v2', 'v10']
+        assert registry.live_version() is None
+        point(registry, 'SHADOW', 'v10')
+        assert registry.live_version() is None and registry.shadow_version() == 'v10'
+        point(registry, 'LIVE', 'v3')  # Not deployed
+        assert registry.live_version() is None
+        point(registry, 'LIVE', 'v2')
+        assert registry.live_version() == 'v2'
+
+
+def test_shadow_version_never_goes_live():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp)
+        deploy(registry, 'v1')
+        point(registry, 'SHADOW', 'v1')
+        policy = hot_swap(registry)
+        stats = policy.check()
+        assert (stats['live'], stats['shadow'], stats['swaps']) == ('base', 'v1', 0)
+
+
+def test_disagreeing_version_is_rejected_without_expected_actions():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp)
+        deploy(registry, 'v2', switch_when_first_longer=False)
+        deploy(registry, 'v3')
+        policy = hot_swap(registry)
+
+        point(registry, 'LIVE', 'v2')
+        stats = policy.check()
+        assert stats['live'] == 'base' and stats['swaps'] == 0
+        assert any(key.startswith('v2@') for key in stats['rejected'])
+
+        point(registry, 'LIVE', 'v3')
+        stats = policy.check()
+        assert stats['live'] == 'v3' and stats['swaps'] == 1
+        assert stats['history'][-1]['report']['live_agreement'] == 1.0
+
+
+def test_expected_actions_gate_promotion():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp, expected=False)
+        deploy(registry, 'v1')
+        try:
+            registry.validate(linear_policy())
+        except ValueError as e:
+            assert 'expected probe actions' in str(e)
+        else:
+            raise AssertionError("policy that contradicts the probe file passed")
+        report = registry.validate(linear_policy(False), reference=linear_policy(), enforce_reference=True)
+        assert report['expected_agreement'] == 1.0 and report['live_agreement'] == 0.0
+
+
+def test_validation_bypasses_decision_caches():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp)
+        live = CachedPolicy(linear_policy(), maxsize=64)
+        candidate = CachedPolicy(linear_policy(), maxsize=64)
+        registry.validate(candidate, reference=live, enforce_reference=True)
+        for cached in (live, candidate):
+            stats = cached.get_stats()
+            assert (stats['hits'], stats['misses'], stats['size']) == (0, 0, 0)
+
+
+def test_fingerprint_rehashes_only_changed_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp)
+        deploy(registry, 'v1')
+        hashed = []
+        original = model_registry.file_hash
+        model_registry.file_hash = lambda path: hashed.append(path) or original(path)
+        try:
+            first = registry.fingerprint('v1')
+            assert registry.fingerprint('v1') == first and len(hashed) == 1
+            path = registry.root / 'v1' / 'model.npz'
+            mtime_ns = path.stat().st_mtime_ns
+            linear_policy(False).save(path)
+            os.utime(path, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))  # Same size, so make the change visible
+            assert registry.fingerprint('v1') != first and len(hashed) == 2
+        finally:
+            model_registry.file_hash = original
+
+
+def test_shadow_disagreements_are_counted():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp)
+        deploy(registry, 'v2', switch_when_first_longer=False)
+        point(registry, 'SHADOW', 'v2')
+        policy = hot_swap(registry)
+        policy.check()
+        policy.start()
+        for observation in ([3, 1, 1, 0], [1, 3, 1, 0], [2, 2, 0, 1]):
+            policy.predict(np.array(observation, dtype=np.float32), deterministic=True)
+        policy.predict(np.array([3, 1, 1, 0], dtype=np.float32), deterministic=False)  # Not replayed
+        policy.stop()
+        policy._shadow_worker.join(timeout=5)
+
+        stats = policy.get_registry_stats()['shadow_stats']
+        assert (stats['compared'], stats['disagreements'], stats['dropped']) == (3, 2, 0)
+        assert len((Path(tmp) / 'shadow.jsonl').read_text().splitlines()) == 2
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
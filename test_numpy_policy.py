@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+🧪 NumPy Policy Test
+===================
+Regression tests for the torch-free PPO actor: its forward pass against a
+float64 reference and, where torch is installed, against the same layers in
+torch; PPO.predict's shape contract; and the .npz export round trip
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "ai_core"))
+from numpy_policy import NumpyPolicy, file_hash, load_policy
+
+OBSERVATION_SIZE = 6
+HIDDEN = (64, 64)
+N_ACTIONS = 2
+
+
+def random_policy(activation='tanh', seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = (OBSERVATION_SIZE,) + HIDDEN
+    weights = [rng.normal(0, 0.5, (n_out, n_in)) for n_in, n_out in zip(sizes, sizes[1:])]
+    biases = [rng.normal(0, 0.1, n_out) for n_out in HIDDEN]
+    return NumpyPolicy(weights, biases, rng.normal(0, 0.5, (N_ACTIONS, HIDDEN[-1])), rng.normal(0, 0.1, N_ACTIONS),
+                       activation=activation)
+
+
+def observations(count=1000, seed=1):
+    # Queue lengths and the one-hot phase, as the SUMO observation
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.integers(0, 30, (count, 4)), np.eye(2)[rng.integers(0, 2, count)]],
+                          axis=1).astype(np.float32)
+
+
+def reference_logits(policy, x):
+    x = x.astype(np.float64)
+    for weight, bias in zip(policy.weights, policy.biases):
+        x = x @ weight.T.astype(np.float64) + bias
+        x = np.tanh(x) if policy.activation == 'tanh' else np.maximum(x, 0.0)
+    return x @ policy.action_weight.T.astype(np.float64) + policy.action_bias
+
+
+@pytest.mark.parametrize('activation', ['tanh', 'relu'])
+def test_forward_pass_matches_a_float64_reference(activation):
+    policy = random_policy(activation)
+    obs = observations()
+    expected = reference_logits(policy, obs)
+    assert np.allclose(policy.action_logits(obs), expected, atol=1e-4)
+    actions, _ = policy.predict(obs, deterministic=True)
+    assert np.array_equal(actions, expected.argmax(axis=1))
+
+
+@pytest.mark.parametrize('activation', ['tanh', 'relu'])
+def test_actions_match_the_torch_mlp(activation):
+    torch = pytest.importorskip('torch')
+    from torch import nn
+
+    policy = random_policy(activation)
+    activation_fn = nn.Tanh if activation == 'tanh' else nn.ReLU
+    sizes = (OBSERVATION_SIZE,) + HIDDEN
+    layers = []
+    for (n_in, n_out), weight, bias in zip(zip(sizes, sizes[1:]), policy.weights, policy.biases):
+        linear = nn.Linear(n_in, n_out)
+        linear.weight.data, linear.bias.data = torch.from_numpy(weight), torch.from_numpy(bias)
+        layers += [linear, activation_fn()]
+    action_net = nn.Linear(HIDDEN[-1], N_ACTIONS)
+    action_net.weight.data = torch.from_numpy(policy.action_weight)
+    action_net.bias.data = torch.from_numpy(policy.action_bias)
+    actor = nn.Sequential(nn.Flatten(), *layers, action_net)  # MlpPolicy's actor path
+
+    obs = observations()
+    with torch.no_grad():
+        expected = actor(torch.from_numpy(obs)).numpy()
+    assert np.allclose(policy.action_logits(obs), expected, atol=1e-5)
+    assert np.array_equal(policy.predict(obs, deterministic=True)[0], expected.argmax(axis=1))
+
+
+def test_predict_follows_the_ppo_shape_contract():
+    policy = random_policy()
+    obs = observations(5)
+    action, state = policy.predict(obs[0], deterministic=True)
+    assert np.ndim(action) == 0 and state is None
+    actions, _ = policy.predict(obs, state='lstm-state', deterministic=True)
+    assert actions.shape == (5,)
+    assert policy.predict(obs, state='lstm-state')[1] == 'lstm-state'
+    with pytest.raises(ValueError):
+        policy.predict(np.zeros(OBSERVATION_SIZE + 1))
+
+
+def test_sampling_follows_the_action_probabilities():
+    policy = random_policy()
+    policy.action_weight[:] = 0.0
+    policy.action_bias[:] = [0.0, np.log(3.0)]  # P(SWITCH) = 0.75 everywhere
+    actions, _ = policy.predict(observations(4000), deterministic=False)
+    assert set(np.unique(actions)) <= {0, 1}
+    assert 0.7 < actions.mean() < 0.8
+
+
+def test_export_round_trip_and_load_policy_prefers_a_fresh_export():
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / 'ppo.zip'
+        model_path.write_bytes(b'trained model')
+        policy = random_policy()
+        policy.source_hash = file_hash(model_path)
+        policy.save(model_path.with_suffix('.npz'))
+
+        loaded = load_policy(model_path)
+        assert isinstance(loaded, NumpyPolicy) and loaded.source_hash == policy.source_hash
+        assert loaded.observation_shape == (OBSERVATION_SIZE,) and loaded.activation == 'tanh'
+        obs = observations(100)
+        assert np.array_equal(loaded.predict(obs, deterministic=True)[0], policy.predict(obs, deterministic=True)[0])
+
+        # Without the .zip, the export alone is enough
+        model_path.unlink()
+        assert isinstance(load_policy(model_path), NumpyPolicy)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+🧪 Policy Cache Test
+===================
+Regression tests for the LRU decision cache and the precomputed PolicyTable
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "ai_core"))
+from policy_cache import CachedPolicy, PolicyTable
+
+
+class RulePolicy:
+    """
+    Deterministic stand-in for the PPO policy: SWITCH when the first queue is
+    longer than the second, or when phase 1 is active. Counts forward passes.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        self.calls += 1
+        observation = np.asarray(observation, dtype=np.float32)
+        batch = observation.reshape(-1, observation.shape[-1])
+        self.rows += len(batch)
+        actions = ((batch[:, 0] > batch[:, 1]) | (batch[:, -1] == 1)).astype(np.int64)
+        return (actions if observation.ndim == 2 else actions[0]), state
+
+
+def test_index_matches_observation_order():
+    """Mixed-radix index i must be the i-th row of observations()"""
+    for num_counts, max_count, num_phases in [(2, 3, 0), (3, 2, 2), (1, 5, 3)]:
+        table = PolicyTable(np.zeros(0), num_counts, max_count, num_phases)
+        observations = PolicyTable.observations(num_counts, max_count, num_phases)
+        assert len(observations) == (max_count + 1) ** num_counts * max(num_phases, 1)
+        assert [table.index(obs) for obs in observations] == list(range(len(observations)))
+
+
+def test_index_rejects_observations_outside_the_domain():
+    table = PolicyTable(np.zeros(0), 2, 3, 2)
+    for observation in ([1, 4, 1, 0],       # Count above max_count
+                        [-1, 0, 1, 0],      # Negative count
+                        [1.5, 0, 1, 0],     # Not an integer count
+                        [1, 2, 0, 0],       # No phase
+                        [1, 2, 1, 1],       # Two phases
+                        [1, 2, 0.5, 0.5],   # Not one-hot
+                        [1, 2, 1]):         # Wrong shape
+        assert table.index(np.array(observation, dtype=np.float32)) is None, observation
+        assert table.lookup(np.array(observation, dtype=np.float32)) is None
+
+
+def test_build_matches_policy_and_survives_save_load():
+    policy = RulePolicy()
+    table = PolicyTable.build(policy, 2, 4, 2, source_hash='abc', batch_size=7)
+    observations = PolicyTable.observations(2, 4, 2)
+    expected, _ = RulePolicy().predict(observations, deterministic=True)
+    assert [table.lookup(obs) for obs in observations] == expected.tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'table.npz'
+        table.save(path)
+        loaded = PolicyTable.load(path)
+    assert (loaded.num_counts, loaded.max_count, loaded.num_phases, loaded.source_hash) == (2, 4, 2, 'abc')
+    assert np.array_equal(loaded.actions, table.actions)
+
+
+def test_cache_hits_and_lru_eviction():
+    policy = RulePolicy()
+    cached = CachedPolicy(policy, maxsize=2)
+    a, b, c = ([3, 1, 1, 0], [1, 3, 1, 0], [0, 0, 0, 1])
+
+    assert int(cached.predict(a, deterministic=True)[0]) == 1
+    assert int(cached.predict(b, deterministic=True)[0]) == 0
+    assert int(cached.predict(a, deterministic=True)[0]) == 1
+    assert policy.calls == 2
+    cached.predict(c, deterministic=True)  # Evicts b, the least recently used
+    cached.predict(a, deterministic=True)
+    cached.predict(b, deterministic=True)
+    assert policy.calls == 4
+    stats = cached.get_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (2, 4, 2)
+
+
+def test_table_answers_before_the_policy():
+    policy = RulePolicy()
+    table = PolicyTable.build(RulePolicy(), 2, 4, 2)
+    cached = CachedPolicy(policy, maxsize=16, table=table)
+    assert int(cached.predict([3, 1, 1, 0], deterministic=True)[0]) == 1
+    assert int(cached.predict([9, 1, 1, 0], deterministic=True)[0]) == 1  # Outside the table: policy
+    assert policy.calls == 1
+    stats = cached.get_stats()
+    assert (stats['table_hits'], stats['misses']) == (1, 1)
+
+
+def test_batches_reuse_cached_rows_and_stochastic_calls_bypass():
+    policy = RulePolicy()
+    cached = CachedPolicy(policy, maxsize=16)
+    cached.predict([3, 1, 1, 0], deterministic=True)
+    actions, _ = cached.predict([[3, 1, 1, 0], [1, 3, 1, 0], [1, 3, 0, 1]], deterministic=True)
+    assert actions.tolist() == [1, 0, 1]
+    assert policy.rows == 3  # One cached row, two computed in a single pass
+    assert policy.calls == 2
+
+    cached.predict([3, 1, 1, 0], deterministic=False)
+    assert policy.calls == 3
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
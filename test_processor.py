@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+🧪 Vision Processor Test
+=======================
+Regression tests for VisionProcessor's batched multi-camera pipeline, with a
+scripted detector that finds the white blocks drawn into synthetic frames
+"""
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+import processor
+from detections import Detections
+from motion import MotionGate
+from processor import VisionProcessor
+
+HEIGHT, WIDTH = 240, 320
+
+# Two lanes side by side in the lower part of the frame
+ZONES = [
+    np.array([[0, 100], [159, 100], [159, 239], [0, 239]], np.int32),
+    np.array([[160, 100], [319, 100], [319, 239], [160, 239]], np.int32),
+]
+
+
+class BlockDetector:
+    """
+    Detector backend stand-in: every white block is a car (COCO class 2).
+    """
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def detect(self, images, imgsz=None, conf=None):
+        self.calls.append({'shapes': [image.shape[:2] for image in images], 'imgsz': imgsz, 'conf': conf})
+        if self.fail:
+            raise RuntimeError("detector crashed")
+        results = []
+        for image in images:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            count, _, stats, _ = cv2.connectedComponentsWithStats((gray > 127).astype(np.uint8))
+            boxes = [[x, y, x + w, y + h] for x, y, w, h, _ in stats[1:count]]
+            results.append(Detections(np.array(boxes).reshape(-1, 4), [2] * len(boxes), [0.9] * len(boxes)))
+        return results
+
+
+@contextmanager
+def scripted_processor(detector=None, **kwargs):
+    """
+    A VisionProcessor whose detector backend is `detector`, without the recognition model.
+    """
+    detector = detector or BlockDetector()
+    original = processor.create_backend
+    processor.create_backend = lambda weights, settings=None: detector
+    try:
+        yield VisionProcessor(recognize_vehicles=False, **kwargs), detector
+    finally:
+        processor.create_backend = original
+
+
+def frame_with(*blocks):
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for x1, y1, x2, y2 in blocks:
+        frame[y1:y2, x1:x2] = 255
+    return frame
+
+
+# Anchors (bottom centre) at (40, 160) in lane 0, (220, 190) in lane 1, (115, 40) above both lanes
+CAMERA_A = frame_with((20, 120, 60, 160), (200, 150, 240, 190), (100, 10, 130, 40))
+# Two cars in lane 1
+CAMERA_B = frame_with((180, 110, 220, 150), (260, 180, 300, 220))
+
+
+def test_cameras_share_one_detector_call():
+    with scripted_processor() as (vision, detector):
+        (counts_a, detections_a), (counts_b, detections_b) = vision.process_frames(
+            [CAMERA_A, CAMERA_B], [ZONES, ZONES], camera_ids=['a', 'b'])
+
+        assert len(detector.calls) == 1 and detector.calls[0]['shapes'] == [(HEIGHT, WIDTH)] * 2
+        # Weak boxes are requested too, for the tracker's second association
+        assert detector.calls[0]['conf'] == vision.low_thresh
+        assert counts_a == [1, 1] and counts_b == [0, 2]
+        assert sorted(detections_a.boxes.tolist()) == [[20, 120, 60, 160], [100, 10, 130, 40], [200, 150, 240, 190]]
+        assert sorted(detections_a.zone_id.tolist()) == [-1, 0, 1]
+        assert (detections_a.tracker_id >= 0).all() and (detections_b.tracker_id >= 0).all()
+        # One tracker per camera
+        assert set(vision.trackers) == {'a', 'b'}
+
+
+def test_single_frame_path_matches_the_batch():
+    with scripted_processor() as (vision, _):
+        batched = vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+    with scripted_processor() as (vision, detector):
+        single = [vision.process_frame(CAMERA_A, ZONES, camera_id=0), vision.process_frame(CAMERA_B, ZONES, camera_id=1)]
+        assert len(detector.calls) == 2
+    for (counts, detections), (expected_counts, expected) in zip(single, batched):
+        assert counts == expected_counts
+        assert detections.boxes.tolist() == expected.boxes.tolist()
+        assert detections.tracker_id.tolist() == expected.tracker_id.tolist()
+
+
+def test_track_ids_stay_stable_across_frames():
+    with scripted_processor() as (vision, _):
+        first = vision.process_frame(CAMERA_A, ZONES)[1]
+        moved = frame_with((22, 122, 62, 162), (200, 154, 240, 194), (100, 10, 130, 40))
+        second = vision.process_frame(moved, ZONES)[1]
+        order_first, order_second = np.argsort(first.boxes[:, 0]), np.argsort(second.boxes[:, 0])
+        assert first.tracker_id[order_first].tolist() == second.tracker_id[order_second].tolist()
+
+
+def test_detector_failure_reports_empty_zones():
+    with scripted_processor(BlockDetector(fail=True)) as (vision, _):
+        outputs = vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES[:1]])
+        assert [counts for counts, _ in outputs] == [[0, 0], [0]]
+        assert all(len(detections) == 0 for _, detections in outputs)
+
+
+def test_latency_budget_sees_the_batch_per_frame():
+    with scripted_processor(latency_budget_ms=1000.0) as (vision, detector):
+        vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+        assert detector.calls[0]['imgsz'] == vision.resolution_controller.imgsz
+        entry = vision.get_inference_log()[-1]
+        assert entry['frames'] == 2 and entry['model'] == 'yolov8m.pt'
+
+
+def in_zone(detections):
+    return sorted(detections[detections.zone_id >= 0].boxes.tolist())
+
+
+def test_roi_crops_map_back_to_full_frame_coordinates():
+    with scripted_processor() as (full, _):
+        expected = full.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+    for mode in ('union', 'tiles'):
+        with scripted_processor(roi_mode=mode, roi_padding=16) as (vision, detector):
+            outputs = vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+            # The detector only saw the zones' crops, still in one call
+            shapes = detector.calls[0]['shapes']
+            assert len(detector.calls) == 1 and len(shapes) == (2 if mode == 'union' else 4)
+            assert all(height < HEIGHT for height, _ in shapes)
+            for (counts, detections), (expected_counts, expected_detections) in zip(outputs, expected):
+                assert counts == expected_counts, mode
+                assert in_zone(detections) == in_zone(expected_detections), mode
+            # The car above both lanes is outside every crop
+            assert [100, 10, 130, 40] not in outputs[0][1].boxes.tolist()
+
+
+def test_overlapping_tiles_count_a_car_once():
+    # Lane 0's tile reaches x=176 and lane 1's starts at x=144: this car is in both
+    frame = frame_with((150, 150, 175, 190))
+    with scripted_processor(roi_mode='tiles', roi_padding=16) as (vision, detector):
+        counts, detections = vision.process_frame(frame, ZONES)
+        tiles = detector.calls[0]['shapes']
+        assert len(tiles) == 2 and all(width < WIDTH for _, width in tiles)
+        assert counts == [0, 1]
+        assert detections.boxes.tolist() == [[150, 150, 175, 190]]
+
+
+def test_motion_gate_skips_static_cameras_and_refreshes_when_stale():
+    gate = MotionGate(max_stale_frames=3)
+    with scripted_processor(motion_gate=gate) as (vision, detector):
+        first = vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+        assert len(detector.calls) == 1
+
+        # Nothing moved: the detector is skipped and the last results reused
+        for _ in range(3):
+            outputs = vision.process_frames([CAMERA_A.copy(), CAMERA_B.copy()], [ZONES, ZONES])
+            assert outputs[0] is first[0] and outputs[1] is first[1]
+        assert len(detector.calls) == 1
+
+        # max_stale_frames bounds the reuse: both cameras are detected again
+        vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+        assert len(detector.calls) == 2 and len(detector.calls[1]['shapes']) == 2
+
+        stats = vision.get_motion_stats()
+        assert stats[0]['skipped'] == 3 and stats[0]['max_stale_frames'] == 3 and stats[0]['skip_rate'] == 0.6
+
+
+def test_motion_gate_detects_only_cameras_whose_zones_changed():
+    with scripted_processor(motion_gate=True) as (vision, detector):
+        vision.process_frames([CAMERA_A, CAMERA_B], [ZONES, ZONES])
+
+        # A car moves in camera B's lane; camera A is unchanged
+        moved_b = frame_with((180, 110, 220, 150), (230, 180, 270, 220))
+        (counts_a, _), (counts_b, detections_b) = vision.process_frames([CAMERA_A, moved_b], [ZONES, ZONES])
+        assert len(detector.calls) == 2 and len(detector.calls[1]['shapes']) == 1
+        assert counts_a == [1, 1] and counts_b == [0, 2]
+        assert [230, 180, 270, 220] in detections_b.boxes.tolist()
+
+        # Changes outside every zone do not wake the detector
+        sky = CAMERA_A.copy()
+        sky[10:60, 250:310] = 255
+        vision.process_frames([sky, moved_b], [ZONES, ZONES])
+        assert len(detector.calls) == 2
+
+        # Neither do cameras the gate already knows, but a new camera is always detected
+        vision.process_frames([CAMERA_A, moved_b, CAMERA_B], [ZONES, ZONES, ZONES])
+        assert len(detector.calls) == 3 and len(detector.calls[2]['shapes']) == 1
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
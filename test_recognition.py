@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+🧪 Vehicle Recognition Worker Test
+=================================
+Regression tests for the background recognizer: the bounded crop queue, drops
+when it is full, and results handed back to the submitting thread
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from recognition import VehicleRecognitionWorker, clean_vehicle_label
+
+
+class LabelWorker(VehicleRecognitionWorker):
+    """
+    Names every crop after its mean pixel value instead of running the model.
+    """
+
+    def __init__(self, fail=False, **kwargs):
+        super().__init__(None, None, **kwargs)
+        self.fail = fail
+        self.batch_sizes = []
+
+    def classify_batch(self, cropped_images):
+        self.batch_sizes.append(len(cropped_images))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [f"Car {int(crop.mean())}" for crop in cropped_images]
+
+
+def crop(value):
+    return np.full((8, 8, 3), value, dtype=np.uint8)
+
+
+def collect(worker, count, timeout=2.0):
+    results = []
+    deadline = time.time() + timeout
+    while len(results) < count and time.time() < deadline:
+        results += worker.results()
+        time.sleep(0.01)
+    return results
+
+
+def test_clean_vehicle_label():
+    assert clean_vehicle_label('sports car, sport car') == 'Sports Car'
+    assert clean_vehicle_label('Jeep, landrover') == 'Jeep'
+    assert clean_vehicle_label('tabby, tabby cat') is None
+
+
+def test_full_queue_drops_and_the_vehicle_can_retry():
+    worker = LabelWorker(max_queue=3)  # Not started: nothing drains the queue
+    assert [worker.submit(('cam', i), crop(i)) for i in range(3)] == [True, True, True]
+    assert not worker.submit(('cam', 3), crop(3))
+    assert worker.dropped == 1 and worker.submitted == 3
+    # A dropped vehicle is not left pending, so a later frame submits it again
+    assert worker.is_pending(('cam', 0)) and not worker.is_pending(('cam', 3))
+    # A vehicle already queued is not queued twice
+    assert not worker.submit(('cam', 0), crop(0))
+    assert worker.dropped == 1
+
+
+def test_submitted_crops_are_copies():
+    worker = LabelWorker()
+    image = crop(10)
+    worker.submit('car', image)
+    image[:] = 200  # The next video frame reuses the buffer
+    worker.start()
+    try:
+        assert collect(worker, 1) == [('car', 'Car 10')]
+    finally:
+        worker.stop()
+
+
+def test_results_are_collected_by_the_caller_in_batches():
+    worker = LabelWorker(max_queue=16, batch_size=4)
+    for i in range(10):
+        assert worker.submit(('cam', i), crop(i))
+    worker.start()
+    try:
+        deadline = time.time() + 2.0
+        while worker._results.qsize() < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        # Finished but not yet collected: still pending, so not resubmitted meanwhile
+        assert worker.is_pending(('cam', 0)) and not worker.submit(('cam', 0), crop(0))
+        results = worker.results()
+        assert sorted(results) == sorted((('cam', i), f"Car {i}") for i in range(10))
+        assert not worker.is_pending(('cam', 0)) and worker.results() == []
+        assert max(worker.batch_sizes) <= 4 and sum(worker.batch_sizes) == 10
+        assert worker.recognized == 10
+    finally:
+        worker.stop()
+
+
+def test_model_errors_come_back_as_unnamed():
+    worker = LabelWorker(fail=True)
+    worker.submit('car', crop(1))
+    worker.start()
+    try:
+        assert collect(worker, 1) == [('car', None)]
+        assert worker.recognized == 0
+    finally:
+        worker.stop()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+🧪 Server Startup Test
+=====================
+Imports the dashboard servers from a copy of the files tracked by git, so
+anything a server needs at startup but that was never committed (vendored
+libraries, config keys) shows up here and not on a fresh checkout
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent
+
+# Imports the server module, then requests its dashboard and one vendored library
+PROBE = """
+import json, sys
+module = __import__(sys.argv[1])
+client = module.app.test_client()
+print(json.dumps({'page': client.get(sys.argv[2]).status_code,
+                  'vendor': client.get('/static/vendor/socket.io-4.0.1.min.js').status_code}))
+"""
+
+
+def committed_tree(target):
+    """
+    Copies every tracked file (as it is in the working tree) into `target`.
+    """
+    try:
+        files = subprocess.run(['git', 'ls-files', '-z'], cwd=ROOT, capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("not a git checkout")
+    for name in files.decode().split('\0'):
+        source = ROOT / name
+        if name and source.is_file():
+            (target / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target / name)
+    return target
+
+
+def start(tree, directory, module, page):
+    result = subprocess.run([sys.executable, '-c', PROBE, module, page], cwd=tree / directory,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('directory, module, page', [
+    ('project/src/api', 'app', '/'),
+    ('project/src', 'web_3d_visualization', '/'),
+    ('project/src', 'simple_3d_system', '/static/simple_3d.html'),  # Its routes are added when the system starts
+])
+def test_server_starts_from_committed_tree(directory, module, page):
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = committed_tree(Path(tmp))
+        codes = start(tree, directory, module, page)
+        assert codes['page'] == 200
+        # Served locally when vendored, redirected to the CDN otherwise
+        assert codes['vendor'] in (200, 302)
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
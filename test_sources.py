@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+🧪 Frame Source Test
+===================
+Regression tests for the live camera reconnect and timeout paths, with a
+scripted stand-in for cv2.VideoCapture
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+import sources
+from sources import FrameSource, LiveCameraSource, SyntheticSource
+
+
+class ScriptedCapture:
+    """
+    cv2.VideoCapture stand-in. Every open takes the next entry of `script`:
+    None fails to open, an int opens and delivers that many frames, then the
+    stream drops. Once the script runs out the camera stays down.
+    """
+
+    script = []
+    opens = 0
+    lock = threading.Lock()
+
+    def __init__(self, source):
+        with ScriptedCapture.lock:
+            step = ScriptedCapture.script.pop(0) if ScriptedCapture.script else None
+            ScriptedCapture.opens += 1
+        self.frames_left = step
+
+    def isOpened(self):
+        return self.frames_left is not None
+
+    def get(self, prop):
+        return 25.0 if prop == cv2.CAP_PROP_FPS else 0.0
+
+    def read(self):
+        time.sleep(0.002)
+        if not self.frames_left:
+            return False, None
+        self.frames_left -= 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+@contextmanager
+def scripted_camera(*script):
+    original = cv2.VideoCapture
+    ScriptedCapture.script, ScriptedCapture.opens = list(script), 0
+    sources.cv2.VideoCapture = ScriptedCapture
+    try:
+        yield
+    finally:
+        sources.cv2.VideoCapture = original
+
+
+def read_all(source, count, timeout=2.0):
+    return [source.read_frame(timeout=timeout) for _ in range(count)]
+
+
+def test_frame_source_is_abstract():
+    try:
+        FrameSource()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("FrameSource without read_frame was instantiated")
+
+
+def test_reads_continue_across_a_reconnect():
+    # 5 frames, stream drops, camera down twice, then back with frames again
+    with scripted_camera(5, None, None, 1000):
+        source = LiveCameraSource('rtsp://camera', reconnect_delay=0.01, max_reconnect_delay=0.02)
+        try:
+            assert source.isOpened() and source.fps == 25.0
+            frames = []
+            while not frames or frames[-1].index <= 5:
+                frames.append(source.read_frame(timeout=2.0))
+            assert all(frame is not None for frame in frames)
+            assert [f.index for f in frames] == sorted({f.index for f in frames})
+            assert ScriptedCapture.opens >= 4
+            assert source.get_stats()['reconnects'] >= 1
+        finally:
+            source.release()
+
+
+def test_outage_raises_timeout_and_never_looks_like_end_of_stream():
+    with scripted_camera(2):  # Two frames, then the camera stays down
+        source = LiveCameraSource('rtsp://camera', reconnect_delay=0.01, max_reconnect_delay=0.02)
+        try:
+            assert all(frame is not None for frame in read_all(source, 2))
+            for _ in range(3):
+                try:
+                    source.read_frame(timeout=0.05)
+                except TimeoutError:
+                    pass
+                else:
+                    raise AssertionError("outage returned instead of timing out")
+            assert source.isOpened()
+            assert not source.get_stats()['connected']
+        finally:
+            source.release()
+        # Only a released source reports end of stream
+        assert source.read_frame(timeout=0.05) is None
+        assert source.read() == (False, None)
+        assert not source.isOpened()
+
+
+def test_blocking_read_waits_for_the_camera_to_return():
+    with scripted_camera(None, None, None, 1000):
+        source = LiveCameraSource('rtsp://camera', reconnect_delay=0.05, max_reconnect_delay=0.05,
+                                  open_timeout=0.01)
+        try:
+            # Still connecting after open_timeout, but not given up on
+            assert source.isOpened()
+            ok, image = source.read()
+            assert ok and image.shape == (4, 4, 3)
+        finally:
+            source.release()
+
+
+def test_release_wakes_a_blocked_reader():
+    with scripted_camera():
+        source = LiveCameraSource('rtsp://camera', reconnect_delay=0.01, open_timeout=0.01)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(source.read_frame()))
+        reader.start()
+        time.sleep(0.05)
+        source.release()
+        reader.join(timeout=2.0)
+        assert results == [None]
+
+
+def test_synthetic_source_ends_after_max_frames():
+    source = SyntheticSource(size=(64, 48), max_frames=3)
+    frames = [source.read_frame() for _ in range(4)]
+    assert [f.index for f in frames[:3]] == [1, 2, 3] and frames[3] is None
+    assert frames[0].image.shape == (48, 64, 3)
+    assert source.position == 3
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
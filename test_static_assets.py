@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+🧪 Static Assets Test
+====================
+Regression tests for the precompressed dashboard assets: encoding
+negotiation, ETag revalidation, caching headers and missing vendor files
+"""
+
+import gzip
+import sys
+import tempfile
+from pathlib import Path
+
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src"))
+from static_assets import (PAGE_CACHE_CONTROL, VENDOR_CACHE_CONTROL, StaticAsset, StaticAssets,
+                           _accepted_encodings, brotli)
+
+PAGE = b'<html><body>' + b'<div class="queue">0</div>' * 200 + b'</body></html>'
+LIBRARY = b'var lib = {};' + b'lib.f = function () { return 1; };' * 200
+VENDOR = {'vendor/lib-1.0.min.js': 'https://cdn.example.com/lib-1.0.min.js'}
+
+
+def make_directory(tmp, with_vendor=True):
+    directory = Path(tmp)
+    (directory / 'dashboard.html').write_bytes(PAGE)
+    (directory / 'logo.svg').write_bytes(b'<svg/>')
+    if with_vendor:
+        (directory / 'vendor').mkdir()
+        (directory / 'vendor' / 'lib-1.0.min.js').write_bytes(LIBRARY)
+    return directory
+
+
+def client_for(assets):
+    app = Flask(__name__, static_folder=None)
+    assets.register(app)
+    return app.test_client()
+
+
+def test_accepted_encodings():
+    assert _accepted_encodings('gzip, deflate, br') == {'gzip', 'deflate', 'br'}
+    assert _accepted_encodings('br;q=0, GZIP;q=0.5') == {'gzip'}
+    assert _accepted_encodings('gzip;q=0.0') == set()
+    assert _accepted_encodings(None) == set()
+
+
+def test_asset_bodies_and_etags():
+    asset = StaticAsset('dashboard.html', PAGE)
+    assert asset.content_type == 'text/html; charset=utf-8'
+    assert gzip.decompress(asset.bodies['gzip']) == PAGE
+    if brotli is not None:
+        assert brotli.decompress(asset.bodies['br']) == PAGE
+        assert asset.pick_encoding('gzip, br') == 'br'
+    assert asset.pick_encoding('gzip, br;q=0') == 'gzip'
+    assert asset.pick_encoding('deflate') == 'identity'
+    # One ETag per encoding, sharing the content digest
+    assert len(set(asset.etags.values())) == len(asset.bodies)
+    assert len({etag.split('-')[0] for etag in asset.etags.values()}) == 1
+    # Compression that does not shrink a tiny file is dropped
+    assert list(StaticAsset('tiny.svg', b'<svg/>').bodies) == ['identity']
+
+
+def test_negotiation_and_caching_headers():
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = StaticAssets(make_directory(tmp), vendor=VENDOR)
+        client = client_for(assets)
+
+        response = client.get('/static/dashboard.html', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == PAGE
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert response.headers['Cache-Control'] == PAGE_CACHE_CONTROL
+        assert response.headers['ETag'].endswith('-gzip"')
+
+        response = client.get('/static/dashboard.html')
+        assert 'Content-Encoding' not in response.headers and response.data == PAGE
+
+        response = client.get('/static/vendor/lib-1.0.min.js', headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Cache-Control'] == VENDOR_CACHE_CONTROL
+        assert response.headers['Content-Encoding'] == ('br' if brotli is not None else 'gzip')
+        assert response.headers['Content-Type'] in ('application/javascript; charset=utf-8',
+                                                    'text/javascript; charset=utf-8')
+
+        assert client.get('/static/logo.svg').headers['Cache-Control'] == 'public, max-age=3600'
+        assert client.get('/static/missing.js').status_code == 404
+
+
+def test_if_none_match_answers_304():
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = StaticAssets(make_directory(tmp), vendor=VENDOR)
+        client = client_for(assets)
+        etag = client.get('/static/dashboard.html', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+        response = client.get('/static/dashboard.html', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304 and response.data == b''
+        assert response.headers['ETag'] == etag
+        assert client.get('/static/dashboard.html', headers={'If-None-Match': '"stale"'}).status_code == 200
+        assert assets.get_stats()['responses']['not_modified'] == 1
+
+
+def test_missing_vendor_file_falls_back_to_the_cdn():
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = StaticAssets(make_directory(tmp, with_vendor=False), vendor=VENDOR)
+        assert assets.missing == ['vendor/lib-1.0.min.js']
+        client = client_for(assets)
+        response = client.get('/static/vendor/lib-1.0.min.js')
+        assert response.status_code == 302
+        assert response.headers['Location'] == VENDOR['vendor/lib-1.0.min.js']
+        assert client.get('/static/dashboard.html').status_code == 200
+        assert assets.get_stats()['responses']['redirected'] == 1
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
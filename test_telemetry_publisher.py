@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+🧪 Telemetry Publisher Test
+==========================
+Regression tests for the vision loop's background HTTP sender: payloads
+published while a request is in flight are coalesced into the newest one,
+and a dashboard that is down or failing never blocks the loop
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from telemetry import TelemetryPublisher
+
+
+class Dashboard:
+    """
+    Local HTTP endpoint that answers slowly and records every body it receives.
+    """
+
+    def __init__(self, delay=0.0, statuses=()):
+        self.received = []
+        self.delay = delay
+        self.statuses = list(statuses)  # Status of each request in turn, then 200
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(dashboard.delay)
+                status = dashboard.statuses.pop(0) if dashboard.statuses else 200
+                if status == 200:
+                    dashboard.received.append(body)
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/update_traffic"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_payloads_published_during_a_request_are_coalesced():
+    dashboard = Dashboard(delay=0.1)
+    publisher = TelemetryPublisher(dashboard.url, timeout=1.0).start()
+    try:
+        start = time.perf_counter()
+        for i in range(50):
+            publisher.publish({'queues': [i, 0], 'frame': i})
+            time.sleep(0.005)
+        # Publishing never waited for the slow dashboard
+        assert time.perf_counter() - start < 1.0
+        assert wait_until(lambda: dashboard.received and dashboard.received[-1]['frame'] == 49)
+    finally:
+        publisher.stop()
+        dashboard.close()
+
+    stats = publisher.get_stats()
+    assert stats['published'] == 50 and stats['failed'] == 0 and stats['connected']
+    # Every payload was either sent or replaced by a newer one
+    assert stats['sent'] + stats['coalesced'] == 50 and stats['sent'] == len(dashboard.received)
+    assert stats['sent'] < 10
+    frames = [body['frame'] for body in dashboard.received]
+    assert frames == sorted(frames) and frames[0] == 0
+
+
+def test_unreachable_dashboard_never_blocks_the_loop():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]  # Nothing listens here once the socket closes
+    publisher = TelemetryPublisher(f"http://127.0.0.1:{port}/api/update_traffic", timeout=0.1).start()
+    start = time.perf_counter()
+    for i in range(100):
+        publisher.publish({'frame': i})
+    assert time.perf_counter() - start < 0.5
+    assert wait_until(lambda: publisher.failed >= 1)
+    publisher.publish({'frame': 100})
+    publisher.stop(flush_timeout=0.2)
+    assert time.perf_counter() - start < 3.0
+
+    stats = publisher.get_stats()
+    assert not stats['connected'] and stats['sent'] == 0 and stats['last_error'] == 'ConnectionError'
+    assert stats['published'] == 101 and stats['coalesced'] >= 90
+
+
+def test_server_errors_back_off_then_recover():
+    dashboard = Dashboard(statuses=[500])
+    publisher = TelemetryPublisher(dashboard.url, timeout=0.1).start()
+    try:
+        publisher.publish({'frame': 1})
+        assert wait_until(lambda: publisher.failed == 1)
+        assert publisher.last_error == 'HTTPError' and not publisher.connected
+        # The next payload goes out once the back-off is over
+        publisher.publish({'frame': 2})
+        assert wait_until(lambda: publisher.sent == 1)
+        assert publisher.connected and dashboard.received == [{'frame': 2}]
+    finally:
+        publisher.stop()
+        dashboard.close()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
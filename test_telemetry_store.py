@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+🧪 Telemetry Store Test
+======================
+Regression tests for the SQLite (WAL) event log: batched writes, reads while
+the writer runs, and the shared read connection
+"""
+
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "api"))
+from telemetry_store import TelemetryStore
+
+
+def wait_written(store, count, timeout=2.0):
+    deadline = time.time() + timeout
+    while store.written < count and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.written == count, store.get_stats()
+
+
+def test_write_read_round_trip_in_wal_mode():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TelemetryStore(Path(tmp) / 'nested' / 'telemetry.db', flush_interval=0.01).start()
+        try:
+            store.record('north', 100.2, 'update', [1, 2], 'KEEP')
+            store.record('north', 100.7, 'prediction', [3, 4], 'SWITCH', latency_ms=12.5)
+            store.record('north', 101.5, 'update', [5, 6, 7])
+            store.record('south', 100.5, 'update', [9, 9], 'KEEP')
+            wait_written(store, 4)
+
+            with sqlite3.connect(store.path) as connection:
+                assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+            events = store.events('north', 100, 102)
+            assert [e['t'] for e in events] == [100.2, 100.7, 101.5]
+            assert events[1] == {'t': 100.7, 'total_queue': 7.0, 'switch': 1, 'latency_ms': 12.5, 'queues': [3, 4]}
+            assert events[2]['switch'] is None and events[2]['queues'] == [5, 6, 7]
+            assert store.events('north', 100, 102, limit=1)[0]['t'] == 100.2
+
+            seconds = store.rollup('north', 100, 102, 1)
+            assert [p['t'] for p in seconds] == [100.0, 101.0]
+            assert (seconds[0]['samples'], seconds[0]['total_queue'], seconds[0]['total_queue_max']) == (2, 5.0, 7.0)
+            assert seconds[0]['switch_rate'] == 0.5 and seconds[0]['queues'] == [2.0, 3.0]
+            assert seconds[1]['queues'] == [5.0, 6.0, 7.0]
+            assert store.rollup('east', 0, 1000, 60) == []
+        finally:
+            store.close()
+
+
+def test_reads_from_many_threads_share_one_connection():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TelemetryStore(Path(tmp) / 'telemetry.db', flush_interval=0.01).start()
+        for i in range(50):
+            store.record('north', 100.0 + i, 'update', [i, 1])
+        wait_written(store, 50)
+
+        results, errors = [], []
+
+        def query():
+            try:
+                results.append(len(store.events('north', 0, 1000)))
+                results.append(len(store.rollup('north', 0, 1000, 10)))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=query) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [] and sorted(set(results)) == [5, 50]
+        connection = store._read_connection
+        assert connection is not None
+
+        # Writes keep landing while the reader connection is open
+        store.record('north', 200.0, 'update', [1, 1])
+        wait_written(store, 51)
+        assert len(store.events('north', 0, 1000)) == 51 and store._read_connection is connection
+
+        store.close()
+        assert store._read_connection is None
+        try:
+            connection.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            pass
+        else:
+            raise AssertionError("read connection still open after close()")
+
+
+def test_close_writes_what_is_still_queued():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TelemetryStore(Path(tmp) / 'telemetry.db', flush_interval=60.0).start()
+        for i in range(10):
+            store.record('north', float(i), 'update', [i])
+        store.close()
+        assert store.written == 10 and store.batches == 1
+
+        reopened = TelemetryStore(store.path)
+        assert len(reopened.events('north', 0, 10)) == 10
+        reopened.close()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+🧪 Tracker Test
+==============
+Regression tests for the NumPy ByteTrack-style tracker
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from tracker import ByteTracker, box_iou, greedy_match
+
+
+def test_box_iou():
+    iou = box_iou([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    assert np.allclose(iou, [[1.0, 1 / 3, 0.0]])
+    assert box_iou(np.empty((0, 4)), [[0, 0, 1, 1]]).shape == (0, 1)
+
+
+def test_greedy_match_takes_best_pairs_first():
+    iou = np.array([[0.9, 0.8],
+                    [0.85, 0.1],
+                    [0.0, 0.0]])
+    matches, unmatched_rows, unmatched_cols = greedy_match(iou, 0.3)
+    assert matches == [(0, 0)]
+    assert unmatched_rows == [1, 2] and unmatched_cols == [1]
+
+
+def test_ids_persist_while_objects_move():
+    tracker = ByteTracker()
+    first = second = None
+    for frame in range(20):
+        boxes = [[10 + 4 * frame, 10, 60 + 4 * frame, 50],      # Moving right
+                 [300, 200 - 3 * frame, 360, 260 - 3 * frame]]  # Moving up
+        ids = tracker.update(boxes, [0.9, 0.8])
+        if frame == 0:
+            first, second = ids.tolist()
+        assert ids.tolist() == [first, second]
+    assert first != second
+
+
+def test_new_object_gets_new_id_and_detection_order_does_not_matter():
+    tracker = ByteTracker()
+    a = tracker.update([[0, 0, 50, 50]], [0.9])[0]
+    ids = tracker.update([[400, 400, 450, 450], [1, 0, 51, 50]], [0.9, 0.9])
+    assert ids[1] == a
+    assert ids[0] not in (a, -1)
+
+
+def test_weak_detection_keeps_track_but_never_starts_one():
+    tracker = ByteTracker()
+    track_id = tracker.update([[100, 100, 160, 150]], [0.9])[0]
+    # Partial occlusion: confidence drops below high_thresh for a few frames
+    for _ in range(3):
+        assert tracker.update([[100, 100, 160, 150]], [0.2]).tolist() == [track_id]
+    assert tracker.update([[100, 100, 160, 150]], [0.9]).tolist() == [track_id]
+    # A weak detection far from every track gets no ID; one under low_thresh is ignored
+    assert tracker.update([[100, 100, 160, 150], [500, 500, 560, 550], [0, 300, 40, 340]],
+                          [0.9, 0.2, 0.05]).tolist() == [track_id, -1, -1]
+    assert len(tracker.tracks) == 1
+
+
+def test_lost_track_is_removed_after_max_age():
+    tracker = ByteTracker(max_age=3)
+    track_id = tracker.update([[0, 0, 50, 50]], [0.9])[0]
+    for _ in range(3):
+        tracker.update([], [])
+        assert tracker.removed_ids == []
+    tracker.update([], [])
+    assert tracker.removed_ids == [track_id]
+    assert tracker.tracks == []
+
+
+def test_track_recovered_within_max_age_keeps_id():
+    tracker = ByteTracker(max_age=5)
+    track_id = tracker.update([[0, 0, 50, 50]], [0.9])[0]
+    tracker.update([], [])
+    tracker.update([], [])
+    assert tracker.update([[0, 0, 50, 50]], [0.9]).tolist() == [track_id]
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+🧪 Camera Worker Test
+====================
+Regression tests for the shared-memory ring buffer between camera workers and
+the orchestrator, and for what a spawned worker imports
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT / "project" / "src" / "vision"))
+from detections import Detections
+from workers import SharedCameraState
+
+FRAME_SHAPE = (6, 8, 3)
+
+
+def detections(n, offset=0):
+    boxes = [[offset + i, i, offset + i + 10, i + 20] for i in range(n)]
+    return Detections(boxes, [2] * n, [0.5] * n, tracker_id=range(1, n + 1), zone_id=[i % 2 for i in range(n)])
+
+
+def test_shared_state_round_trips_through_the_slots():
+    writer = SharedCameraState(2, FRAME_SHAPE, slots=3, max_detections=4, create=True)
+    reader = SharedCameraState.attach(writer.spec())
+    try:
+        assert reader.read_latest() is None
+        # Enough writes to wrap the ring twice; the reader always sees the newest one
+        for seq in range(1, 8):
+            frame = np.full(FRAME_SHAPE, seq, dtype=np.uint8)
+            writer.write([seq, seq * 2], detections(seq % 4, offset=seq), frame, 100.0 + seq, seq * 10)
+            snapshot = reader.read_latest()
+            assert snapshot.seq == seq and int(writer.header[1]) == seq % 3
+            assert snapshot.queue_counts == [seq, seq * 2]
+            assert (snapshot.timestamp, snapshot.position) == (100.0 + seq, seq * 10)
+            assert (snapshot.frame == seq).all()
+            expected = detections(seq % 4, offset=seq)
+            assert np.array_equal(snapshot.detections.boxes, expected.boxes)
+            assert np.array_equal(snapshot.detections.tracker_id, expected.tracker_id)
+            assert np.array_equal(snapshot.detections.zone_id, expected.zone_id)
+            assert np.array_equal(snapshot.detections.class_id, expected.class_id)
+
+        # More vehicles than rows: the slot keeps the first max_detections
+        writer.write([9, 9], detections(6), None, 200.0, 80)
+        snapshot = reader.read_latest()
+        assert len(snapshot.detections) == 4 and snapshot.seq == 8
+        # A snapshot is a copy, later writes do not change it
+        writer.write([0, 0], detections(0), None, 201.0, 90)
+        assert snapshot.queue_counts == [9, 9] and len(snapshot.detections) == 4
+    finally:
+        reader.close()
+        writer.close(unlink=True)
+
+
+def test_spawned_worker_reimport_stays_light():
+    # What a spawn child runs before camera_worker: the main script, as __mp_main__
+    probe = ("import json, runpy, sys\n"
+             "runpy.run_path(sys.argv[1], run_name='__mp_main__')\n"
+             "heavy = ['gymnasium', 'sumo_rl', 'traci', 'flask', 'flask_socketio', 'eventlet', 'gevent',\n"
+             "         'processor', 'torch', 'transformers', 'policy_cache']\n"
+             "print(json.dumps([name for name in heavy if name in sys.modules]))\n")
+    script = ROOT / 'project' / 'src' / 'integrated_3d_system.py'
+    result = subprocess.run([sys.executable, '-c', probe, str(script)], cwd=script.parent,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
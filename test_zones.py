@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+🧪 Zone Mask Test
+================
+Regression tests for the precompiled per-camera zone label masks
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "project" / "src" / "vision"))
+from zones import ZoneMaskCache, compile_zone_mask, count_zones, lookup_zones, zone_rois
+
+FRAME_SHAPE = (480, 832, 3)
+POLYGONS = [
+    np.array([[50, 200], [250, 200], [250, 450], [50, 450]], np.int32),
+    np.array([[200, 100], [600, 100], [600, 300], [200, 300]], np.int32),  # Overlaps zone 0
+    np.array([[650, 50], [800, 60], [780, 400], [640, 380]], np.int32),
+]
+
+
+def test_mask_matches_point_polygon_test():
+    """Every pixel gets the first polygon that contains it, like the old per-box loop"""
+    mask = compile_zone_mask(FRAME_SHAPE, POLYGONS)
+    rng = np.random.default_rng(0)
+    points = np.stack([rng.integers(0, FRAME_SHAPE[1], 2000), rng.integers(0, FRAME_SHAPE[0], 2000)], axis=1)
+    for point, zone in zip(points.tolist(), lookup_zones(mask, points).tolist()):
+        # Rasterised edges may differ from the exact test by under a pixel
+        if any(abs(cv2.pointPolygonTest(polygon, tuple(point), True)) <= 1 for polygon in POLYGONS):
+            continue
+        expected = -1
+        for i, polygon in enumerate(POLYGONS):
+            if cv2.pointPolygonTest(polygon, tuple(point), False) >= 0:
+                expected = i
+                break
+        assert zone == expected, (point, zone, expected)
+
+
+def test_overlap_goes_to_first_polygon():
+    mask = compile_zone_mask(FRAME_SHAPE, POLYGONS)
+    assert lookup_zones(mask, [[225, 250]]).tolist() == [0]
+    assert lookup_zones(mask, [[400, 250]]).tolist() == [1]
+
+
+def test_lookup_outside_frame_and_empty():
+    mask = compile_zone_mask(FRAME_SHAPE, POLYGONS)
+    assert lookup_zones(mask, [[-1, 300], [100, 480], [832, 10]]).tolist() == [-1, -1, -1]
+    assert lookup_zones(mask, np.empty((0, 2))).shape == (0,)
+
+
+def test_count_zones():
+    assert count_zones([0, 2, -1, 2, 2], 3) == [1, 0, 3]
+    assert count_zones([], 2) == [0, 0]
+
+
+def test_mask_cache_rebuilds_only_on_change():
+    cache = ZoneMaskCache()
+    first = cache.get('cam', FRAME_SHAPE, POLYGONS)
+    assert cache.get('cam', FRAME_SHAPE, [p.copy() for p in POLYGONS]) is first
+    assert cache.get('cam', (240, 416, 3), POLYGONS) is not first
+    moved = [POLYGONS[0] + 5] + POLYGONS[1:]
+    assert cache.get('cam', FRAME_SHAPE, moved)[202, 52] == 0  # Pixel left uncovered by the moved zone
+    cache.invalidate('cam')
+    assert cache.get('cam', FRAME_SHAPE, POLYGONS) is not first
+
+
+def test_zone_rois():
+    union = zone_rois(FRAME_SHAPE, POLYGONS, 'union', padding=32)
+    assert union == [[18, 18, 832, 480]]
+    tiles = zone_rois(FRAME_SHAPE, POLYGONS[:1], 'tiles', padding=10)
+    assert tiles == [[40, 190, 261, 461]]
+    assert zone_rois(FRAME_SHAPE, [], 'union') == [[0, 0, 832, 480]]
+    try:
+        zone_rois(FRAME_SHAPE, POLYGONS, 'grid')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown ROI mode accepted")
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")